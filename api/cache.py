@@ -0,0 +1,189 @@
+"""
+🗄️ CLEANED RESULT CACHE
+Remembers the cleaned output of an upload on local disk, keyed on a hash of the file bytes,
+the schema, the read options and the transformer version - re-uploading the same spreadsheet
+skips straight to loading (or returning) instead of parsing and cleaning it again.
+Entries are evicted least-recently-used once the cache outgrows RESULT_CACHE_MB.
+Frames are stored as Parquet (needs pyarrow - without it the cache is off), never pickles, in a
+directory that must be private to this user: anyone who can write there could feed us results.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import uuid
+
+try:
+    from .export import parquet_available
+except ImportError:
+    from export import parquet_available
+
+CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pipeline-cache"))
+# Serverless /tmp is small - 0 turns the cache off
+CACHE_MAX_BYTES = int(float(os.environ.get("RESULT_CACHE_MB", "256")) * 1024 * 1024)
+HASH_BLOCK_BYTES = 1024 * 1024
+META_FILE = "meta.json"
+STALE_TMP_SECONDS = 3600
+# Stored in meta - entries written in any other format are ignored
+CACHE_FORMAT = "parquet"
+
+
+def content_key(stream, *parts):
+    """sha256 of the stream's bytes plus the JSON of parts; rewinds the stream"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    stream.seek(0)
+    digest.update(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedResult:
+    """A cache hit: meta (stats, logs, columns, row counts) plus the cleaned frames"""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+
+    def frames(self):
+        import pyarrow.parquet as pq
+        for i in range(self.meta["chunks"]):
+            yield pq.read_table(os.path.join(self.path, f"part-{i:05d}.parquet")).to_pandas()
+
+
+class _Writer:
+    """Collects the frames of one result in a private directory; commit() publishes it"""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.path = os.path.join(cache.directory, f".tmp-{key}-{uuid.uuid4().hex[:8]}")
+        self.parts = 0
+        self.bytes = 0
+        self.failed = False
+        os.makedirs(self.path)
+
+    def add(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.failed:
+            return
+        try:
+            part = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+            # Arrow's pandas metadata brings back the same dtypes (categoricals included) and index
+            pq.write_table(pa.Table.from_pandas(df), part)
+            self.parts += 1
+            self.bytes += os.path.getsize(part)
+            if self.bytes > self.cache.max_bytes:
+                self.abort()
+        except (OSError, pa.ArrowException):
+            # Columns Arrow can't store exactly (mixed numbers and text) - this upload isn't cached
+            self.abort()
+
+    def abort(self):
+        self.failed = True
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def commit(self, meta):
+        if self.failed:
+            return
+        try:
+            meta = dict(meta, chunks=self.parts, bytes=self.bytes, format=CACHE_FORMAT)
+            with open(os.path.join(self.path, META_FILE), "w") as f:
+                json.dump(meta, f, default=str)
+            os.rename(self.path, os.path.join(self.cache.directory, self.key))
+        except OSError:
+            # Another request cached the same key first (or the disk is full) - keep theirs
+            self.abort()
+            return
+        self.cache.evict()
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 and parquet_available()
+
+    def _private(self):
+        """Create the cache directory (0700) if needed; True only if it's ours and nobody else can write it"""
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            st = os.lstat(self.directory)
+        except OSError:
+            return False
+        if not stat.S_ISDIR(st.st_mode):
+            return False
+        if hasattr(os, "getuid") and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    def get(self, key):
+        """CachedResult for key, or None"""
+        if not key or not self.enabled or not self._private():
+            return None
+        path = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(path, META_FILE)) as f:
+                meta = json.load(f)
+            if meta.get("format") != CACHE_FORMAT:
+                return None
+            # mtime is the LRU clock
+            os.utime(os.path.join(path, META_FILE))
+        except (OSError, ValueError):
+            return None
+        return CachedResult(path, meta)
+
+    def writer(self, key):
+        """_Writer for a new entry, or None when caching is off"""
+        if not key or not self.enabled or not self._private():
+            return None
+        try:
+            return _Writer(self, key)
+        except OSError:
+            return None
+
+    def put(self, key, frames, meta):
+        writer = self.writer(key)
+        if writer is not None:
+            for df in frames:
+                writer.add(df)
+            writer.commit(meta)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(".tmp-"):
+                # Left behind by a worker that died mid-write
+                path = os.path.join(self.directory, name)
+                try:
+                    if time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+                continue
+            meta_path = os.path.join(self.directory, name, META_FILE)
+            try:
+                with open(meta_path) as f:
+                    size = json.load(f).get("bytes", 0)
+                entries.append((os.path.getmtime(meta_path), size, name))
+            except (OSError, ValueError):
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+
+
+result_cache = ResultCache()
@@ -0,0 +1,164 @@
+"""
+🧽 VECTORIZED COLUMN CLEANERS
+Whole-column versions of the magic_transform cleaners - same output, no per-cell apply().
+Each column is factorized once, every distinct value is cleaned once, and the result is
+expanded back with NumPy take/masks. Every cleaner returns (cleaned_series, changed_count).
+"""
+
+import re
+from itertools import repeat
+import numpy as np
+import pandas as pd
+
+GENDER_MAP = {
+    'm': 'Male', 'male': 'Male', 'man': 'Male', 'boy': 'Male', 'M': 'Male',
+    'f': 'Female', 'female': 'Female', 'woman': 'Female', 'girl': 'Female', 'F': 'Female',
+    'o': 'Other', 'other': 'Other', 'O': 'Other'
+}
+
+NON_DIGIT_RE = re.compile(r'\D')
+CURRENCY_RE = re.compile(r'[₹$€£¥,\s]')
+# Plain ASCII decimals - safe to hand to the bulk float cast when some cells are junk
+PLAIN_NUMBER_RE = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+
+
+def as_text(s):
+    """str() of every cell (NaN -> 'nan'), exactly what the old per-cell cleaners saw"""
+    if s.dtype.kind in 'mM':
+        # datetime64 astype(str) drops midnight times, str(Timestamp) does not
+        s = s.astype(object)
+    return s.astype(str)
+
+
+def distinct_text(s):
+    """(text, codes, uniques) - str() of every cell, factorized so each distinct value is cleaned once"""
+    text = as_text(s)
+    # Factorizing the str() form (not the raw values) keeps 1, 1.0 and True apart
+    codes, uniques = pd.factorize(text)
+    return text, codes, uniques
+
+
+def _objects(values):
+    """Object ndarray from any iterable of Python objects"""
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def _flags(values):
+    return np.fromiter(values, dtype=bool)
+
+
+def _expand(cleaned, codes, s):
+    """Cleaned distinct values -> full column aligned with s"""
+    return pd.Series(cleaned.take(codes), index=s.index, name=s.name)
+
+
+def clean_names(s):
+    """Collapse whitespace + Title Case"""
+    if s.empty:
+        return s.copy(), 0
+    _, codes, uniques = distinct_text(s)
+    cleaned = _objects(list(map(str.title, map(' '.join, map(str.split, uniques)))))
+    out = _expand(cleaned, codes, s)
+    out[s.isna()] = ''
+    return out, int((s != out).sum())
+
+
+def clean_emails(s):
+    """Lowercase + tag anything without '@' and '.' as [INVALID]"""
+    if s.empty:
+        return s.copy(), 0
+    _, codes, uniques = distinct_text(s)
+    emails = list(map(str.lower, map(str.strip, uniques)))
+    valid = _flags('@' in e and '.' in e for e in emails)
+    cleaned = _objects(emails)
+    blank = cleaned == ''
+    cleaned[~valid] = ['[INVALID] ' + e for e in cleaned[~valid]]
+    cleaned[blank] = ''
+
+    missing = s.isna().to_numpy()
+    out = _expand(cleaned, codes, s)
+    out[missing] = ''
+    # Lowercased/stripped input only differs from the output for NaN and [INVALID] cells
+    changed = missing | (~blank & ~valid).take(codes)
+    return out, int(changed.sum())
+
+
+def clean_phones(s):
+    """Digits only, 10 digits -> +91-XXXXX-XXXXX, 91 + 10 digits -> +91-XXXXX-XXXXX"""
+    if s.empty:
+        return s.copy(), 0
+    text, codes, uniques = distinct_text(s)
+    digits = _objects(list(map(NON_DIGIT_RE.sub, repeat(''), uniques)))
+    length = np.fromiter(map(len, digits), dtype=np.int64, count=len(digits))
+    blank = _objects(list(map(str.strip, uniques))) == ''
+    ten = length == 10
+    twelve = length == 12
+    twelve[twelve] = _flags(d.startswith('91') for d in digits[twelve])
+
+    # No digits at all -> original text is kept as-is
+    cleaned = np.where(length > 0, digits, uniques)
+    cleaned[ten] = [f"+91-{d[:5]}-{d[5:]}" for d in digits[ten]]
+    cleaned[twelve] = [f"+{d[:2]}-{d[2:7]}-{d[7:]}" for d in digits[twelve]]
+    cleaned[blank] = ''
+
+    out = _expand(cleaned, codes, s)
+    out[s.isna()] = ''
+    return out, int((text != out).sum())
+
+
+def clean_genders(s):
+    """m/f/o and friends -> Male/Female/Other"""
+    if s.empty:
+        return s.copy(), 0
+    text = s.astype(str)
+    codes, uniques = pd.factorize(text)
+    stripped = map(str.strip, uniques)
+    cleaned = _objects([GENDER_MAP.get(v.lower(), v) for v in stripped])
+    out = _expand(cleaned, codes, s)
+    return out, int((text != out).sum())
+
+
+def _to_float(val):
+    try:
+        return float(val)
+    except ValueError:
+        return 0.0
+
+
+def clean_amounts(s):
+    """Strip currency symbols/commas, (123) -> -123, unparseable -> 0.0"""
+    if s.empty:
+        return s.copy(), 0
+    if s.dtype.kind in 'iuf':
+        # Already numeric: float(str(x)) == float(x), NaN -> 0.0
+        out = s.astype('float64').fillna(0.0)
+        return out, int((s != out).sum())
+
+    _, codes, uniques = distinct_text(s)
+    cleaned = map(CURRENCY_RE.sub, repeat(''), uniques)
+    cleaned = _objects(['-' + v[1:-1] if v.startswith('(') and v.endswith(')') else v for v in cleaned])
+    try:
+        # numpy's object -> float64 cast calls float() on each string, so the result is identical
+        values = cleaned.astype('float64')
+    except ValueError:
+        plain = _flags(PLAIN_NUMBER_RE.fullmatch(v) is not None for v in cleaned)
+        values = np.zeros(len(cleaned), dtype='float64')
+        values[plain] = cleaned[plain].astype('float64')
+        values[~plain] = [_to_float(v) for v in cleaned[~plain]]
+
+    out = pd.Series(values.take(codes), index=s.index, name=s.name)
+    out[s.isna().to_numpy()] = 0.0
+    return out, int((s != out).sum())
+
+
+def clean_text(s):
+    """Trim, collapse inner whitespace, strip leading/trailing punctuation"""
+    if s.empty:
+        return s.copy(), 0
+    text, codes, uniques = distinct_text(s)
+    cleaned = _objects([' '.join(v.split()).strip('.,;:!?') for v in uniques])
+    out = _expand(cleaned, codes, s)
+    out[s.isna()] = ''
+    return out, int((text != out).sum())
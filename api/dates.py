@@ -0,0 +1,145 @@
+"""
+📅 DATE NORMALIZATION ENGINE
+Samples each column to find its dominant formats, parses those with vectorized
+pd.to_datetime(format=...), and only sends the leftovers through the old per-value rules.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+try:
+    from .cleaners import distinct_text
+except ImportError:
+    from cleaners import distinct_text
+
+# Priority order matters: '03/04/2024' is 3 April because %d/%m/%Y is tried first
+DATE_FORMATS = [
+    '%Y-%m-%d', '%d-%m-%Y', '%m-%d-%Y', '%d/%m/%Y', '%m/%d/%Y',
+    '%Y/%m/%d', '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y',
+    '%d.%m.%Y', '%Y.%m.%d'
+]
+SAMPLE_SIZE = 500
+SLOW_CACHE_SIZE = 65536
+
+
+def _strptime_accepts(fmt):
+    def accepts(val):
+        try:
+            datetime.strptime(val, fmt)
+            return True
+        except ValueError:
+            return False
+    return accepts
+
+
+@lru_cache(maxsize=None)
+def format_matcher(fmt):
+    """Predicate: does val have the shape datetime.strptime(val, fmt) accepts?
+    Uses strptime's own compiled regex when the private _strptime module still has it (much
+    faster), otherwise a real strptime attempt - either way the exact rules decide leftovers."""
+    try:
+        from _strptime import _TimeRE_cache
+        fullmatch = _TimeRE_cache.compile(fmt).fullmatch
+        usable = fullmatch(datetime(2024, 1, 15).strftime(fmt)) is not None
+    except Exception:
+        usable = False
+    if not usable:
+        return _strptime_accepts(fmt)
+    return lambda val: fullmatch(val) is not None
+
+
+@lru_cache(maxsize=SLOW_CACHE_SIZE)
+def parse_date_slow(val_str):
+    """Per-value rules: every format in order, then pandas' dayfirst parser -> (value, matched_by)"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(val_str, fmt).strftime('%Y-%m-%d'), fmt
+        except ValueError:
+            continue
+    try:
+        return pd.to_datetime(val_str, dayfirst=True).strftime('%Y-%m-%d'), 'fallback'
+    except (ValueError, TypeError, OverflowError):
+        return val_str, None
+
+
+def _first_format(val):
+    for fmt in DATE_FORMATS:
+        if format_matcher(fmt)(val):
+            return fmt
+    return None
+
+
+def detect_formats(values):
+    """First-matching format of each sampled value -> {format: hits}"""
+    hits = {}
+    for val in values:
+        fmt = _first_format(val)
+        if fmt:
+            hits[fmt] = hits.get(fmt, 0) + 1
+    return hits
+
+
+def _matches(fmt, values):
+    return np.fromiter(map(format_matcher(fmt), values), dtype=bool, count=len(values))
+
+
+def clean_dates(s):
+    """Any known date format -> YYYY-MM-DD; returns (cleaned, changed, report)"""
+    if s.empty:
+        return s.copy(), 0, {}
+    text, codes, uniques = distinct_text(s)
+    missing = s.isna().to_numpy()
+    stripped = np.array([v.strip() for v in uniques], dtype=object)
+    rows = np.bincount(codes[~missing], minlength=len(uniques))
+
+    result = stripped.copy()
+    matched_by = np.full(len(uniques), 'unparsed', dtype=object)
+    pending = np.flatnonzero((rows > 0) & (stripped != ''))
+
+    # === SAMPLE ROWS (not distinct values) SO THE DOMINANT FORMATS WIN ===
+    sample = codes[~missing]
+    sample = sample[np.isin(sample, pending)]
+    if len(sample) > SAMPLE_SIZE:
+        sample = np.random.default_rng(0).choice(sample, size=SAMPLE_SIZE, replace=False)
+    detected = detect_formats(stripped[sample])
+
+    slow = []
+    last_detected = max((DATE_FORMATS.index(f) for f in detected), default=-1)
+    for fmt in DATE_FORMATS[:last_detected + 1]:
+        if not len(pending):
+            break
+        hit = _matches(fmt, stripped[pending])
+        if fmt not in detected:
+            # An earlier format would win for these - let the exact rules decide
+            slow.extend(pending[hit])
+            pending = pending[~hit]
+            continue
+
+        candidates = pending[hit]
+        pending = pending[~hit]
+        parsed = pd.to_datetime(pd.Series(stripped[candidates]), format=fmt, errors='coerce').to_numpy()
+        ok = ~np.isnat(parsed)
+        result[candidates[ok]] = np.datetime_as_string(parsed[ok], unit='D')
+        matched_by[candidates[ok]] = fmt
+        # Shape matched but pandas refused (31/02, year 0999, ...) - the exact rules decide
+        slow.extend(candidates[~ok])
+
+    # === LEFTOVERS: PER DISTINCT VALUE, MEMOIZED ACROSS COLUMNS AND CHUNKS ===
+    for idx in list(slow) + list(pending):
+        result[idx], fmt = parse_date_slow(stripped[idx])
+        matched_by[idx] = fmt or 'unparsed'
+
+    result[stripped == ''] = ''
+    out = pd.Series(result.take(codes), index=s.index, name=s.name)
+    out[missing] = ''
+
+    counted = np.flatnonzero((rows > 0) & (stripped != ''))
+    covered = pd.Series(rows[counted]).groupby(matched_by[counted]).sum()
+    report = {
+        "formats": {f: int(covered[f]) for f in DATE_FORMATS if f in covered},
+        "fallback": int(covered.get('fallback', 0)),
+        "unparsed": int(covered.get('unparsed', 0)),
+    }
+    return out, int((text != out).sum()), report
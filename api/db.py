@@ -0,0 +1,113 @@
+"""
+🔌 SHARED DATABASE ENGINE
+One pooled SQLAlchemy engine per database URL for the whole process, so warm serverless
+invocations reuse open connections instead of paying a new TLS handshake per request.
+"""
+
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# Neon/pgbouncer drop idle connections - recycle before they do
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+
+_engines = {}
+_engines_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics = {
+    "checkouts": 0,
+    "connects": 0,
+    "timeouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including opening a new connection)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with _metrics_lock:
+                _metrics["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with _metrics_lock:
+                _metrics["wait_seconds_total"] += waited
+                _metrics["wait_seconds_max"] = max(_metrics["wait_seconds_max"], waited)
+
+
+def _count(key):
+    def listener(*args):
+        with _metrics_lock:
+            _metrics[key] += 1
+    return listener
+
+
+def _new_engine(url):
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:")):
+        # In-memory SQLite keeps its own single-connection pool
+        return create_engine(url)
+    engine = create_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+    )
+    event.listen(engine.pool, "checkout", _count("checkouts"))
+    event.listen(engine.pool, "connect", _count("connects"))
+    return engine
+
+
+def get_engine(url):
+    """The shared engine for url (created on first use)"""
+    engine = _engines.get(url)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = _engines[url] = _new_engine(url)
+    return engine
+
+
+def dispose_engines(close=True):
+    """Close every pooled connection (tests / shutdown).
+    close=False just forgets them - for forked workers, whose inherited sockets belong to the parent."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose(close=close)
+        _engines.clear()
+
+
+def pool_metrics():
+    """Checkout/wait counters plus the live state of each pool"""
+    with _metrics_lock:
+        stats = dict(_metrics)
+    stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    pools = []
+    for engine in list(_engines.values()):
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            pools.append({
+                "dialect": engine.dialect.name,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+    stats["pools"] = pools
+    return stats
@@ -0,0 +1,234 @@
+"""
+♻️ DEDUPLICATION HELPERS
+Row-key digests and a compact digest set so duplicates can be dropped across chunks
+without keeping earlier chunks in memory - plus NearDuplicateFinder, the second dedup pass
+that runs after the cleaners: keys are compared in a canonical form (case, spacing, phone
+formatting ignored) and, with PIPELINE_FUZZY_DEDUP=1, names that are merely similar are matched
+too. Fuzzy matching only compares rows inside one block - same phone/email/id values and same
+phonetic name key - so it stays near-linear on big rosters instead of comparing every pair.
+"""
+
+import difflib
+import os
+import re
+import numpy as np
+import pandas as pd
+
+FUZZY_DEDUP = os.environ.get("PIPELINE_FUZZY_DEDUP", "") == "1"
+# Name similarity (0-1) at which two records of one block are the same person
+FUZZY_NAME_THRESHOLD = float(os.environ.get("PIPELINE_FUZZY_THRESHOLD", "0.88"))
+# Names compared per block at most - bounds the worst case when a key is shared by many rows
+FUZZY_MAX_BLOCK = 50
+# Merged clusters listed in stats (the counts always cover all of them)
+CLUSTER_REPORT_LIMIT = 100
+CLUSTER_EXAMPLES = 5
+
+NAME_MARKS = re.compile(r"['’.]")
+NAME_SEPARATORS = re.compile(r'[\W\d_]+')
+NON_DIGITS = re.compile(r'\D')
+NON_ALNUM = re.compile(r'[\W_]+')
+SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in letters}
+
+
+def _canonical(s):
+    """Key column as text that doesn't depend on the dtype a chunk happened to infer"""
+    if s.dtype.kind in 'iu':
+        return s.astype(str)
+    if s.dtype.kind == 'f':
+        # 42 in one chunk and 42.0 in the next (NaN elsewhere in it) are the same key
+        out = s.astype(str)
+        whole = s.notna() & (s % 1 == 0) & (s.abs() < 2 ** 63)
+        out[whole] = s[whole].astype('int64').astype(str)
+        return out
+    return s.astype(str)
+
+
+def key_digests(df, cols):
+    """uint64 digest per row of the key columns"""
+    keys = pd.DataFrame({i: _canonical(df[col]) for i, col in enumerate(cols)}, index=df.index)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class KeyDigestSet:
+    """Set of 64-bit row-key digests stored as sorted uint64 runs - 8 bytes per key instead of a Python object.
+    Runs are merged like a binary counter, so lookups touch O(log n) runs."""
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, digests):
+        """Bool mask: digest already in the set"""
+        found = np.zeros(len(digests), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, digests)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == digests
+        return found
+
+    def add(self, digests):
+        run = np.unique(digests)
+        if not len(run):
+            return
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= len(self._runs[-1]):
+            newest = self._runs.pop()
+            self._runs[-1] = np.union1d(self._runs[-1], newest)
+
+    def seen_before(self, digests):
+        """Bool mask of duplicates (seen in an earlier batch or earlier in this one); remembers the rest"""
+        dup = pd.Series(digests).duplicated(keep='first').to_numpy() | self.contains(digests)
+        self.add(digests[~dup])
+        return dup
+
+
+def _canonical_name(v):
+    return NAME_SEPARATORS.sub(' ', NAME_MARKS.sub('', v.casefold())).strip()
+
+
+def _canonical_phone(v):
+    # 9876543210.0 (a float in a mixed column) is 9876543210
+    return NON_DIGITS.sub('', v[:-2] if v.endswith('.0') else v)[-10:]
+
+
+def _canonical_email(v):
+    return v.strip().lower()
+
+
+def _canonical_id(v):
+    return NON_ALNUM.sub('', v.casefold())
+
+
+def _canonical_text(v):
+    return ' '.join(v.casefold().split())
+
+
+CANONICAL = {"name": _canonical_name, "phone": _canonical_phone, "email": _canonical_email, "id": _canonical_id}
+
+
+def canonical_values(s, kind=None):
+    """Column as the text dedup compares after cleaning - '' for missing values.
+    name: case/punctuation/spacing ignored; phone: last 10 digits; email: lowercased; id: letters
+    and digits only; anything else: case and spacing ignored."""
+    codes, uniques = pd.factorize(s)
+    canonical = CANONICAL.get(kind, _canonical_text)
+    # Each distinct value once; code -1 (missing) takes the appended last slot
+    text = [canonical(v) for v in _canonical(pd.Series(uniques)).tolist()] + ['']
+    return pd.Series(np.array(text, dtype=object).take(codes), index=s.index)
+
+
+def soundex(word):
+    """American Soundex code of a word ('' for a word without letters)"""
+    letters = [c for c in word.lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code, last = letters[0].upper(), SOUNDEX_CODES[letters[0]]
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES[c]
+        if digit != '0' and digit != last:
+            code += digit
+        if c not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+
+def phonetic_key(name):
+    """Order-independent Soundex key of a canonical name - 'rahul sharma' and 'sharma rahool' share one"""
+    return ' '.join(sorted(soundex(token) for token in name.split()))
+
+
+def name_similarity(a, b):
+    """0-1 similarity of two canonical names, word order ignored"""
+    plain = difflib.SequenceMatcher(None, a, b).ratio()
+    reordered = difflib.SequenceMatcher(None, ' '.join(sorted(a.split())), ' '.join(sorted(b.split()))).ratio()
+    return max(plain, reordered)
+
+
+def _report_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+class NearDuplicateFinder:
+    """Post-cleaning dedup state for one file - keep one across the chunks of a streamed file.
+    Exact matches on the canonical keys are remembered as digests (8 bytes a row); fuzzy mode
+    also keeps each kept row's canonical values in a blocking index, which costs real memory."""
+
+    def __init__(self, fuzzy=None, threshold=None):
+        self.fuzzy = FUZZY_DEDUP if fuzzy is None else fuzzy
+        self.threshold = FUZZY_NAME_THRESHOLD if threshold is None else threshold
+        self._seen = KeyDigestSet()
+        self._blocks = {}
+
+    def find(self, df, cols, kinds):
+        """(bool mask of rows to drop, merged clusters, rows dropped as fuzzy matches) for the key
+        columns cols of df. Only the first CLUSTER_REPORT_LIMIT clusters are listed - the mask and
+        the fuzzy count cover every row. kinds ({column: planned kind}) picks each column's
+        canonical form; columns planned as names are the ones fuzzy mode compares."""
+        canon = pd.DataFrame({col: canonical_values(df[col], kinds.get(col)) for col in cols}, index=df.index)
+        digests = pd.util.hash_pandas_object(canon, index=False).to_numpy()
+        drop = self._seen.seen_before(digests)
+        values = canon.to_numpy()
+        clusters = {}
+        for i in np.flatnonzero(drop):
+            self._add(clusters, ("normalized", digests[i]), values[i], df, cols, i, 1.0)
+
+        fuzzy = 0
+        names = [col for col in cols if kinds.get(col) == "name"]
+        if self.fuzzy and names:
+            similar = self._fuzzy(df, canon, values, cols, names, np.flatnonzero(~drop), clusters)
+            fuzzy = int(similar.sum())
+            drop |= similar
+        return drop, list(clusters.values()), fuzzy
+
+    def _fuzzy(self, df, canon, values, cols, names, candidates, clusters):
+        full = canon[names[0]] if len(names) == 1 else canon[names].agg(' '.join, axis=1).str.strip()
+        codes, uniques = pd.factorize(full)
+        # Block = same values in every other key column + same phonetic name key
+        block_frame = canon[[col for col in cols if col not in names]].copy()
+        block_frame["_phonetic"] = np.array([phonetic_key(name) for name in uniques] + [''], dtype=object).take(codes)
+        blocks = pd.util.hash_pandas_object(block_frame, index=False).to_numpy()
+
+        drop = np.zeros(len(df), dtype=bool)
+        full, blocks, rows = full.tolist(), blocks.tolist(), values.tolist()
+        for i in candidates.tolist():
+            name = full[i]
+            if not name:
+                continue
+            reps = self._blocks.setdefault(blocks[i], [])
+            best, match = 0.0, None
+            for rep in reps:
+                score = name_similarity(name, rep[0])
+                if score > best:
+                    best, match = score, rep
+            if match is not None and best >= self.threshold:
+                drop[i] = True
+                self._add(clusters, ("fuzzy", blocks[i], match[0]), match[1], df, cols, i, best)
+            elif len(reps) < FUZZY_MAX_BLOCK:
+                reps.append((name, rows[i]))
+        return drop
+
+    def _add(self, clusters, key, canonical, df, cols, i, score):
+        """Count row i of df into the cluster of key (a kept record with these canonical values)"""
+        cluster = clusters.get(key)
+        if cluster is None:
+            if len(clusters) >= CLUSTER_REPORT_LIMIT:
+                return
+            cluster = clusters[key] = {
+                "match": key[0],
+                "key": dict(zip(cols, canonical)),
+                "merged": 0,
+                "similarity": 1.0,
+                "examples": [],
+            }
+        cluster["merged"] += 1
+        cluster["similarity"] = round(min(cluster["similarity"], score), 3)
+        if len(cluster["examples"]) < CLUSTER_EXAMPLES:
+            row = df.iloc[i]
+            cluster["examples"].append({col: _report_value(row[col]) for col in cols})
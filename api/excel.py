@@ -0,0 +1,153 @@
+"""
+📗 EXCEL READER
+Streams .xlsx sheets row by row and parses them in batches with the same TextParser
+pd.read_excel uses - so a big workbook feeds the chunked pipeline without ever being held as
+one DataFrame, and any sheet / header row can be picked.
+Rows come from openpyxl's read-only iter_rows, or with EXCEL_ENGINE=calamine from
+python-calamine - a native parser ~50x faster, but it reads whitespace-only text cells that
+were saved without xml:space="preserve" as empty, so results can differ from pd.read_excel.
+"""
+
+import os
+from datetime import date, datetime
+from itertools import islice
+import numpy as np
+
+# openpyxl | calamine | auto (calamine when installed)
+EXCEL_ENGINE = os.environ.get("EXCEL_ENGINE", "openpyxl").lower()
+
+# Error cells come back as their code with values_only - pd.read_excel reads them as NaN
+ERROR_CODES = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'}
+
+
+def _cell(value):
+    """Same conversions pandas' openpyxl reader applies"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    if type(value) is date:
+        # calamine hands back midnight timestamps as dates
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _trimmed(row):
+    values = [_cell(v) for v in row]
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+def engine():
+    if EXCEL_ENGINE != "auto":
+        return EXCEL_ENGINE
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def _sheet_name(names, sheet):
+    """Sheet name from a name or 0-based index (None = first sheet)"""
+    if sheet is None or sheet == "":
+        return names[0]
+    if isinstance(sheet, int) or str(sheet).isdigit():
+        index = int(sheet)
+        if index >= len(names):
+            raise ValueError(f"Sheet {index} not found - workbook has {len(names)} sheet(s)")
+        return names[index]
+    if sheet not in names:
+        raise ValueError(f"Sheet '{sheet}' not found - available: {', '.join(names)}")
+    return sheet
+
+
+def _calamine_rows(file_obj, sheet):
+    from python_calamine import CalamineWorkbook
+    wb = CalamineWorkbook.from_filelike(file_obj)
+    try:
+        ws = wb.get_sheet_by_name(_sheet_name(wb.sheet_names, sheet))
+        # iter_rows starts at row 1 but at the first used column - pad back to column A
+        pad = [""] * (ws.start[1] if ws.start else 0)
+        for row in ws.iter_rows():
+            yield pad + row
+    finally:
+        wb.close()
+
+
+def _openpyxl_rows(file_obj, sheet):
+    from openpyxl import load_workbook
+    wb = load_workbook(file_obj, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[_sheet_name(wb.sheetnames, sheet)]
+        ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def sheet_rows(file_obj, sheet=None):
+    """Raw cell values of a sheet, row by row from row 1"""
+    if engine() == "calamine":
+        return _calamine_rows(file_obj, sheet)
+    return _openpyxl_rows(file_obj, sheet)
+
+
+def sheet_names(file_obj):
+    if engine() == "calamine":
+        from python_calamine import CalamineWorkbook
+        wb = CalamineWorkbook.from_filelike(file_obj)
+        names = wb.sheet_names
+        wb.close()
+        return names
+    from openpyxl import load_workbook
+    wb = load_workbook(file_obj, read_only=True)
+    names = wb.sheetnames
+    wb.close()
+    return names
+
+
+def _parse(header, rows, width, na_values):
+    # Imported here so listing a workbook's sheets doesn't load pandas
+    from pandas.io.parsers import TextParser
+    data = [row[:width] + [""] * (width - len(row)) for row in [header] + rows]
+    return TextParser(data, header=0, na_values=na_values, skip_blank_lines=False).read()
+
+
+def iter_excel(file_obj, sheet=None, header_row=1, batch_rows=None, na_values=None):
+    """DataFrames of batch_rows rows (one frame for the whole sheet when batch_rows is None).
+    sheet is a name or 0-based index; header_row is the 1-based row holding the column names.
+    The column count is fixed by the first batch (every chunk must have the same columns) -
+    cells further right that only appear in later batches are dropped."""
+    source = sheet_rows(file_obj, sheet)
+    try:
+        rows = islice(source, max(1, header_row or 1) - 1, None)
+        header = None
+        for row in rows:
+            header = _trimmed(row)
+            break
+        if not header:
+            raise ValueError("Header row is empty")
+
+        batch, blanks, width = [], [], None
+        for row in rows:
+            values = _trimmed(row)
+            if not values:
+                # Only blank rows before more data count - pandas drops the trailing ones
+                blanks.append(values)
+                continue
+            batch.extend(blanks)
+            blanks = []
+            batch.append(values)
+            if batch_rows and len(batch) >= batch_rows:
+                width = width or max(len(header), max(len(r) for r in batch))
+                yield _parse(header, batch, width, na_values)
+                batch = []
+        if batch or width is None:
+            width = width or max([len(header)] + [len(r) for r in batch])
+            yield _parse(header, batch, width, na_values)
+    finally:
+        source.close()
@@ -0,0 +1,120 @@
+"""
+📤 CLEANED FILE EXPORT
+Encodes cleaned chunks as they come out of the pipeline - CSV (optionally gzip-compressed)
+or Parquet - so a download starts after the first chunk and never holds the whole file.
+"""
+
+import zlib
+import pandas as pd
+
+FORMATS = ("csv", "parquet")
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+GZIP_LEVEL = 6
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def csv_chunks(frames):
+    """CSV bytes per frame, header only on the first"""
+    for i, df in enumerate(frames):
+        yield df.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """One gzip stream across all chunks (Content-Encoding: gzip)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _Sink:
+    """Write-only file for ParquetWriter that hands bytes back instead of keeping them"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_frame(df, schema=None):
+    """Typed copy for Arrow: columns of numbers mixed with '' (schema-filled or from older cached
+    results) can't be stored in Parquet - those become nullable doubles, other mixed columns text"""
+    import pyarrow as pa
+
+    df = df.copy()
+    for col in df.columns[df.dtypes == 'category']:
+        # Dictionary columns would need the same categories in every chunk - store plain values
+        df[col] = df[col].astype(object)
+    for col in df.columns[df.dtypes == object]:
+        s = df[col]
+        filled = s.where(s != '')
+        kind = pd.api.types.infer_dtype(filled, skipna=True)
+        field = schema.field(str(col)).type if schema is not None else None
+        if field is not None:
+            numeric = pa.types.is_floating(field)
+        else:
+            numeric = kind in ('floating', 'integer', 'mixed-integer-float')
+        if numeric:
+            df[col] = pd.to_numeric(filled, errors='coerce').astype('float64')
+        elif kind not in ('string', 'empty'):
+            df[col] = s.where(s.isna(), s.astype(str))
+    return df
+
+
+def parquet_chunks(frames):
+    """Parquet file bytes, one row group per frame (needs pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _Sink()
+    writer = schema = None
+    for df in frames:
+        if writer is None:
+            table = pa.Table.from_pandas(_arrow_frame(df), preserve_index=False)
+            schema = table.schema
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+        else:
+            table = pa.Table.from_pandas(_arrow_frame(df, schema), schema=schema, preserve_index=False)
+        writer.write_table(table)
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(frames, fmt="csv", gzip=False):
+    """Encoded byte chunks for cleaned frames"""
+    if fmt == "parquet":
+        return parquet_chunks(frames)
+    chunks = csv_chunks(frames)
+    return gzip_chunks(chunks) if gzip else chunks
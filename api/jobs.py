@@ -0,0 +1,222 @@
+"""
+📋 IMPORT JOBS
+Background imports: the upload is spilled to a temp file, a row in _import_jobs tracks it,
+and the pipeline reports stage progress and logs into that row as it goes. The store is the
+app database itself, so a poll that lands on another serverless instance still finds the job.
+The job itself runs as a task on this process's event loop, so it needs a long-lived server
+(uvicorn); under a serverless handler the instance may freeze once the response is sent, and
+jobs run inline instead - the request returns when the import is done.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from sqlalchemy import text
+
+try:
+    from .db import get_engine
+    from .workers import pipeline_cancelled, release, reserve, run_pipeline
+except ImportError:
+    from db import get_engine
+    from workers import pipeline_cancelled, release, reserve, run_pipeline
+
+JOBS_TABLE = "_import_jobs"
+# Serverless runtimes (Lambda / Vercel via Mangum) don't run tasks after the response - run jobs inline there
+RUN_INLINE = (os.environ.get("IMPORT_JOBS_INLINE", "") == "1"
+              or bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME") or os.environ.get("VERCEL")))
+
+_ready = set()
+_tasks = set()
+
+
+def ensure_jobs_table(db_url):
+    if db_url in _ready:
+        return
+    with get_engine(db_url).begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+                id VARCHAR(32) PRIMARY KEY,
+                status VARCHAR(16) NOT NULL,
+                stage VARCHAR(16),
+                table_name VARCHAR(255),
+                file_name VARCHAR(255),
+                created_by_id VARCHAR(255),
+                rows_parsed BIGINT DEFAULT 0,
+                rows_cleaned BIGINT DEFAULT 0,
+                rows_written BIGINT DEFAULT 0,
+                logs TEXT,
+                result TEXT,
+                error TEXT,
+                cancel_requested BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        """))
+    _ready.add(db_url)
+
+
+def create_job(db_url, table_name, file_name, user_id=None):
+    ensure_jobs_table(db_url)
+    job_id = uuid.uuid4().hex
+    now = datetime.now()
+    with get_engine(db_url).begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO {JOBS_TABLE} (id, status, stage, table_name, file_name, created_by_id, logs, created_at, updated_at)
+            VALUES (:id, 'queued', 'queued', :table_name, :file_name, :user_id, '[]', :now, :now)
+        """), {"id": job_id, "table_name": table_name, "file_name": file_name, "user_id": user_id, "now": now})
+    return job_id
+
+
+class JobReporter:
+    """progress callback for process_file_and_load that writes into the job row.
+    Holds only ids so it pickles into process-pool workers."""
+
+    def __init__(self, job_id, db_url):
+        self.job_id = job_id
+        self.db_url = db_url
+
+    def __call__(self, stage, logs, rows_parsed=None, rows_cleaned=None, rows_written=None):
+        with get_engine(self.db_url).begin() as conn:
+            cancel = conn.execute(text(f"""
+                UPDATE {JOBS_TABLE} SET
+                    status = 'running',
+                    stage = :stage,
+                    rows_parsed = COALESCE(:rows_parsed, rows_parsed),
+                    rows_cleaned = COALESCE(:rows_cleaned, rows_cleaned),
+                    rows_written = COALESCE(:rows_written, rows_written),
+                    logs = :logs,
+                    updated_at = :now
+                WHERE id = :id
+                RETURNING cancel_requested
+            """), {
+                "id": self.job_id,
+                "stage": stage,
+                "rows_parsed": rows_parsed,
+                "rows_cleaned": rows_cleaned,
+                "rows_written": rows_written,
+                "logs": json.dumps(logs),
+                "now": datetime.now(),
+            }).scalar()
+        if cancel:
+            raise pipeline_cancelled()(f"Job {self.job_id} was cancelled")
+
+
+def finish_job(db_url, job_id, status, result=None, error=None):
+    result = dict(result or {})
+    logs = result.pop("logs", None)
+    params = {
+        "id": job_id,
+        "status": status,
+        "result": json.dumps(result, default=str) if result else None,
+        "error": error,
+        "now": datetime.now(),
+        "logs": json.dumps(logs) if logs is not None else None,
+    }
+    with get_engine(db_url).begin() as conn:
+        conn.execute(text(f"""
+            UPDATE {JOBS_TABLE} SET
+                status = :status,
+                stage = :status,
+                result = :result,
+                error = :error,
+                logs = COALESCE(:logs, logs),
+                updated_at = :now,
+                finished_at = :now
+            WHERE id = :id
+        """), params)
+
+
+def _iso(value):
+    # SQLite hands timestamps back as strings
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def get_job(db_url, job_id, logs_from=0):
+    """Job as a dict (None if unknown); logs_from skips log lines the client already has"""
+    ensure_jobs_table(db_url)
+    with get_engine(db_url).connect() as conn:
+        row = conn.execute(text(f"SELECT * FROM {JOBS_TABLE} WHERE id = :id"), {"id": job_id}).mappings().first()
+    if row is None:
+        return None
+    logs = json.loads(row["logs"] or "[]")
+    result = json.loads(row["result"]) if row["result"] else {}
+    return {
+        "id": row["id"],
+        "status": row["status"],
+        "stage": row["stage"],
+        "tableName": row["table_name"],
+        "fileName": row["file_name"],
+        "progress": {
+            "rowsParsed": row["rows_parsed"],
+            "rowsCleaned": row["rows_cleaned"],
+            "rowsWritten": row["rows_written"],
+        },
+        "logs": logs[logs_from:],
+        "logCount": len(logs),
+        "stats": result.pop("stats", None),
+        "result": result or None,
+        "error": row["error"],
+        "cancelRequested": bool(row["cancel_requested"]),
+        "createdAt": _iso(row["created_at"]),
+        "updatedAt": _iso(row["updated_at"]),
+        "finishedAt": _iso(row["finished_at"]),
+    }
+
+
+def request_cancel(db_url, job_id):
+    """Flag a job for cancellation - the worker stops at its next progress report"""
+    ensure_jobs_table(db_url)
+    with get_engine(db_url).begin() as conn:
+        conn.execute(text(f"""
+            UPDATE {JOBS_TABLE} SET cancel_requested = TRUE, updated_at = :now
+            WHERE id = :id AND status NOT IN ('succeeded', 'failed', 'cancelled')
+        """), {"id": job_id, "now": datetime.now()})
+    return get_job(db_url, job_id)
+
+
+async def _run(job_id, path, filename, table_name, db_url, on_success, kwargs):
+    PipelineCancelled = pipeline_cancelled()
+    try:
+        result = await run_pipeline(path, filename, table_name, db_url, reserved=True,
+                                    progress=JobReporter(job_id, db_url), **kwargs)
+        if result.get("success") and on_success:
+            await asyncio.to_thread(on_success, result)
+        status = "succeeded" if result.get("success") else "failed"
+        error = None if result.get("success") else (result.get("errors") or [None])[0]
+        await asyncio.to_thread(finish_job, db_url, job_id, status, result, error)
+    except PipelineCancelled:
+        await asyncio.to_thread(finish_job, db_url, job_id, "cancelled")
+    except Exception as e:
+        await asyncio.to_thread(finish_job, db_url, job_id, "failed", None, str(e))
+    finally:
+        os.remove(path)
+
+
+async def start_job(path, filename, table_name, db_url, user_id=None, on_success=None, **kwargs):
+    """Queue process_file_and_load(path, ...) in the background and return its job id.
+    Takes ownership of path (deleted when the job ends); raises PipelineBusy when the pool is full.
+    on_success(result) runs after a successful load, before the job is marked finished.
+    With RUN_INLINE the job has finished by the time this returns."""
+    try:
+        reserve()
+    except Exception:
+        os.remove(path)
+        raise
+    try:
+        job_id = await asyncio.to_thread(create_job, db_url, table_name, filename, user_id)
+    except Exception:
+        release()
+        os.remove(path)
+        raise
+    if RUN_INLINE:
+        await _run(job_id, path, filename, table_name, db_url, on_success, kwargs)
+        return job_id
+    task = asyncio.get_running_loop().create_task(
+        _run(job_id, path, filename, table_name, db_url, on_success, kwargs)
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
@@ -0,0 +1,205 @@
+"""
+🚚 BULK TABLE LOADER
+Creates a staging table with inferred column types, streams rows into it with
+COPY ... FROM STDIN (Postgres) and swaps it in for the target table in the same
+transaction - readers see the old table or the new one, never a half-written one.
+Instead of swapping, staged rows can be merged into the existing table on its key
+columns (INSERT ... ON CONFLICT), so only new and changed rows are written.
+Other databases (SQLite for local testing) fall back to DataFrame.to_sql inserts.
+"""
+
+import hashlib
+import io
+import uuid
+
+COPY_BATCH_ROWS = 50000
+NULL_MARKER = '\\N'
+INTEGER_TYPES = ('smallint', 'integer', 'bigint')
+
+
+def sql_type(series):
+    """Column type for a DataFrame column - same choices DataFrame.to_sql makes for it once
+    missing values are filled with '' (so a numeric or date column with gaps is TEXT)"""
+    kind = series.dtype.kind
+    if kind in 'biufM' and series.hasnans:
+        return 'TEXT'
+    if kind == 'b':
+        return 'BOOLEAN'
+    if kind in 'iu':
+        return 'BIGINT'
+    if kind == 'f':
+        return 'DOUBLE PRECISION'
+    if kind == 'M':
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+
+class TableLoader:
+    """Write one or more DataFrames (e.g. streamed chunks), then swap() them in as table_name.
+    Must be used on a connection inside a transaction (engine.begin())."""
+
+    def __init__(self, conn, table_name):
+        self.conn = conn
+        self.table_name = table_name
+        self.staging_name = f"_load_{table_name[:40]}_{uuid.uuid4().hex[:8]}"
+        self.is_postgres = conn.dialect.name == 'postgresql'
+        self.columns = None
+        self.types = None
+        self.rows = 0
+
+    def quote(self, name):
+        return self.conn.dialect.identifier_preparer.quote(name)
+
+    def _create_staging(self, df):
+        self.columns = [str(c) for c in df.columns]
+        self.types = {str(c): sql_type(df[c]) for c in df.columns}
+        cols = ', '.join(f"{self.quote(c)} {self.types[c]}" for c in self.columns)
+        self.conn.exec_driver_sql(f"CREATE TABLE {self.quote(self.staging_name)} ({cols})")
+
+    def _fill_blanks(self, batch):
+        """Missing values in TEXT columns as '' (what cleaned tables have always held); typed columns keep NULL"""
+        fill = {c: batch[c].astype(object).fillna('') for c in self.columns
+                if self.types[c] == 'TEXT' and batch[c].hasnans}
+        return batch.assign(**fill) if fill else batch
+
+    def _copy(self, df):
+        # \N marks NULL so that real empty strings stay '' instead of turning into NULL
+        text = df.to_csv(index=False, header=False, na_rep=NULL_MARKER)
+        # Bytes + ENCODING keep COPY independent of the connection's client_encoding
+        buffer = io.BytesIO(text.encode('utf-8'))
+        del text
+        cols = ', '.join(self.quote(c) for c in self.columns)
+        # TEXT columns never hold NULL (_fill_blanks) - there a literal \N is just text
+        text_cols = ', '.join(self.quote(c) for c in self.columns if self.types[c] == 'TEXT')
+        force = f", FORCE_NOT_NULL ({text_cols})" if text_cols else ""
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.quote(self.staging_name)} ({cols}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{NULL_MARKER}', ENCODING 'UTF8'{force})",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def write(self, df):
+        """Append a frame to the staging table (created from the first frame's dtypes)"""
+        if self.columns is None:
+            self._create_staging(df)
+        for start in range(0, len(df), COPY_BATCH_ROWS):
+            batch = self._fill_blanks(df.iloc[start:start + COPY_BATCH_ROWS])
+            if self.is_postgres:
+                self._copy(batch)
+            else:
+                batch.to_sql(self.staging_name, con=self.conn, if_exists='append', index=False)
+        self.rows += len(df)
+
+    def swap(self):
+        """Replace table_name with the staging table"""
+        if self.columns is None:
+            raise ValueError("Nothing was written to the staging table")
+        if self.is_postgres:
+            # Fresh planner stats - table previews read their row estimate from pg_class.reltuples
+            self.conn.exec_driver_sql(f"ANALYZE {self.quote(self.staging_name)}")
+        self.conn.exec_driver_sql(f"DROP TABLE IF EXISTS {self.quote(self.table_name)}")
+        self.conn.exec_driver_sql(
+            f"ALTER TABLE {self.quote(self.staging_name)} RENAME TO {self.quote(self.table_name)}"
+        )
+        return self.rows
+
+    def _column_types(self, name):
+        """{column: SQL type} of a Postgres table"""
+        rows = self.conn.exec_driver_sql("""
+            SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = CAST(%s AS regclass) AND attnum > 0 AND NOT attisdropped
+        """, (self.quote(name),)).fetchall()
+        return dict(rows)
+
+    def _cast(self, col, source_type, target_type):
+        """Staging column as the target column's type - '' in a text column counts as NULL for typed targets"""
+        ref = f"s.{self.quote(col)}"
+        if target_type.lower() == source_type.lower() or target_type == 'text':
+            return f"{ref}::{target_type}"
+        value = f"NULLIF(CAST({ref} AS TEXT), '')"
+        if target_type in INTEGER_TYPES:
+            # A chunk with blanks arrives as TEXT holding floats ('1.0') - bigint won't parse those
+            value = f"CAST({value} AS NUMERIC)"
+        return f"CAST({value} AS {target_type})"
+
+    def merge(self, key_columns, update=True):
+        """Merge the staging table into table_name instead of replacing it: rows with a new key
+        are inserted; with update=True existing rows are rewritten only when a value differs.
+        Rows with a NULL or blank key can never match (so would be re-inserted by every merge)
+        and are skipped. table_name is created if missing and gets a unique index on key_columns;
+        columns new to it are added. Postgres only.
+        Returns {"inserted", "updated", "unchanged", "skipped", "rows"}."""
+        if self.columns is None:
+            raise ValueError("Nothing was written to the staging table")
+        if not self.is_postgres:
+            raise ValueError("append/upsert imports need PostgreSQL")
+        missing = [c for c in key_columns if c not in self.columns]
+        if missing:
+            raise ValueError(f"Key column(s) not in the file: {', '.join(missing)}")
+
+        target, staging = self.quote(self.table_name), self.quote(self.staging_name)
+        self.conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {target} (LIKE {staging})")
+        target_types = self._column_types(self.table_name)
+        source_types = self._column_types(self.staging_name)
+        for col in self.columns:
+            if col not in target_types:
+                self.conn.exec_driver_sql(f"ALTER TABLE {target} ADD COLUMN {self.quote(col)} {source_types[col]}")
+                target_types[col] = source_types[col]
+
+        # ON CONFLICT needs a unique index on exactly the key columns
+        keys = ', '.join(self.quote(c) for c in key_columns)
+        digest = hashlib.md5(','.join(key_columns).encode('utf-8')).hexdigest()[:8]
+        index = self.quote(f"{self.table_name[:40]}_key_{digest}")
+        if self.conn.exec_driver_sql("SELECT to_regclass(%s) IS NULL", (index,)).scalar():
+            # A table loaded by replace can repeat a key - say so instead of failing on the index
+            not_null = ' AND '.join(f"{self.quote(c)} IS NOT NULL" for c in key_columns)
+            repeated = self.conn.exec_driver_sql(
+                f"SELECT {keys} FROM {target} WHERE {not_null} GROUP BY {keys} HAVING count(*) > 1 LIMIT 1"
+            ).first()
+            if repeated is not None:
+                shown = ', '.join(f"{c}={v!r}" for c, v in zip(key_columns, repeated))
+                raise ValueError(f"'{self.table_name}' already has more than one row with {shown} - "
+                                 f"pass key_columns that are unique in it")
+            self.conn.exec_driver_sql(f"CREATE UNIQUE INDEX {index} ON {target} ({keys})")
+
+        cols = ', '.join(self.quote(c) for c in self.columns)
+        values = ', '.join(self._cast(c, source_types[c], target_types[c]) for c in self.columns)
+        others = [self.quote(c) for c in self.columns if c not in key_columns]
+        if update and others:
+            on_conflict = f"""DO UPDATE SET {', '.join(f"{c} = EXCLUDED.{c}" for c in others)}
+                WHERE ({', '.join(f"{target}.{c}" for c in others)})
+                    IS DISTINCT FROM ({', '.join(f"EXCLUDED.{c}" for c in others)})"""
+        else:
+            on_conflict = "DO NOTHING"
+        has_key = ' AND '.join(f"NULLIF(CAST({self.quote(c)} AS TEXT), '') IS NOT NULL" for c in key_columns)
+        skipped = self.conn.exec_driver_sql(f"SELECT count(*) FROM {staging} WHERE NOT ({has_key})").scalar()
+        # Within the file the first row per key wins, like dedup's keep='first'
+        staged, inserted, updated = self.conn.exec_driver_sql(f"""
+            WITH src AS (
+                SELECT DISTINCT ON ({keys}) * FROM {staging} WHERE {has_key} ORDER BY {keys}, ctid
+            ), merged AS (
+                INSERT INTO {target} ({cols})
+                SELECT {values} FROM src s
+                ON CONFLICT ({keys}) {on_conflict}
+                RETURNING xmax = 0 AS inserted
+            )
+            SELECT (SELECT count(*) FROM src),
+                   count(*) FILTER (WHERE inserted),
+                   count(*) FILTER (WHERE NOT inserted)
+            FROM merged
+        """).fetchone()
+        self.conn.exec_driver_sql(f"DROP TABLE {staging}")
+        self.conn.exec_driver_sql(f"ANALYZE {target}")
+        rows = self.conn.exec_driver_sql(f"SELECT count(*) FROM {target}").scalar()
+        return {"inserted": inserted, "updated": updated, "unchanged": staged - inserted - updated,
+                "skipped": skipped, "rows": rows}
+
+def replace_table(conn, table_name, df):
+    """One-shot: load df and swap it in as table_name"""
+    loader = TableLoader(conn, table_name)
+    loader.write(df)
+    return loader.swap()
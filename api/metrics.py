@@ -0,0 +1,192 @@
+"""
+⏱️ PIPELINE TIMINGS + METRICS
+Timings records wall time, rows/sec and memory for each pipeline stage and each column
+cleaner of one run - returned as "timings" in the API response. Every finished run is also
+added to a process-wide registry that /api/python/metrics renders in Prometheus text format.
+Memory is the growth of the process's peak RSS during a stage (process-wide, so concurrent
+thread-mode runs share it); PIPELINE_TRACEMALLOC=1 adds the tracemalloc peak of each stage,
+at a real cost in speed - meant for profiling, not production.
+
+Stages (STAGES), in pipeline order: read (parsing, per chunk) or cache_read (replaying a cached
+result), schema, drop_empty, dedup, plan, clean (one record per column, labelled with its cleaner
+kind), clean_parallel (wall time of column-parallel cleaning), near_dedup, compact, then write
+(staging + COPY, blanks filled on the way) or csv (download encoding), commit, and total.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows - no getrusage
+    resource = None
+
+TRACEMALLOC = os.environ.get("PIPELINE_TRACEMALLOC", "") == "1"
+STAGES = ("read", "cache_read", "schema", "drop_empty", "dedup", "plan", "clean", "clean_parallel",
+          "near_dedup", "compact", "write", "csv", "commit", "total")
+MB = 1024 * 1024
+
+_lock = threading.Lock()
+_runs = {}
+_stages = {}
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+class Timings:
+    """Per-stage wall time / rows / memory for one pipeline run. Stages with the same name
+    (and column) add up - e.g. 'read' over every chunk of a streamed file."""
+
+    def __init__(self):
+        self._records = {}
+        self._stack = []
+        if TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _record(self, name, column, kind):
+        key = (name, column)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = {
+                "stage": name, "column": column, "kind": kind,
+                "calls": 0, "seconds": 0.0, "rows": 0, "rss_growth_mb": 0.0, "alloc_peak_mb": 0.0,
+            }
+        return record
+
+    def add(self, name, seconds, column=None, kind=None, rows=None):
+        """Record time measured elsewhere (e.g. in a worker process) - no memory figures"""
+        record = self._record(name, column, kind)
+        record["seconds"] += seconds
+        record["calls"] += 1
+        record["rows"] += rows or 0
+
+    @contextmanager
+    def stage(self, name, column=None, kind=None, rows=None):
+        """Time the block; set info["rows"] inside it when the row count is only known at the end"""
+        record = self._record(name, column, kind)
+        info = {"rows": rows}
+        tracing = tracemalloc.is_tracing()
+        frame = None
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Resetting the peak below would hide what the enclosing stage reached so far
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame = {"start": current, "peak": current}
+            self._stack.append(frame)
+        rss = peak_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            record["seconds"] += time.perf_counter() - start
+            record["calls"] += 1
+            record["rows"] += info["rows"] or 0
+            record["rss_growth_mb"] += (peak_rss_bytes() - rss) / MB
+            if frame is not None:
+                self._stack.pop()
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                record["alloc_peak_mb"] = max(record["alloc_peak_mb"], (peak - frame["start"]) / MB)
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+    def report(self):
+        """JSON-ready list of stage records, in the order stages first ran"""
+        out = []
+        for record in self._records.values():
+            item = dict(record)
+            item["seconds"] = round(item["seconds"], 4)
+            item["rows_per_sec"] = round(item["rows"] / item["seconds"]) if item["rows"] and item["seconds"] else None
+            item["rss_growth_mb"] = round(item["rss_growth_mb"], 1)
+            item["alloc_peak_mb"] = round(item["alloc_peak_mb"], 1) if TRACEMALLOC else None
+            if item["column"] is None:
+                del item["column"], item["kind"]
+            out.append(item)
+        return out
+
+
+def timed(frames, timings, stage):
+    """Pass frames through, timing each next() as stage (e.g. parsing the next chunk)"""
+    frames = iter(frames)
+    while True:
+        with timings.stage(stage) as info:
+            try:
+                df = next(frames)
+            except StopIteration:
+                return
+            info["rows"] = len(df)
+        yield df
+
+
+def record_run(report, status):
+    """Add one run's timings report (may come back from a worker process) to the registry"""
+    with _lock:
+        _runs[status] = _runs.get(status, 0) + 1
+        for item in report or []:
+            # Per-column records roll up by cleaner kind - column names would explode the label set
+            key = (item["stage"], item.get("kind") or "")
+            totals = _stages.setdefault(key, {"seconds": 0.0, "rows": 0, "calls": 0})
+            totals["seconds"] += item["seconds"]
+            totals["rows"] += item["rows"]
+            totals["calls"] += item["calls"]
+
+
+def _labels(**labels):
+    inner = ','.join(f'{k}="{v}"' for k, v in labels.items() if v != "")
+    return "{" + inner + "}" if inner else ""
+
+
+def prometheus_text(workers=None, pool=None):
+    """Registry (plus worker-pool and DB-pool stats) in Prometheus exposition format"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if isinstance(value, float):
+                value = round(value, 6)
+            lines.append(f"{name}{labels} {value}")
+
+    with _lock:
+        runs = dict(_runs)
+        stages = {k: dict(v) for k, v in _stages.items()}
+    # status: success, failed, error (the worker raised) or cancelled
+    metric("pipeline_runs_total", "counter", "Pipeline runs by outcome",
+           [(_labels(status=s), n) for s, n in sorted(runs.items())])
+    for field, help_text in (("seconds", "Wall time spent in each pipeline stage"),
+                             ("rows", "Rows handled by each pipeline stage"),
+                             ("calls", "Times each pipeline stage ran")):
+        metric(f"pipeline_stage_{field}_total", "counter", help_text,
+               [(_labels(stage=stage, kind=kind), totals[field]) for (stage, kind), totals in sorted(stages.items())])
+
+    metric("process_resident_memory_bytes", "gauge", "Resident set size", [("", rss_bytes())])
+    metric("process_peak_resident_memory_bytes", "gauge", "Peak resident set size", [("", peak_rss_bytes())])
+    if workers:
+        metric("pipeline_workers_running", "gauge", "Pipelines running now", [("", workers["running"])])
+        metric("pipeline_workers_queued", "gauge", "Pipelines waiting for a worker", [("", workers["queued"])])
+        metric("pipeline_rejected_total", "counter", "Uploads turned away with 429", [("", workers["rejected"])])
+    if pool:
+        metric("db_pool_checkouts_total", "counter", "Connection checkouts", [("", pool["checkouts"])])
+        metric("db_pool_timeouts_total", "counter", "Checkouts that timed out", [("", pool["timeouts"])])
+        metric("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection",
+               [("", pool["wait_seconds_total"])])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,18 @@
+"""
+🏷️ NAMING
+snake_case names for columns and tables - kept free of pandas so the table endpoints can use
+it without loading the cleaning pipeline.
+"""
+
+import re
+
+
+def sanitize_column_name(col):
+    """snake_case column names"""
+    # col != col: NaN / NaT headers
+    if not col or col != col:
+        return "column"
+    clean = str(col).strip().lower()
+    clean = re.sub(r'[^a-z0-9]+', '_', clean)
+    clean = re.sub(r'_+', '_', clean).strip('_')
+    return clean or "column"
@@ -0,0 +1,216 @@
+"""
+🧵 PARALLEL COLUMN CLEANING
+Fans magic_transform's per-column cleaners out over a process pool for wide frames. Each text
+column travels to its worker as an Arrow IPC stream in a shared-memory block - no pickling of
+millions of Python strings - and the cleaned column comes back as Arrow IPC bytes. The caller
+applies results in plan order, so output, counters and logs are identical to sequential cleaning.
+Off by default (PIPELINE_CLEAN_WORKERS=1). Needs pyarrow; frames under PIPELINE_PARALLEL_MIN_CELLS
+text cells, columns that aren't plain strings (or mix None and NaN), and any pool failure fall back
+to in-process cleaning.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+import numpy as np
+import pandas as pd
+
+# 1 = sequential, 0 = one worker per CPU
+CLEAN_WORKERS = int(os.environ.get("PIPELINE_CLEAN_WORKERS", "1"))
+# Below this many text cells the pool round trip costs more than it saves
+MIN_CELLS = int(os.environ.get("PIPELINE_PARALLEL_MIN_CELLS", "500000"))
+
+_pool = None
+_disabled = False
+# A column whose missing cells aren't all None or all NaN - Arrow would fold them into one
+_MIXED = object()
+
+
+def worker_count():
+    return CLEAN_WORKERS if CLEAN_WORKERS > 0 else (os.cpu_count() or 1)
+
+
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _get_pool():
+    global _pool, _disabled
+    if _pool is None and not _disabled:
+        try:
+            # spawn: forking a process that runs pipeline threads (and Arrow's) isn't safe
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=get_context("spawn"))
+        except (OSError, NotImplementedError, ImportError):
+            # No working semaphores (e.g. AWS Lambda) - clean in-process
+            _disabled = True
+    return _pool
+
+
+def _string_batch(values):
+    """One-column Arrow record batch of plain strings (nulls allowed), or None"""
+    import pyarrow as pa
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if not pa.types.is_string(array.type):
+        return None
+    return pa.record_batch([array], names=["v"])
+
+
+def _missing_value(values):
+    """The marker an object array uses for missing cells - None, NaN, or _MIXED (also pd.NA/NaT).
+    Arrow keeps only "null", and cleaners tell None from NaN (str(None) != str(nan))."""
+    missing = values[pd.isna(values)]
+    if all(value is None for value in missing):
+        return None
+    if all(isinstance(value, float) for value in missing):
+        return np.nan
+    return _MIXED
+
+
+def _write_stream(batch, sink):
+    import pyarrow as pa
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+
+def _share(batch):
+    """Copy a record batch into a new shared-memory block -> (block, stream size)"""
+    import pyarrow as pa
+    sizer = pa.MockOutputStream()
+    _write_stream(batch, sizer)
+    size = sizer.size()
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        buffer = pa.py_buffer(block.buf)
+        _write_stream(batch, pa.FixedSizeBufferWriter(buffer))
+        del buffer
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block, size
+
+
+def _read_stream(source, missing=np.nan):
+    """Values of a one-column Arrow IPC stream as a NumPy array - null strings come back as missing"""
+    import pyarrow as pa
+    column = pa.ipc.open_stream(source).read_all().column(0)
+    values = column.to_numpy(zero_copy_only=False)
+    if values.dtype == object:
+        values[pd.isna(values)] = missing
+    elif not values.flags.writeable:
+        values = values.copy()
+    return values
+
+
+def _encode(values):
+    """Cleaned column for the trip back -> (Arrow IPC bytes, missing marker) for strings/float64,
+    else (the array itself, None)"""
+    import pyarrow as pa
+    missing = np.nan
+    batch = None
+    if values.dtype == object:
+        missing = _missing_value(values)
+        if missing is not _MIXED:
+            batch = _string_batch(values)
+    elif values.dtype == np.float64:
+        batch = pa.record_batch([pa.array(values)], names=["v"])
+    if batch is None:
+        return values, None
+    sink = pa.BufferOutputStream()
+    _write_stream(batch, sink)
+    return sink.getvalue().to_pybytes(), missing
+
+
+def _clean_shared(clean, block_name, size, col, kind, missing):
+    """Pool task: clean(frame, col, kind, changes, logs) on a column read from shared memory"""
+    start = time.perf_counter()
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        values = _read_stream(block.buf[:size], missing)
+    finally:
+        block.close()
+    frame = pd.DataFrame({col: values})
+    changes, logs = Counter(), []
+    changes["date_formats"] = {}
+    clean(frame, col, kind, changes, logs)
+    out = frame[col].to_numpy()
+    payload, out_missing = _encode(out)
+    return payload, out_missing, out.dtype, dict(changes), logs, time.perf_counter() - start
+
+
+class _Task:
+    def __init__(self, future, block):
+        self.future = future
+        self.block = block
+
+    def result(self):
+        """(values, changes, logs, seconds), or None when the pool failed - clean it in-process then"""
+        global _pool
+        try:
+            payload, missing, dtype, changes, logs, seconds = self.future.result()
+        except BrokenProcessPool:
+            _pool = None
+            return None
+        except Exception:
+            return None
+        finally:
+            self.release()
+        values = _read_stream(payload, missing) if isinstance(payload, bytes) else payload
+        if values.dtype != dtype:
+            values = values.astype(dtype)
+        return values, changes, logs, seconds
+
+    def release(self):
+        if self.block is not None:
+            self.future.cancel()
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+def submit(df, steps, clean):
+    """Start clean() for the plain-text columns of steps [(col, kind)] in the pool -> {col: task}.
+    Returns {} when the frame is too small, pyarrow is missing or the pool can't start; columns
+    without a task are the caller's to clean. release() the tasks when done."""
+    columns = [(col, kind) for col, kind in steps if df[col].dtype == object]
+    if worker_count() < 2 or len(columns) < 2 or len(df) * len(columns) < MIN_CELLS or not arrow_available():
+        return {}
+    pool = _get_pool()
+    if pool is None:
+        return {}
+    tasks = {}
+    try:
+        for col, kind in columns:
+            values = df[col].to_numpy()
+            missing = _missing_value(values)
+            batch = _string_batch(values) if missing is not _MIXED else None
+            if batch is None:
+                continue
+            block, size = _share(batch)
+            try:
+                future = pool.submit(_clean_shared, clean, block.name, size, col, kind, missing)
+            except BaseException:
+                block.close()
+                block.unlink()
+                raise
+            tasks[col] = _Task(future, block)
+    except (OSError, RuntimeError, BrokenProcessPool):
+        # No /dev/shm or a dead pool - whatever was submitted still runs, the rest is cleaned in-process
+        pass
+    return tasks
+
+
+def release(tasks):
+    """Free the shared memory of tasks whose result was never collected"""
+    for task in tasks.values():
+        task.release()
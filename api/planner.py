@@ -0,0 +1,185 @@
+"""
+🧭 COLUMN PLANNER
+Decides once per file what magic_transform does to each column. Header words vote for a
+kind (the last word counts most - `student_id` is an id, `contact_email` an email), then a
+sample of the values is checked against each kind's pattern: a kind whose pattern the content
+clearly doesn't fit is vetoed, and strong content can outvote a misleading header.
+The plan is a plain list of dicts (returned in stats["plan"]); later chunks of a file reuse the
+first chunk's plan. Only header votes are cached - content is sniffed again for every file, since
+two files with the same headers can hold different things.
+"""
+
+import re
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+
+try:
+    from .cleaners import CURRENCY_RE, GENDER_MAP, NON_DIGIT_RE, PLAIN_NUMBER_RE, as_text
+    from .dates import detect_formats
+except ImportError:
+    from cleaners import CURRENCY_RE, GENDER_MAP, NON_DIGIT_RE, PLAIN_NUMBER_RE, as_text
+    from dates import detect_formats
+
+# Order breaks score ties - same precedence the old if/elif chain had
+HEADER_KEYWORDS = OrderedDict([
+    ("name", ['name', 'first', 'last', 'student', 'teacher', 'employee']),
+    ("email", ['email', 'mail']),
+    ("phone", ['phone', 'mobile', 'cell', 'contact', 'tel']),
+    ("date", ['date', 'dob', 'birth', 'created', 'joined', 'updated']),
+    ("gender", ['gender', 'sex']),
+    ("amount", ['amount', 'price', 'fee', 'salary', 'cost', 'total', 'balance', 'payment', 'paid']),
+    ("id", ['id', 'roll', 'enrollment', 'enrolment', 'uid', 'code']),
+])
+# Words that may sit next to a keyword in a run-together header ('dateofbirth', 'mobileno', 'fathername')
+COMPOUND_WORDS = {
+    'no', 'num', 'number', 'nr', 'of', 'at', 'on', 'id', 'address', 'addr', 'full', 'middle', 'given',
+    'family', 'sur', 'father', 'mother', 'guardian', 'parent', 'alt', 'alternate', 'primary', 'home',
+    'work', 'office', 'admission', 'joining', 'registration', 'due',
+}
+# Kinds content alone can assign, without a header word - their patterns are unambiguous
+CONTENT_ONLY_KINDS = ("email", "date")
+
+SAMPLE_SIZE = 300
+MIN_SAMPLE = 5
+MIN_HIT_RATE = 0.3
+CONTENT_ONLY_RATE = 0.9
+CONTENT_WEIGHT = 3
+HEADER_CACHE_SIZE = 4096
+
+EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+PHONE_RE = re.compile(r'\+?[\d\s().-]+')
+NAME_RE = re.compile(r"[^\W\d_]+(?:[\s.'-]+[^\W\d_]+)*\.?")
+
+def _is_email(v):
+    return EMAIL_RE.fullmatch(v) is not None
+
+
+def _is_phone(v):
+    return PHONE_RE.fullmatch(v) is not None and 10 <= len(NON_DIGIT_RE.sub('', v)) <= 13
+
+
+def _is_date(v):
+    return bool(detect_formats([v]))
+
+
+def _is_gender(v):
+    return v.lower() in GENDER_MAP
+
+
+def _is_amount(v):
+    v = CURRENCY_RE.sub('', v)
+    if v.startswith('(') and v.endswith(')'):
+        v = v[1:-1]
+    return PLAIN_NUMBER_RE.fullmatch(v) is not None
+
+
+def _is_name(v):
+    return NAME_RE.fullmatch(v) is not None
+
+
+DETECTORS = {
+    "name": _is_name,
+    "email": _is_email,
+    "phone": _is_phone,
+    "date": _is_date,
+    "gender": _is_gender,
+    "amount": _is_amount,
+}
+
+
+def sample_values(s, size=SAMPLE_SIZE):
+    """Up to size non-blank values spread over the column, as stripped text"""
+    s = s.dropna()
+    if s.dtype.kind in 'biuf' and len(s) > size:
+        # Numbers never print blank - pick the sample first so only size values become text
+        s = s.iloc[np.linspace(0, len(s) - 1, size).astype(int)]
+    if s.dtype.kind == 'f':
+        # 9876543210.0 is a phone number read as float - compare it as 9876543210
+        whole = (s % 1 == 0) & (s.abs() < 2 ** 63)
+        s = s.astype(object)
+        s[whole] = s[whole].astype('int64')
+    text = as_text(s).str.strip()
+    text = text[text != '']
+    if len(text) > size:
+        text = text.iloc[np.linspace(0, len(text) - 1, size).astype(int)]
+    return text.tolist()
+
+
+_VOCABULARY = COMPOUND_WORDS.union(*HEADER_KEYWORDS.values())
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def split_compound(word):
+    """Known words that spell word exactly ('dateofbirth' -> date, of, birth), or None -
+    so keywords only count whole: 'hotel' has no 'tel' and 'candidate' no 'date'"""
+    if not word:
+        return ()
+    for end in range(len(word), 0, -1):
+        if word[:end] in _VOCABULARY:
+            rest = split_compound(word[end:])
+            if rest is not None:
+                return (word[:end],) + rest
+    return None
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def header_votes(col):
+    """{kind: weight} from the words of a snake_case column name"""
+    words = col.lower().split('_')
+    votes = {}
+    for i, word in enumerate(words):
+        weight = 2 if i == len(words) - 1 else 1
+        parts = split_compound(word) or ()
+        for kind, keywords in HEADER_KEYWORDS.items():
+            if word in keywords:
+                votes[kind] = votes.get(kind, 0) + weight
+            elif any(k in parts for k in keywords if len(k) > 2):
+                # 'dateofbirth', 'mobileno' - weaker than a whole word
+                votes[kind] = votes.get(kind, 0) + 0.5
+    return votes
+
+
+def hit_rate(s, kind, values):
+    """Share of sampled values that look like kind (None = no pattern, or too few values)"""
+    if kind == "date" and s.dtype.kind == 'M':
+        return 1.0
+    if kind == "amount" and s.dtype.kind in 'iuf':
+        return 1.0
+    if kind not in DETECTORS or len(values) < MIN_SAMPLE:
+        return None
+    detect = DETECTORS[kind]
+    return sum(1 for v in values if detect(v)) / len(values)
+
+
+def classify(s, col):
+    """Plan step for one column: {"column", "kind", "header", "hit_rate"}"""
+    votes = header_votes(col)
+    values = sample_values(s)
+    rates = {kind: hit_rate(s, kind, values) for kind in set(votes) | set(CONTENT_ONLY_KINDS)}
+    order = list(HEADER_KEYWORDS)
+    scored = sorted(
+        votes,
+        key=lambda k: (-(votes[k] + CONTENT_WEIGHT * (rates[k] or 0)), order.index(k))
+    )
+    for kind in scored:
+        rate = rates[kind]
+        if rate is not None and rate < MIN_HIT_RATE:
+            continue
+        return {"column": col, "kind": kind, "header": True, "hit_rate": rate}
+    for kind in CONTENT_ONLY_KINDS:
+        rate = rates[kind]
+        if rate is not None and rate >= CONTENT_ONLY_RATE:
+            return {"column": col, "kind": kind, "header": False, "hit_rate": rate}
+    kind = "text" if s.dtype == 'object' else "keep"
+    return {"column": col, "kind": kind, "header": False, "hit_rate": None}
+
+
+def plan_columns(df):
+    """Transform plan for df's columns"""
+    return [classify(df[col], col) for col in df.columns]
+
+
+def describe(plan):
+    """One-line summary for the logs"""
+    return ', '.join(f"{step['column']}→{step['kind']}" for step in plan)
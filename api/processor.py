@@ -4,34 +4,191 @@ Makes messy data beautiful - visible, dramatic changes guaranteed!
 """
 
 import pandas as pd
-import re
+import io
 import numpy as np
-from datetime import datetime
-from sqlalchemy import create_engine
+from contextlib import nullcontext
+from functools import lru_cache
 
-def sanitize_column_name(col):
-    """snake_case column names"""
-    if not col or pd.isna(col):
-        return "column"
-    clean = str(col).strip().lower()
-    clean = re.sub(r'[^a-z0-9]+', '_', clean)
-    clean = re.sub(r'_+', '_', clean).strip('_')
-    return clean or "column"
+try:
+    from .cleaners import clean_names, clean_emails, clean_phones, clean_genders, clean_amounts, clean_text
+    from .dates import clean_dates
+    from .dedup import CLUSTER_REPORT_LIMIT, FUZZY_DEDUP, FUZZY_NAME_THRESHOLD, KeyDigestSet, NearDuplicateFinder, key_digests
+    from .loader import TableLoader
+    from .db import get_engine
+    from .excel import iter_excel
+    from .cache import content_key, result_cache
+    from .planner import describe, plan_columns
+    from .schema import CompiledSchema
+    from .metrics import Timings, timed
+    from .naming import sanitize_column_name
+    from . import parallel
+except ImportError:
+    from cleaners import clean_names, clean_emails, clean_phones, clean_genders, clean_amounts, clean_text
+    from dates import clean_dates
+    from dedup import CLUSTER_REPORT_LIMIT, FUZZY_DEDUP, FUZZY_NAME_THRESHOLD, KeyDigestSet, NearDuplicateFinder, key_digests
+    from loader import TableLoader
+    from db import get_engine
+    from excel import iter_excel
+    from cache import content_key, result_cache
+    from planner import describe, plan_columns
+    from schema import CompiledSchema
+    from metrics import Timings, timed
+    from naming import sanitize_column_name
+    import parallel
 
-def magic_transform(df, logs):
-    """Apply dramatic, visible transformations"""
+IDENTIFIER_KEYWORDS = ['name', 'phone', 'mobile', 'email', 'id', 'roll', 'enrollment']
+
+def identifier_columns(columns):
+    """Columns that identify a record - dedup matches rows on these"""
+    return [col for col in columns if any(x in col.lower() for x in IDENTIFIER_KEYWORDS)]
+
+def merge_key_columns(plan):
+    """Default append/upsert keys: the columns planned as ids (roll_no, student_id, enrollment, ...).
+    Not identifier_columns() - a corrected name, email or amount must update the row, not add one."""
+    return [step["column"] for step in plan if step["kind"] == "id"]
+
+def drop_duplicate_rows(df, changes, logs, seen_keys=None):
+    """Dedup on the identifier columns (all columns when there are none); counts into changes"""
+    dedup_cols = identifier_columns(df.columns)
+    
+    before = len(df)
+    if seen_keys is not None:
+        # Streaming: compare key digests against every earlier chunk too
+        df = df[~seen_keys.seen_before(key_digests(df, dedup_cols or df.columns.tolist()))]
+        changes["duplicates"] = before - len(df)
+        if changes["duplicates"] > 0:
+            matched = ', '.join(dedup_cols) if dedup_cols else 'all columns'
+            logs.append(f"♻️ Removed {changes['duplicates']} duplicates (matched on: {matched})")
+    elif dedup_cols:
+        # Remove duplicates based on key columns (keeps first occurrence)
+        df = df.drop_duplicates(subset=dedup_cols, keep='first')
+        changes["duplicates"] = before - len(df)
+        if changes["duplicates"] > 0:
+            logs.append(f"♻️ Removed {changes['duplicates']} duplicates (matched on: {', '.join(dedup_cols)})")
+    else:
+        # Fallback to exact row duplicates
+        df = df.drop_duplicates()
+        changes["duplicates"] = before - len(df)
+        if changes["duplicates"] > 0:
+            logs.append(f"♻️ Removed {changes['duplicates']} exact duplicate rows")
+    return df
+
+def drop_near_duplicates(df, plan, changes, logs, finder):
+    """Second dedup pass on the cleaned values - catches records that only differed in case, spacing
+    or phone formatting (and similar names, in fuzzy mode); counts and clusters go into changes"""
+    dedup_cols = identifier_columns(df.columns) or df.columns.tolist()
+    kinds = {step["column"]: step["kind"] for step in plan}
+    drop, clusters, fuzzy = finder.find(df, dedup_cols, kinds)
+    changes["near_duplicates"] = int(drop.sum())
+    changes["duplicate_clusters"] = clusters
+    if changes["near_duplicates"] > 0:
+        logs.append(f"♻️ Removed {changes['near_duplicates']} more duplicates once values were normalized"
+                    + (f" ({fuzzy} by similar names)" if fuzzy else ""))
+        return df[~drop]
+    return df
+
+def clean_column(df, col, kind, changes, logs):
+    """Run the cleaner for one planned column in place; counts into changes"""
+    # --- NAMES (Title Case) ---
+    if kind == "name":
+        df[col], changed = clean_names(df[col])
+        if changed > 0:
+            changes["names_fixed"] += changed
+            logs.append(f"👤 Fixed {changed} names in '{col}' → Title Case")
+    
+    # --- EMAILS (lowercase, validate) ---
+    elif kind == "email":
+        df[col], changed = clean_emails(df[col])
+        if changed > 0:
+            changes["emails_fixed"] += changed
+            logs.append(f"📧 Normalized {changed} emails in '{col}'")
+    
+    # --- PHONE NUMBERS ---
+    elif kind == "phone":
+        df[col], changed = clean_phones(df[col])
+        if changed > 0:
+            changes["phones_fixed"] += changed
+            logs.append(f"📱 Formatted {changed} phone numbers in '{col}'")
+    
+    # --- DATES ---
+    elif kind == "date":
+        df[col], changed, report = clean_dates(df[col])
+        changes["date_formats"][col] = report
+        if changed > 0:
+            changes["dates_fixed"] += changed
+            logs.append(f"📅 Standardized {changed} dates in '{col}' → YYYY-MM-DD")
+        if report.get("formats"):
+            found = ', '.join(f"{fmt} ×{n}" for fmt, n in report["formats"].items())
+            logs.append(f"  🧭 Formats in '{col}': {found}")
+    
+    # --- GENDER ---
+    elif kind == "gender":
+        df[col], changed = clean_genders(df[col])
+        if changed > 0:
+            logs.append(f"⚧️ Standardized {changed} gender values in '{col}'")
+    
+    # --- AMOUNTS/CURRENCY ---
+    elif kind == "amount":
+        df[col], _ = clean_amounts(df[col])
+        changes["numbers_fixed"] += 1
+        logs.append(f"💰 Cleaned currency values in '{col}'")
+    
+    # --- GENERAL TEXT CLEANUP (ids included - never title-cased) ---
+    elif df[col].dtype == 'object':
+        df[col], changed = clean_text(df[col])
+        if changed > 0:
+            changes["text_cleaned"] += changed
+
+# Text columns with at most this share of distinct values become categorical
+CATEGORY_MAX_RATIO = 0.5
+
+@lru_cache(maxsize=None)
+def string_dtype():
+    """pyarrow-backed strings when pyarrow is installed (None -> text stays object)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return pd.StringDtype("pyarrow")
+
+def compact_dtypes(df):
+    """Cleaned text columns in compact dtypes - categorical when values repeat (gender, class,
+    dates), pyarrow strings otherwise. Missing values stay NaN: the '' fill happens on the way out
+    (TableLoader; to_csv writes NaN as '' anyway). Columns that aren't all text are left alone."""
+    for i in np.flatnonzero((df.dtypes == object).to_numpy()):
+        s = df.iloc[:, i]
+        codes, uniques = pd.factorize(s)
+        if pd.api.types.infer_dtype(uniques, skipna=True) != 'string':
+            continue
+        if len(uniques) <= len(s) * CATEGORY_MAX_RATIO:
+            df.isetitem(i, pd.Categorical.from_codes(codes, categories=uniques))
+        elif string_dtype() is not None:
+            df.isetitem(i, s.astype(string_dtype()))
+    return df
+
+def magic_transform(df, logs, seen_keys=None, plan=None, timings=None, near_dups=None):
+    """Apply dramatic, visible transformations.
+    seen_keys (KeyDigestSet) and near_dups (NearDuplicateFinder) make dedup global across chunks
+    of one streamed file.
+    plan (planner.plan_columns) says what to do with each column - planned here when not given.
+    timings (metrics.Timings) gets a record per step and per column cleaner.
+    Wide frames are cleaned column-parallel when PIPELINE_CLEAN_WORKERS > 1 (see parallel.py)."""
+    timings = timings or Timings()
     
     # Track changes
     changes = {
         "rows_before": len(df),
         "duplicates": 0,
+        "near_duplicates": 0,
         "empty_removed": 0,
         "dates_fixed": 0,
         "emails_fixed": 0,
         "phones_fixed": 0,
         "names_fixed": 0,
         "numbers_fixed": 0,
-        "text_cleaned": 0
+        "text_cleaned": 0,
+        "date_formats": {},
+        "duplicate_clusters": []
     }
     
     # === 1. COLUMN HEADERS TO SNAKE_CASE ===
@@ -41,279 +198,229 @@ def magic_transform(df, logs):
     
     # === 2. REMOVE EMPTY ROWS ===
     before = len(df)
-    df = df.dropna(how='all')
+    with timings.stage("drop_empty", rows=before):
+        df = df.dropna(how='all')
     changes["empty_removed"] = before - len(df)
     if changes["empty_removed"] > 0:
         logs.append(f"🗑️ Removed {changes['empty_removed']} completely empty rows")
     
     # === 3. SMART DEDUPLICATION (based on name, phone, email, id) ===
-    dedup_cols = []
-    for col in df.columns:
-        col_lower = col.lower()
-        if any(x in col_lower for x in ['name', 'phone', 'mobile', 'email', 'id', 'roll', 'enrollment']):
-            dedup_cols.append(col)
+    with timings.stage("dedup", rows=len(df)):
+        df = drop_duplicate_rows(df, changes, logs, seen_keys)
     
-    before = len(df)
-    if dedup_cols:
-        # Remove duplicates based on key columns (keeps first occurrence)
-        df = df.drop_duplicates(subset=dedup_cols, keep='first')
-        changes["duplicates"] = before - len(df)
-        if changes["duplicates"] > 0:
-            logs.append(f"♻️ Removed {changes['duplicates']} duplicates (matched on: {', '.join(dedup_cols)})")
-    else:
-        # Fallback to exact row duplicates
-        df = df.drop_duplicates()
-        changes["duplicates"] = before - len(df)
-        if changes["duplicates"] > 0:
-            logs.append(f"♻️ Removed {changes['duplicates']} exact duplicate rows")
-    
-    # === 4. PROCESS EACH COLUMN BASED ON NAME/CONTENT ===
-    for col in df.columns:
-        col_lower = col.lower()
-        
-        # --- NAMES (Title Case) ---
-        if any(x in col_lower for x in ['name', 'first', 'last', 'student', 'teacher', 'employee']):
-            def fix_name(val):
-                if pd.isna(val) or str(val).strip() == '':
-                    return ''
-                # Remove extra spaces, title case
-                name = ' '.join(str(val).strip().split())
-                return name.title()
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(fix_name)
-            changed = (original != df[col]).sum()
-            if changed > 0:
-                changes["names_fixed"] += int(changed)
-                logs.append(f"👤 Fixed {changed} names in '{col}' → Title Case")
-        
-        # --- EMAILS (lowercase, validate) ---
-        elif any(x in col_lower for x in ['email', 'mail']):
-            def fix_email(val):
-                if pd.isna(val) or str(val).strip() == '':
-                    return ''
-                email = str(val).strip().lower()
-                # Basic validation
-                if '@' in email and '.' in email:
-                    return email
-                return f"[INVALID] {email}"
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(fix_email)
-            changed = (original.astype(str).str.lower().str.strip() != df[col]).sum()
-            if changed > 0:
-                changes["emails_fixed"] += int(changed)
-                logs.append(f"📧 Normalized {changed} emails in '{col}'")
-        
-        # --- PHONE NUMBERS ---
-        elif any(x in col_lower for x in ['phone', 'mobile', 'cell', 'contact', 'tel']):
-            def fix_phone(val):
-                if pd.isna(val) or str(val).strip() == '':
-                    return ''
-                # Extract only digits
-                digits = re.sub(r'\D', '', str(val))
-                if len(digits) == 10:
-                    return f"+91-{digits[:5]}-{digits[5:]}"
-                elif len(digits) == 12 and digits.startswith('91'):
-                    return f"+{digits[:2]}-{digits[2:7]}-{digits[7:]}"
-                elif len(digits) > 0:
-                    return digits
-                return str(val)
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(fix_phone)
-            changed = (original.astype(str) != df[col].astype(str)).sum()
-            if changed > 0:
-                changes["phones_fixed"] += int(changed)
-                logs.append(f"📱 Formatted {changed} phone numbers in '{col}'")
-        
-        # --- DATES ---
-        elif any(x in col_lower for x in ['date', 'dob', 'birth', 'created', 'joined', 'updated']):
-            def fix_date(val):
-                if pd.isna(val) or str(val).strip() == '':
-                    return ''
-                val_str = str(val).strip()
-                
-                # Try multiple date formats
-                formats = [
-                    '%Y-%m-%d', '%d-%m-%Y', '%m-%d-%Y', '%d/%m/%Y', '%m/%d/%Y',
-                    '%Y/%m/%d', '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y',
-                    '%d.%m.%Y', '%Y.%m.%d'
-                ]
-                for fmt in formats:
-                    try:
-                        dt = datetime.strptime(val_str, fmt)
-                        return dt.strftime('%Y-%m-%d')  # ISO format
-                    except:
-                        continue
-                
-                # Try pandas parsing
-                try:
-                    dt = pd.to_datetime(val_str, dayfirst=True)
-                    return dt.strftime('%Y-%m-%d')
-                except:
-                    return val_str
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(fix_date)
-            changed = (original.astype(str) != df[col].astype(str)).sum()
-            if changed > 0:
-                changes["dates_fixed"] += int(changed)
-                logs.append(f"📅 Standardized {changed} dates in '{col}' → YYYY-MM-DD")
-        
-        # --- GENDER ---
-        elif any(x in col_lower for x in ['gender', 'sex']):
-            gender_map = {
-                'm': 'Male', 'male': 'Male', 'man': 'Male', 'boy': 'Male', 'M': 'Male',
-                'f': 'Female', 'female': 'Female', 'woman': 'Female', 'girl': 'Female', 'F': 'Female',
-                'o': 'Other', 'other': 'Other', 'O': 'Other'
-            }
-            original = df[col].copy()
-            df[col] = df[col].astype(str).str.strip().map(lambda x: gender_map.get(x.lower(), x) if pd.notna(x) else x)
-            changed = (original.astype(str) != df[col].astype(str)).sum()
-            if changed > 0:
-                logs.append(f"⚧️ Standardized {changed} gender values in '{col}'")
-        
-        # --- AMOUNTS/CURRENCY ---
-        elif any(x in col_lower for x in ['amount', 'price', 'fee', 'salary', 'cost', 'total', 'balance', 'payment']):
-            def fix_amount(val):
-                if pd.isna(val) or str(val).strip() == '':
-                    return 0.0
-                val_str = str(val)
-                # Remove currency symbols and commas
-                val_str = re.sub(r'[₹$€£¥,\s]', '', val_str)
-                # Handle negative in parentheses
-                if val_str.startswith('(') and val_str.endswith(')'):
-                    val_str = '-' + val_str[1:-1]
-                try:
-                    return float(val_str)
-                except:
-                    return 0.0
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(fix_amount)
-            changes["numbers_fixed"] += 1
-            logs.append(f"💰 Cleaned currency values in '{col}'")
-        
-        # --- GENERAL TEXT CLEANUP ---
-        elif df[col].dtype == 'object':
-            def clean_text(val):
-                if pd.isna(val):
-                    return ''
-                text = str(val).strip()
-                # Remove multiple spaces
-                text = re.sub(r'\s+', ' ', text)
-                # Remove leading/trailing special chars
-                text = text.strip('.,;:!?')
-                return text
-            
-            original = df[col].copy()
-            df[col] = df[col].apply(clean_text)
-            changed = (original.astype(str) != df[col].astype(str)).sum()
-            if changed > 0:
-                changes["text_cleaned"] += int(changed)
+    # === 4. PROCESS EACH COLUMN BY ITS PLAN ===
+    if plan is None:
+        with timings.stage("plan", rows=len(df)):
+            plan = plan_columns(df)
+        logs.append(f"🗺️ Column plan: {describe(plan)}")
+    changes["plan"] = plan
+    steps = [(step["column"], step["kind"]) for step in plan if step["column"] in df.columns]
+    # Wide frames: text columns are cleaned in a process pool, results applied here in plan order
+    tasks = parallel.submit(df, steps, clean_column)
+    try:
+        with timings.stage("clean_parallel", rows=len(df)) if tasks else nullcontext():
+            for col, kind in steps:
+                result = tasks[col].result() if col in tasks else None
+                if result is None:
+                    with timings.stage("clean", column=col, kind=kind, rows=len(df)):
+                        clean_column(df, col, kind, changes, logs)
+                    continue
+                df[col], part, part_logs, seconds = result
+                for key, value in part.items():
+                    if key == "date_formats":
+                        changes[key].update(value)
+                    else:
+                        changes[key] += value
+                logs.extend(part_logs)
+                timings.add("clean", seconds, column=col, kind=kind, rows=len(df))
+    finally:
+        parallel.release(tasks)
     
     if changes["text_cleaned"] > 0:
         logs.append(f"✨ Cleaned whitespace in {changes['text_cleaned']} text cells")
     
-    # === 5. FILL REMAINING NaN ===
-    df = df.fillna('')
+    # === 5. DEDUP AGAIN ON NORMALIZED VALUES ("RAHUL  sharma" = "Rahul Sharma") ===
+    with timings.stage("near_dedup", rows=len(df)):
+        df = drop_near_duplicates(df, plan, changes, logs, near_dups or NearDuplicateFinder())
+    
+    # === 6. COMPACT DTYPES (NaN is filled with '' only when writing out) ===
+    with timings.stage("compact", rows=len(df)):
+        df = compact_dtypes(df)
     
     changes["rows_after"] = len(df)
     return df, changes
 
-def process_file_and_load(file_obj, filename, table_name, db_url, dry_run=False, return_file=False, schema=None):
-    """Main processing function with optional schema enforcement"""
+NA_VALUES = ['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', 'nan']
+CHUNK_ROWS = 50000
+# replace: swap in a fresh table | append: insert rows with new keys | upsert: also update changed rows
+LOAD_MODES = ("replace", "append", "upsert")
+# Bump whenever cleaning output changes - it is part of every result-cache key
+TRANSFORMER_VERSION = "2026.10-7"
+
+def read_table(file_obj, filename, chunksize=None, sheet=None, header_row=1):
+    """DataFrame from a CSV/Excel upload - or an iterator of DataFrames when chunksize is set.
+    sheet (name or 0-based index) and header_row (1-based) only apply to Excel files."""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return pd.read_csv(file_obj, encoding='utf-8', na_values=NA_VALUES, chunksize=chunksize)
+    if name.endswith('.xlsx'):
+        frames = iter_excel(file_obj, sheet, header_row, batch_rows=chunksize, na_values=NA_VALUES)
+        if chunksize:
+            return frames
+        df = next(frames)
+        frames.close()
+        return df
+    if name.endswith('.xls'):
+        # Legacy binary workbooks aren't readable by openpyxl - pandas/xlrd reads them whole
+        if sheet is None or sheet == '':
+            sheet = 0
+        elif str(sheet).isdigit():
+            sheet = int(sheet)
+        df = pd.read_excel(file_obj, na_values=NA_VALUES, sheet_name=sheet, header=max(1, header_row or 1) - 1)
+        if chunksize:
+            return (df.iloc[start:start + chunksize] for start in range(0, max(len(df), 1), chunksize))
+        return df
+    return None
+
+def apply_schema(df, schema, logs, compiled=None):
+    """Map/convert columns to a user-defined schema -> (df, compiled, failures).
+    The mapping is resolved once (CompiledSchema) - pass compiled back in for later chunks."""
+    if compiled is None:
+        compiled = CompiledSchema(schema, df.columns)
+        logs.append(f"🎯 Applying custom schema ({len(schema)} columns defined)")
+        for field in compiled.fields:
+            if field["match"] == "exact":
+                logs.append(f"  📎 Mapped '{field['source']}' → '{field['name']}'")
+            elif field["match"]:
+                logs.append(f"  🔍 Auto-mapped '{field['source']}' → '{field['name']}' "
+                            f"({field['match']}, {field['confidence']:.0%} confidence)")
+            else:
+                logs.append(f"  ⚠️ No source for '{field['name']}' - added empty column")
+    
+    df, failures = compiled.apply(df)
+    for field in compiled.fields:
+        name = field["name"]
+        if failures[name]:
+            logs.append(f"  ⚠️ {failures[name]} values in '{name}' couldn't be read as {field['type']}")
+        if field["required"] and (df[name].isna() | (df[name].astype(str) == '')).all():
+            logs.append(f"  ❌ Required field '{name}' has no data!")
+    
+    logs.append(f"✅ Schema applied: {len(df.columns)} columns")
+    return df, compiled, failures
+
+def merge_stats(total, part):
+    """Add one chunk's magic_transform stats into the running total"""
+    for key, value in part.items():
+        if key == "plan":
+            continue
+        if key == "schema":
+            for field, part_field in zip(total[key], value):
+                field["failures"] += part_field["failures"]
+            continue
+        if key == "duplicate_clusters":
+            total[key] = (total.get(key, []) + value)[:CLUSTER_REPORT_LIMIT]
+            continue
+        if key == "date_formats":
+            for col, report in value.items():
+                merged = total[key].setdefault(col, {"formats": {}, "fallback": 0, "unparsed": 0})
+                for fmt, n in report.get("formats", {}).items():
+                    merged["formats"][fmt] = merged["formats"].get(fmt, 0) + n
+                merged["fallback"] += report.get("fallback", 0)
+                merged["unparsed"] += report.get("unparsed", 0)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+def conform_chunk(chunk, dtypes):
+    """Cast a later chunk to the column types the first chunk created the table with"""
+    for col, dtype in dtypes.items():
+        if col not in chunk.columns or chunk[col].dtype == dtype:
+            continue
+        if dtype.kind in 'iuf':
+            # Text in this chunk (e.g. an all-empty column read as object) -> NULL, not a type error
+            values = pd.to_numeric(chunk[col], errors='coerce')
+            if dtype.kind in 'iu' and values.dtype.kind == 'f':
+                # A blank made this chunk float - COPY would send '22.0' to a BIGINT column.
+                # Fractions round, as Postgres' own cast did when chunks went through to_sql
+                values = values.where(np.isfinite(values) & (values.abs() < 2 ** 63)).round().astype('Int64')
+            chunk[col] = values
+        elif dtype.kind == 'M':
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+    return chunk
+
+class PipelineCancelled(Exception):
+    """Raised by a progress callback to abort an import - the load transaction rolls back"""
+
+def no_progress(stage, logs, **counts):
+    pass
+
+def log_summary(stats, rows, cols, logs):
+    total_changes = (
+        stats["duplicates"] + stats["near_duplicates"] + stats["empty_removed"] + 
+        stats["dates_fixed"] + stats["emails_fixed"] + 
+        stats["phones_fixed"] + stats["names_fixed"] + stats["numbers_fixed"]
+    )
+    
+    logs.append(f"")
+    logs.append(f"✅ TRANSFORMATION COMPLETE")
+    logs.append(f"📈 Final: {rows} rows × {cols} columns")
+    
+    if total_changes > 0:
+        logs.append(f"🔥 Total transformations applied: {total_changes}")
+
+def process_file_and_load(file_obj, filename, table_name, db_url, dry_run=False, return_file=False, schema=None, chunksize=None, engine=None, progress=None, read_options=None, cache_key=None, mode="replace", key_columns=None):
+    """Main processing function with optional schema enforcement.
+    chunksize streams the file: each chunk is cleaned and written before the next is read.
+    engine overrides the shared pooled engine for db_url.
+    progress(stage, logs, rows_parsed=/rows_cleaned=/rows_written=) is called as work completes;
+    it may raise PipelineCancelled to stop the import.
+    read_options go to read_table (sheet, header_row).
+    cache_key (upload_key()) reuses / stores the cleaned result in the local result cache.
+    mode (LOAD_MODES) append/upsert merge into the existing table on key_columns
+    (default: merge_key_columns()) instead of replacing it.
+    The result carries "timings": per-stage (metrics.STAGES) / per-column-cleaner time, rows/sec and memory."""
+    timings = Timings()
+    with timings.stage("total") as total:
+        result = _process_file(file_obj, filename, table_name, db_url, dry_run, return_file, schema, chunksize, engine,
+                               progress or no_progress, read_options, cache_key, mode, key_columns, timings)
+        total["rows"] = result.get("stats", {}).get("rows_before") if result.get("success") else 0
+    result["timings"] = timings.report()
+    return result
+
+def _process_file(file_obj, filename, table_name, db_url, dry_run, return_file, schema, chunksize, engine, progress, read_options, cache_key, mode, key_columns, timings):
     logs = []
     
     try:
         logs.append("🚀 ULTIMATE DATA ENGINE ACTIVATED")
         logs.append(f"📂 Processing: {filename}")
         
-        # === LOAD FILE ===
-        if filename.lower().endswith('.csv'):
-            df = pd.read_csv(file_obj, encoding='utf-8', na_values=['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', 'nan'])
-        elif filename.lower().endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(file_obj, na_values=['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', 'nan'])
-        else:
-            return {"success": False, "errors": ["Unsupported file format"], "logs": logs}
-        
-        logs.append(f"📊 Loaded {len(df)} rows × {len(df.columns)} columns")
-        
-        # === APPLY SCHEMA IF PROVIDED ===
-        if schema and len(schema) > 0:
-            logs.append(f"🎯 Applying custom schema ({len(schema)} columns defined)")
-            new_df = pd.DataFrame()
-            
-            for field in schema:
-                target_name = field.get('name', '').strip()
-                if not target_name:
-                    continue
-                    
-                source_col = field.get('mapFrom', '')
-                field_type = field.get('type', 'text')
-                required = field.get('required', False)
-                
-                # Find source column (exact match or fuzzy)
-                if source_col and source_col in df.columns:
-                    new_df[target_name] = df[source_col].copy()
-                    logs.append(f"  📎 Mapped '{source_col}' → '{target_name}'")
-                else:
-                    # Try to find matching column
-                    found = False
-                    for col in df.columns:
-                        if target_name.lower() in col.lower() or col.lower() in target_name.lower():
-                            new_df[target_name] = df[col].copy()
-                            logs.append(f"  🔍 Auto-mapped '{col}' → '{target_name}'")
-                            found = True
-                            break
-                    if not found:
-                        new_df[target_name] = ''
-                        logs.append(f"  ⚠️ No source for '{target_name}' - added empty column")
-                
-                # Apply type conversion
-                if target_name in new_df.columns:
-                    if field_type == 'number':
-                        new_df[target_name] = pd.to_numeric(new_df[target_name], errors='coerce').fillna(0)
-                    elif field_type == 'date':
-                        new_df[target_name] = pd.to_datetime(new_df[target_name], errors='coerce').dt.strftime('%Y-%m-%d').fillna('')
-                    elif field_type == 'email':
-                        new_df[target_name] = new_df[target_name].astype(str).str.lower().str.strip()
-                    elif field_type == 'phone':
-                        new_df[target_name] = new_df[target_name].astype(str).apply(
-                            lambda x: '+91-' + re.sub(r'\\D', '', str(x))[-10:-5] + '-' + re.sub(r'\\D', '', str(x))[-5:] 
-                            if len(re.sub(r'\\D', '', str(x))) >= 10 else x
-                        )
-                    elif field_type == 'boolean':
-                        new_df[target_name] = new_df[target_name].astype(str).str.lower().isin(['yes', 'true', '1', 'y'])
-                
-                # Check required
-                if required and new_df[target_name].isna().all():
-                    logs.append(f"  ❌ Required field '{target_name}' has no data!")
-            
-            df = new_df
-            logs.append(f"✅ Schema applied: {len(df.columns)} columns")
-        
-        # === MAGIC TRANSFORMATION ===
-        df, stats = magic_transform(df, logs)
-        
-        # === SUMMARY ===
-        total_changes = (
-            stats["duplicates"] + stats["empty_removed"] + 
-            stats["dates_fixed"] + stats["emails_fixed"] + 
-            stats["phones_fixed"] + stats["names_fixed"] + stats["numbers_fixed"]
-        )
+        if chunksize:
+            return process_in_chunks(file_obj, filename, table_name, db_url, logs, dry_run, return_file, schema, chunksize, engine, progress, read_options, cache_key, mode, key_columns, timings)
         
-        logs.append(f"")
-        logs.append(f"✅ TRANSFORMATION COMPLETE")
-        logs.append(f"📈 Final: {len(df)} rows × {len(df.columns)} columns")
-        
-        if total_changes > 0:
-            logs.append(f"🔥 Total transformations applied: {total_changes}")
+        # === LOAD + CLEAN (or reuse an identical upload's result) ===
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            log_cache_hit(cached, logs)
+            progress("cleaning", logs, rows_parsed=cached.meta["rows_read"])
+            with timings.stage("cache_read") as info:
+                df, stats = next(cached.frames()), cached.meta["stats"]
+                info["rows"] = len(df)
+        else:
+            mark = len(logs)
+            cleaned = clean_file(file_obj, filename, logs, schema, read_options, progress, timings)
+            if cleaned is None:
+                return {"success": False, "errors": ["Unsupported file format"], "logs": logs}
+            df, stats = cleaned
+            result_cache.put(cache_key, [df], {
+                "stats": stats, "logs": logs[mark:], "columns": df.columns.tolist(),
+                "rows_read": stats.get("rows_before", len(df)), "rows": len(df)
+            })
+        progress("writing", logs, rows_cleaned=len(df))
         
         # === RETURN FILE (for download) ===
         if return_file:
-            csv_content = df.to_csv(index=False)
+            with timings.stage("csv", rows=len(df)):
+                csv_content = df.to_csv(index=False)
             return {
                 "success": True,
                 "csv_content": csv_content,
@@ -322,12 +429,19 @@ def process_file_and_load(file_obj, filename, table_name, db_url, dry_run=False,
             }
         
         # === SAVE TO DATABASE ===
-        if not dry_run and db_url:
+        merged = {}
+        if not dry_run and (db_url or engine):
             logs.append(f"💾 Saving to database table: {table_name}")
-            engine = create_engine(db_url)
+            engine = engine or get_engine(db_url)
             with engine.begin() as conn:
-                df.to_sql(table_name, con=conn, if_exists='replace', index=False)
-            logs.append(f"🎉 Created table '{table_name}' with {len(df)} records!")
+                loader = TableLoader(conn, table_name)
+                with timings.stage("write", rows=len(df)):
+                    loader.write(df)
+                with timings.stage("commit", rows=len(df)):
+                    merged = finish_load(loader, mode, key_columns, logs, stats["plan"])
+                # Last chance to cancel - raising here rolls the load back
+                progress("committing", logs, rows_written=len(df))
+            log_loaded(table_name, len(df), merged, logs)
         
         return {
             "success": True,
@@ -336,9 +450,12 @@ def process_file_and_load(file_obj, filename, table_name, db_url, dry_run=False,
             "columns": df.columns.tolist(),
             "logs": logs,
             "errors": [],
-            "stats": stats
+            "stats": stats,
+            **merged
         }
         
+    except PipelineCancelled:
+        raise
     except Exception as e:
         import traceback
         logs.append(f"❌ Error: {str(e)}")
@@ -347,3 +464,229 @@ def process_file_and_load(file_obj, filename, table_name, db_url, dry_run=False,
             "logs": logs,
             "errors": [str(e), traceback.format_exc()[:500]]
         }
+
+def finish_load(loader, mode, key_columns, logs, plan=()):
+    """Swap the staged rows in (replace) or merge them into the table -> merge counts for the response"""
+    if mode == "replace":
+        loader.swap()
+        return {}
+    keys = key_columns or merge_key_columns(plan)
+    if not keys:
+        raise ValueError("No id columns (roll_no, student_id, enrollment, ...) to match rows on - pass key_columns")
+    counts = loader.merge(keys, update=mode == "upsert")
+    logs.append(f"🔀 {mode.title()} on {', '.join(keys)}: {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged")
+    if counts["skipped"]:
+        logs.append(f"  ⚠️ Skipped {counts['skipped']} rows with a blank {' / '.join(keys)} - they can't be matched")
+    return {
+        "mode": mode,
+        "keyColumns": keys,
+        "merge": {k: counts[k] for k in ("inserted", "updated", "unchanged", "skipped")},
+        "rowCount": counts["rows"]
+    }
+
+def log_loaded(table_name, rows, merged, logs):
+    if merged:
+        logs.append(f"🎉 Merged {rows} records into '{table_name}' - it now has {merged['rowCount']}!")
+    else:
+        logs.append(f"🎉 Created table '{table_name}' with {rows} records!")
+
+def upload_key(file_obj, schema=None, read_options=None, chunksize=None):
+    """Result-cache key for an upload - same bytes, schema, read options and rules -> same cleaned output"""
+    fuzzy = FUZZY_NAME_THRESHOLD if FUZZY_DEDUP else None
+    return content_key(file_obj, schema, read_options, chunksize, TRANSFORMER_VERSION, fuzzy)
+
+def log_cache_hit(cached, logs):
+    logs.append("⚡ Identical upload cleaned before - reusing the cached result")
+    logs.extend(cached.meta["logs"])
+
+def clean_file(file_obj, filename, logs, schema=None, read_options=None, progress=no_progress, timings=None):
+    """Read and clean a whole upload -> (df, stats), or None for an unsupported format"""
+    timings = timings or Timings()
+    with timings.stage("read") as info:
+        df = read_table(file_obj, filename, **(read_options or {}))
+        info["rows"] = 0 if df is None else len(df)
+    if df is None:
+        return None
+    
+    logs.append(f"📊 Loaded {len(df)} rows × {len(df.columns)} columns")
+    progress("cleaning", logs, rows_parsed=len(df))
+    
+    # === APPLY SCHEMA IF PROVIDED ===
+    compiled = None
+    if schema and len(schema) > 0:
+        with timings.stage("schema", rows=len(df)):
+            df, compiled, failures = apply_schema(df, schema, logs)
+    
+    # === MAGIC TRANSFORMATION ===
+    df, stats = magic_transform(df, logs, timings=timings)
+    if compiled is not None:
+        stats["schema"] = compiled.report(failures)
+    
+    # === SUMMARY ===
+    log_summary(stats, len(df), len(df.columns), logs)
+    return df, stats
+
+def new_totals():
+    return {"rows_read": 0, "rows_written": 0, "chunks": 0, "stats": None, "columns": []}
+
+def clean_chunks(chunks, logs, schema=None, totals=None, progress=no_progress, timings=None):
+    """Clean raw chunks one at a time - duplicates are dropped across chunks and later chunks
+    are cast to the first chunk's column types. totals (new_totals()) is updated as chunks go by."""
+    totals = totals if totals is not None else new_totals()
+    timings = timings or Timings()
+    seen_keys = KeyDigestSet()
+    near_dups = NearDuplicateFinder()
+    dtypes = plan = compiled = None
+    for chunk in chunks:
+        first = totals["chunks"] == 0
+        # Only the first chunk narrates - later ones would repeat the same lines
+        chunk_logs = logs if first else []
+        totals["rows_read"] += len(chunk)
+        progress("cleaning", logs, rows_parsed=totals["rows_read"])
+        if schema and len(schema) > 0:
+            with timings.stage("schema", rows=len(chunk)):
+                chunk, compiled, failures = apply_schema(chunk, schema, chunk_logs, compiled)
+        chunk, chunk_stats = magic_transform(chunk, chunk_logs, seen_keys=seen_keys, plan=plan, timings=timings,
+                                             near_dups=near_dups)
+        if compiled is not None:
+            chunk_stats["schema"] = compiled.report(failures)
+        
+        if first:
+            totals["stats"], totals["columns"], dtypes = chunk_stats, chunk.columns.tolist(), chunk.dtypes
+            # Classified once from the first chunk - later chunks follow the same plan
+            plan = chunk_stats["plan"]
+        else:
+            chunk = conform_chunk(chunk, dtypes)
+            merge_stats(totals["stats"], chunk_stats)
+        progress("writing", logs, rows_cleaned=totals["rows_written"] + len(chunk))
+        
+        yield chunk
+        totals["rows_written"] += len(chunk)
+        totals["chunks"] += 1
+        progress("parsing", logs, rows_written=totals["rows_written"])
+
+def _caching(frames, writer, totals, logs):
+    """Pass frames through while saving them; the entry is published only if all of them went by"""
+    mark = len(logs)  # runs on the first next() - the cleaning logs start here
+    done = False
+    try:
+        for df in frames:
+            writer.add(df)
+            yield df
+        done = True
+    finally:
+        if done:
+            writer.commit({
+                "stats": totals["stats"], "logs": logs[mark:], "columns": totals["columns"],
+                "rows_read": totals["rows_read"], "rows": totals["rows_written"]
+            })
+        else:
+            writer.abort()
+
+def _replayed(frames, logs, progress):
+    """Cached frames, reporting rows_written as they go by like clean_chunks does"""
+    written = 0
+    for df in frames:
+        yield df
+        written += len(df)
+        progress("writing", logs, rows_written=written)
+
+def cleaned_chunks(file_obj, filename, logs, schema=None, chunksize=None, totals=None, progress=no_progress, read_options=None, cache_key=None, timings=None):
+    """Cleaned frames for an upload (one per chunk, or one for the whole file without chunksize),
+    read from the result cache when an identical upload was cleaned before. None = unsupported format."""
+    totals = totals if totals is not None else new_totals()
+    timings = timings or Timings()
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        log_cache_hit(cached, logs)
+        meta = cached.meta
+        totals.update(rows_read=meta["rows_read"], rows_written=meta["rows"], chunks=meta["chunks"],
+                      stats=meta["stats"], columns=meta["columns"])
+        progress("writing", logs, rows_parsed=meta["rows_read"], rows_cleaned=meta["rows"])
+        return _replayed(timed(cached.frames(), timings, "cache_read"), logs, progress)
+    
+    with timings.stage("read"):
+        chunks = read_table(file_obj, filename, chunksize=chunksize, **(read_options or {}))
+    if chunks is None:
+        return None
+    if chunksize is None:
+        chunks = [chunks]
+    frames = clean_chunks(timed(chunks, timings, "read"), logs, schema, totals, progress, timings)
+    writer = result_cache.writer(cache_key)
+    return _caching(frames, writer, totals, logs) if writer is not None else frames
+
+def iter_cleaned(file_obj, filename, logs, schema=None, chunksize=None, totals=None, read_options=None, cache_key=None, timings=None):
+    """Cleaned DataFrames for an upload - one per chunk, or the whole file as one frame without chunksize"""
+    frames = cleaned_chunks(file_obj, filename, logs, schema, chunksize, totals, read_options=read_options, cache_key=cache_key, timings=timings)
+    if frames is None:
+        raise ValueError("Unsupported file format")
+    return frames
+
+def process_in_chunks(file_obj, filename, table_name, db_url, logs, dry_run=False, return_file=False, schema=None, chunksize=CHUNK_ROWS, engine=None, progress=no_progress, read_options=None, cache_key=None, mode="replace", key_columns=None, timings=None):
+    """Streaming variant of process_file_and_load - peak memory follows chunksize, not file size"""
+    totals = new_totals()
+    timings = timings or Timings()
+    frames = cleaned_chunks(file_obj, filename, logs, schema, chunksize, totals, progress, read_options, cache_key, timings)
+    if frames is None:
+        return {"success": False, "errors": ["Unsupported file format"], "logs": logs}
+    logs.append(f"📦 Streaming in chunks of {chunksize} rows")
+    
+    csv_buffer = io.StringIO() if return_file else None
+    if dry_run or return_file or not (db_url or engine):
+        engine = None
+    else:
+        engine = engine or get_engine(db_url)
+    if engine is not None:
+        logs.append(f"💾 Streaming into database table: {table_name}")
+    
+    merged = {}
+    with (engine.begin() if engine is not None else nullcontext()) as conn:
+        loader = TableLoader(conn, table_name) if conn is not None else None
+        for i, chunk in enumerate(frames):
+            if csv_buffer is not None:
+                with timings.stage("csv", rows=len(chunk)):
+                    chunk.to_csv(csv_buffer, index=False, header=i == 0)
+            elif loader is not None:
+                with timings.stage("write", rows=len(chunk)):
+                    loader.write(chunk)
+        
+        if loader is not None and totals["chunks"]:
+            # Swap / merge inside the same transaction - readers never see a half-loaded table
+            with timings.stage("commit", rows=totals["rows_written"]):
+                merged = finish_load(loader, mode, key_columns, logs, totals["stats"]["plan"])
+            progress("committing", logs, rows_written=totals["rows_written"])
+    
+    stats, columns = totals["stats"], totals["columns"]
+    rows_read, rows_written, n_chunks = totals["rows_read"], totals["rows_written"], totals["chunks"]
+    if stats is None:
+        return {"success": False, "errors": ["File has no rows"], "logs": logs}
+    
+    logs.append(f"📊 Streamed {rows_read} rows in {n_chunks} chunks")
+    if stats["duplicates"] > 0:
+        logs.append(f"♻️ Removed {stats['duplicates']} duplicates across all chunks")
+    if stats["near_duplicates"] > 0:
+        logs.append(f"♻️ Removed {stats['near_duplicates']} normalized/near duplicates across all chunks")
+    log_summary(stats, rows_written, len(columns), logs)
+    
+    if csv_buffer is not None:
+        return {
+            "success": True,
+            "csv_content": csv_buffer.getvalue(),
+            "logs": logs,
+            "stats": stats
+        }
+    if engine is not None:
+        log_loaded(table_name, rows_written, merged, logs)
+    
+    return {
+        "success": True,
+        "tableName": table_name,
+        "rowCount": rows_written,
+        "columns": columns,
+        "logs": logs,
+        "errors": [],
+        "stats": stats,
+        "chunks": n_chunks,
+        **merged
+    }
@@ -1,14 +1,62 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import time
+# Cold-start clock - everything below, FastAPI included, counts toward module_import_ms
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, Body, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+import asyncio
+import importlib
+import json
+import math
 import os
+import re
+import subprocess
+import sys
+import threading
 import traceback
 
-# Import processor
+# Light modules only - pandas, SQLAlchemy and pyarrow load with the first route that needs them
 try:
-    from .processor import process_file_and_load, sanitize_column_name
+    from .naming import sanitize_column_name
+    from .metrics import Timings, prometheus_text, record_run
+    from .workers import PipelineBusy, iterate_in_worker, run_pipeline, spill, worker_stats
 except ImportError:
-    from processor import process_file_and_load, sanitize_column_name
+    from naming import sanitize_column_name
+    from metrics import Timings, prometheus_text, record_run
+    from workers import PipelineBusy, iterate_in_worker, run_pipeline, spill, worker_stats
+
+# === LAZY MODULES ===
+# First-import time of each lazily loaded module, ms (reported by /api/python/debug/startup)
+LAZY_IMPORT_MS = {}
+
+class LazyModule:
+    """Sibling module imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            start = time.perf_counter()
+            if __package__:
+                self._module = importlib.import_module(f".{self._name}", __package__)
+            else:
+                self._module = importlib.import_module(self._name)
+            LAZY_IMPORT_MS.setdefault(self._name, round((time.perf_counter() - start) * 1000, 1))
+        return getattr(self._module, attr)
+
+processor = LazyModule("processor")
+cache = LazyModule("cache")
+excel = LazyModule("excel")
+db = LazyModule("db")
+jobs = LazyModule("jobs")
+export = LazyModule("export")
+query = LazyModule("query")
 
 app = FastAPI()
 
@@ -26,80 +74,253 @@ DB_URL = os.environ.get("DATABASE_URL_DATA_PIPELINE",
 if DB_URL.startswith("postgresql://"):
     DB_URL = DB_URL.replace("postgresql://", "postgresql+psycopg2://")
 
+# Uploads bigger than this are cleaned and written chunk by chunk
+STREAM_THRESHOLD_BYTES = int(os.environ.get("STREAM_THRESHOLD_MB", "20")) * 1024 * 1024
+CHUNK_ROWS = int(os.environ.get("PIPELINE_CHUNK_ROWS", "50000"))
+
+def chunk_rows_for(size):
+    return CHUNK_ROWS if size > STREAM_THRESHOLD_BYTES else None
+
+def upload_stream(file):
+    """The upload's own spooled file, rewound - parsed in place rather than copied to a temp file"""
+    stream = file.file
+    # SpooledTemporaryFile only has readable()/seekable() (which pandas probes) from Python 3.11
+    if not hasattr(stream, "readable"):
+        stream = getattr(stream, "_file", stream)
+    stream.seek(0)
+    return stream
+
+def stream_size(stream):
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
 @app.get("/api/python")
 def health():
     return {"status": "Flagship Engine Ready"}
 
+@app.get("/api/python/pool")
+def pool_status():
+    """Connection pool checkout/wait metrics and pipeline worker queue"""
+    return {"success": True, "pool": db.pool_metrics(), "workers": worker_stats()}
+
+@app.get("/api/python/metrics")
+def metrics():
+    """Per-stage pipeline timings, memory, worker and DB pool stats for Prometheus to scrape"""
+    return PlainTextResponse(prometheus_text(worker_stats(), db.pool_metrics()), media_type="text/plain; version=0.0.4")
+
+# === COLD START ===
+# Target for module_import_ms; 0 = no budget
+COLD_START_BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", "0"))
+HEAVY_MODULES = ("pandas", "numpy", "sqlalchemy", "pyarrow", "python_calamine")
+# breakdown=true spawns an interpreter - off unless a deployment opts in
+IMPORT_BREAKDOWN = os.environ.get("STARTUP_IMPORT_BREAKDOWN", "") == "1"
+_import_breakdown = None
+_import_breakdown_lock = threading.Lock()
+
+def import_breakdown(top=25):
+    """Slowest imports of a fresh interpreter loading this app (python -X importtime), cumulative ms.
+    Measured once per process - concurrent first callers wait for the same run."""
+    global _import_breakdown
+    with _import_breakdown_lock:
+        if _import_breakdown is None:
+            _import_breakdown = _measure_imports()
+    return _import_breakdown[:top]
+
+def _measure_imports():
+    target = f"{__package__}.python" if __package__ else "python"
+    root = os.path.dirname(os.path.abspath(__file__))
+    if __package__:
+        root = os.path.dirname(root)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=root, capture_output=True, text=True, timeout=120,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        entries.append({"module": parts[2].strip(), "cumulative_ms": round(int(parts[1]) / 1000, 1),
+                        "self_ms": round(int(parts[0].split(":")[1]) / 1000, 1)})
+    return sorted(entries, key=lambda e: -e["cumulative_ms"])
+
+@app.get("/api/python/debug/startup")
+def startup_report(breakdown: bool = False):
+    """Cold-start cost: this module's import time, modules loaded lazily since, and heavy libraries
+    in memory. breakdown=true adds the slowest imports of a fresh interpreter (runs one - slow);
+    only when STARTUP_IMPORT_BREAKDOWN=1, otherwise it is a 403."""
+    report = {
+        "success": True,
+        "module_import_ms": MODULE_IMPORT_MS,
+        "budget_ms": COLD_START_BUDGET_MS or None,
+        "within_budget": MODULE_IMPORT_MS <= COLD_START_BUDGET_MS if COLD_START_BUDGET_MS else None,
+        "lazy_import_ms": dict(LAZY_IMPORT_MS),
+        "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+    if breakdown and not IMPORT_BREAKDOWN:
+        return JSONResponse(status_code=403, content={
+            "success": False, "error": "Import breakdown is disabled - set STARTUP_IMPORT_BREAKDOWN=1 to enable it"
+        })
+    if breakdown:
+        try:
+            report["import_breakdown"] = import_breakdown()
+        except (OSError, subprocess.SubprocessError) as e:
+            report["import_breakdown_error"] = str(e)
+    return report
+
+def busy_response(busy):
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(busy.retry_after)},
+        content={"success": False, "errors": [str(busy)], "logs": ["⏳ Server busy - try again shortly"]}
+    )
+
+def record_table_metadata(result, table, file_name, user_id, user_name, content_hash=None):
+    """Record table metadata (creator info, source content hash) after a successful upload.
+    Anonymous uploads keep the table's existing creator."""
+    try:
+        from sqlalchemy import text
+        from datetime import datetime
+        engine = db.get_engine(DB_URL)
+        with engine.begin() as conn:
+            # Create metadata table if not exists
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS _table_metadata (
+                    id SERIAL PRIMARY KEY,
+                    table_name VARCHAR(255) UNIQUE NOT NULL,
+                    created_by_id VARCHAR(255),
+                    created_by_name VARCHAR(255),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    row_count INTEGER,
+                    file_name VARCHAR(255),
+                    content_hash VARCHAR(64)
+                )
+            """))
+            conn.execute(text("ALTER TABLE _table_metadata ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+            # Insert or update metadata
+            conn.execute(text("""
+                INSERT INTO _table_metadata (table_name, created_by_id, created_by_name, row_count, file_name, created_at, content_hash)
+                VALUES (:table_name, :user_id, :user_name, :row_count, :file_name, :created_at, :content_hash)
+                ON CONFLICT (table_name) DO UPDATE SET
+                    created_by_id = COALESCE(:user_id, _table_metadata.created_by_id),
+                    created_by_name = COALESCE(:user_name, _table_metadata.created_by_name),
+                    row_count = :row_count,
+                    file_name = :file_name,
+                    created_at = :created_at,
+                    content_hash = :content_hash
+            """), {
+                "table_name": table,
+                "user_id": user_id,
+                "user_name": (user_name or "Unknown") if user_id else None,
+                "row_count": result.get("rowCount", 0),
+                "file_name": file_name,
+                "created_at": datetime.now(),
+                "content_hash": content_hash
+            })
+        if user_id:
+            result["createdBy"] = user_name or user_id
+    except Exception as meta_err:
+        result["metaWarning"] = str(meta_err)
+
+def unchanged_table(table, content_hash):
+    """_table_metadata row of a live table last loaded from exactly this content, else None"""
+    from sqlalchemy import text
+    try:
+        with db.get_engine(DB_URL).connect() as conn:
+            row = conn.execute(text("""
+                SELECT row_count, file_name FROM _table_metadata
+                WHERE table_name = :table_name AND content_hash = :content_hash
+                  AND to_regclass(quote_ident(:table_name)) IS NOT NULL
+            """), {"table_name": table, "content_hash": content_hash}).mappings().first()
+    except Exception:
+        # No metadata table (or no content_hash column) yet
+        return None
+    return row
+
 @app.post("/api/python/upload")
 async def upload_file(
     file: UploadFile = File(...), 
     table_name: str = Form(...),
     schema: str = Form(None),
     user_id: str = Form(None),
-    user_name: str = Form(None)
+    user_name: str = Form(None),
+    background: bool = Form(False),
+    sheet: str = Form(None),
+    header_row: int = Form(1),
+    mode: str = Form("replace"),
+    key_columns: str = Form(None)
 ):
+    """Clean and load an upload. background=true returns a job id at once (202) - poll /api/python/jobs/{id}.
+    Background jobs need a long-lived server; on serverless (jobs.RUN_INLINE) the 202 comes once the job ends.
+    sheet (name or 0-based index) and header_row (1-based) pick what to read from Excel workbooks.
+    mode=append|upsert merges into the existing table on key_columns (comma-separated; default: the
+    columns planned as ids - roll_no, student_id, enrollment, ...) and reports
+    "merge": {inserted, updated, unchanged, skipped}; rows with a blank key are skipped.
+    Re-uploading the exact file a table was loaded from returns at once with "unchanged": true."""
     try:
-        content = await file.read()
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(content)
+        if mode not in processor.LOAD_MODES:
+            return {"success": False, "errors": [f"mode must be one of {', '.join(processor.LOAD_MODES)}"], "logs": []}
+        keys = [sanitize_column_name(c) for c in key_columns.split(",") if c.strip()] if key_columns else None
+        stream = upload_stream(file)
         
         # Parse schema if provided
         schema_obj = None
         if schema:
-            import json
             schema_obj = json.loads(schema)
         
-        with open(temp_path, "rb") as f:
-            table = sanitize_column_name(table_name) or "imported_data"
-            result = process_file_and_load(f, file.filename, table, DB_URL, schema=schema_obj)
+        table = sanitize_column_name(table_name) or "imported_data"
+        chunksize = chunk_rows_for(stream_size(stream))
+        read_options = {"sheet": sheet, "header_row": header_row}
+        cache_key = await asyncio.to_thread(processor.upload_key, stream, schema_obj, read_options, chunksize)
         
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        # Same bytes, schema and rules as what the table was last loaded from - nothing to do
+        unchanged = await asyncio.to_thread(unchanged_table, table, cache_key)
+        if unchanged is not None:
+            cached = cache.result_cache.get(cache_key)
+            return {
+                "success": True,
+                "tableName": table,
+                "rowCount": unchanged["row_count"],
+                "unchanged": True,
+                "logs": [f"⚡ '{table}' already holds this exact file ({unchanged['file_name']}) - nothing to reload"],
+                "errors": [],
+                "stats": cached.meta["stats"] if cached is not None else None
+            }
         
-        # Record table metadata (creator info)
-        if result.get("success") and user_id:
-            try:
-                from sqlalchemy import create_engine, text
-                from datetime import datetime
-                engine = create_engine(DB_URL)
-                with engine.begin() as conn:
-                    # Create metadata table if not exists
-                    conn.execute(text("""
-                        CREATE TABLE IF NOT EXISTS _table_metadata (
-                            id SERIAL PRIMARY KEY,
-                            table_name VARCHAR(255) UNIQUE NOT NULL,
-                            created_by_id VARCHAR(255),
-                            created_by_name VARCHAR(255),
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            row_count INTEGER,
-                            file_name VARCHAR(255)
-                        )
-                    """))
-                    # Insert or update metadata
-                    conn.execute(text("""
-                        INSERT INTO _table_metadata (table_name, created_by_id, created_by_name, row_count, file_name, created_at)
-                        VALUES (:table_name, :user_id, :user_name, :row_count, :file_name, :created_at)
-                        ON CONFLICT (table_name) DO UPDATE SET
-                            created_by_id = :user_id,
-                            created_by_name = :user_name,
-                            row_count = :row_count,
-                            file_name = :file_name,
-                            created_at = :created_at
-                    """), {
-                        "table_name": table,
-                        "user_id": user_id,
-                        "user_name": user_name or "Unknown",
-                        "row_count": result.get("rowCount", 0),
-                        "file_name": file.filename,
-                        "created_at": datetime.now()
-                    })
-                result["createdBy"] = user_name or user_id
-            except Exception as meta_err:
-                result["metaWarning"] = str(meta_err)
+        def after_load(result):
+            # A merged table holds more than this file - no hash, so re-uploading it reloads
+            content_hash = cache_key if mode == "replace" else None
+            record_table_metadata(result, table, file.filename, user_id, user_name, content_hash)
+            invalidate_tables_cache()
+            query.invalidate(table)
+        
+        if background:
+            # The request's file is closed once we respond - the job gets its own copy
+            path = await asyncio.to_thread(spill, stream, os.path.splitext(file.filename)[1])
+            job_id = await jobs.start_job(path, file.filename, table, DB_URL, user_id=user_id, on_success=after_load,
+                                          schema=schema_obj, chunksize=chunksize, read_options=read_options,
+                                          cache_key=cache_key, mode=mode, key_columns=keys)
+            status = "queued"
+            if jobs.RUN_INLINE:
+                status = (await asyncio.to_thread(jobs.get_job, DB_URL, job_id))["status"]
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "jobId": job_id,
+                "status": status,
+                "statusUrl": f"/api/python/jobs/{job_id}"
+            })
         
+        result = await run_pipeline(stream, file.filename, table, DB_URL, schema=schema_obj, chunksize=chunksize,
+                                    read_options=read_options, cache_key=cache_key, mode=mode, key_columns=keys)
+        if result.get("success"):
+            after_load(result)
         return result
         
+    except PipelineBusy as busy:
+        return busy_response(busy)
     except Exception as e:
         return {
             "success": False,
@@ -107,126 +328,396 @@ async def upload_file(
             "logs": ["❌ Error occurred", traceback.format_exc()[:800]]
         }
 
+@app.post("/api/python/sheets")
+def list_sheets(file: UploadFile = File(...)):
+    """Sheet names of an Excel workbook, for picking the sheet to import"""
+    try:
+        if not file.filename.lower().endswith(".xlsx"):
+            return {"success": False, "error": "Sheet listing needs an .xlsx workbook", "sheets": []}
+        return {"success": True, "sheets": excel.sheet_names(upload_stream(file))}
+    except Exception as e:
+        return {"success": False, "error": str(e), "sheets": []}
+
+@app.get("/api/python/jobs/{job_id}")
+def job_status(job_id: str, logs_from: int = 0):
+    """Stage, row progress, logs (from index logs_from), stats and result of a background import"""
+    try:
+        job = jobs.get_job(DB_URL, job_id, max(0, logs_from))
+        if job is None:
+            return {"success": False, "error": "Job not found"}
+        return {"success": True, "job": job}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.delete("/api/python/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Ask a background import to stop - nothing it loaded is kept"""
+    try:
+        job = jobs.request_cancel(DB_URL, job_id)
+        if job is None:
+            return {"success": False, "error": "Job not found"}
+        return {"success": True, "job": job}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 @app.post("/api/python/download")
-async def download_file(file: UploadFile = File(...), table_name: str = Form("export")):
+async def download_file(
+    request: Request,
+    file: UploadFile = File(...),
+    table_name: str = Form("export"),
+    format: str = Form("csv"),
+    sheet: str = Form(None),
+    header_row: int = Form(1)
+):
+    """Stream the cleaned file back as it is produced - csv (gzip when the client accepts it) or parquet"""
+    logs = []
     try:
-        content = await file.read()
-        temp_path = f"temp_{file.filename}"
-        
-        with open(temp_path, "wb") as f:
-            f.write(content)
+        if format not in export.FORMATS:
+            return {"success": False, "errors": [f"format must be one of {', '.join(export.FORMATS)}"], "logs": logs}
+        if format == "parquet" and not export.parquet_available():
+            return {"success": False, "errors": ["Parquet export needs pyarrow installed"], "logs": logs}
         
-        with open(temp_path, "rb") as f:
-            result = process_file_and_load(f, file.filename, table_name, DB_URL, dry_run=True, return_file=True)
+        stream = upload_stream(file)
+        chunksize = chunk_rows_for(stream_size(stream))
+        read_options = {"sheet": sheet, "header_row": header_row}
+        use_gzip = format == "csv" and "gzip" in request.headers.get("accept-encoding", "")
+        timings = Timings()
+        body = iterate_in_worker(lambda: export.export_chunks(
+            processor.iter_cleaned(stream, file.filename, logs, chunksize=chunksize, read_options=read_options,
+                         cache_key=processor.upload_key(stream, None, read_options, chunksize), timings=timings),
+            format, use_gzip
+        ))
+        # Pull the first chunk before answering so read/parse errors still come back as JSON
+        try:
+            first = await body.__anext__()
+        except StopAsyncIteration:
+            first = b""
         
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        async def send():
+            status = "failed"
+            try:
+                yield first
+                async for data in body:
+                    yield data
+                status = "success"
+            finally:
+                await body.aclose()
+                record_run(timings.report(), status)
         
-        if result["success"]:
-            return Response(
-                content=result["csv_content"],
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename=cleaned_{file.filename}"}
-            )
-        return result
+        filename = f"cleaned_{file.filename}"
+        if format == "parquet":
+            filename = f"cleaned_{os.path.splitext(file.filename)[0]}.parquet"
+        headers = {"Content-Disposition": f"attachment; filename={filename}"}
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(send(), media_type=export.MEDIA_TYPES[format], headers=headers)
         
+    except PipelineBusy as busy:
+        return busy_response(busy)
     except Exception as e:
         return {
             "success": False,
             "errors": [str(e)],
-            "logs": ["❌ Download Error", traceback.format_exc()[:800]]
+            "logs": logs + ["❌ Download Error", traceback.format_exc()[:800]]
         }
 
 # === TABLE BROWSER ENDPOINTS ===
-from sqlalchemy import create_engine, text
+# Listing cache - cleared on upload/delete, TTL covers changes made by other instances
+TABLES_CACHE_TTL = float(os.environ.get("TABLES_CACHE_TTL", "30"))
+# Every (search, limit, offset) is a key - LRU-capped so arbitrary searches can't grow it forever
+TABLES_CACHE_SIZE = int(os.environ.get("TABLES_CACHE_SIZE", "256"))
+TABLES_MAX_LIMIT = 1000
+_tables_cache = OrderedDict()
+_tables_cache_lock = threading.Lock()
+
+def invalidate_tables_cache():
+    with _tables_cache_lock:
+        _tables_cache.clear()
+
+def _tables_cache_get(key):
+    with _tables_cache_lock:
+        cached = _tables_cache.get(key)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del _tables_cache[key]
+            return None
+        _tables_cache.move_to_end(key)
+        return cached[1]
+
+def _tables_cache_put(key, result):
+    now = time.monotonic()
+    with _tables_cache_lock:
+        for stale in [k for k, (expires, _) in _tables_cache.items() if expires <= now]:
+            del _tables_cache[stale]
+        _tables_cache[key] = (now + TABLES_CACHE_TTL, result)
+        _tables_cache.move_to_end(key)
+        while len(_tables_cache) > TABLES_CACHE_SIZE:
+            _tables_cache.popitem(last=False)
+
+# Underscore-prefixed relations are internal (_table_metadata, _load_* staging tables);
+# sanitize_column_name never produces a leading underscore for user tables
+TABLES_BASE_SQL = """
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    {join}
+    WHERE n.nspname = 'public'
+    AND c.relkind IN ('r', 'p')
+    AND c.relname NOT LIKE '\\_%'
+    AND (:pattern IS NULL OR c.relname ILIKE :pattern)
+"""
 
 @app.get("/api/python/tables")
-def list_tables():
-    """List all user-created tables with creator info"""
+def list_tables(search: str = None, limit: int = 200, offset: int = 0):
+    """List user-created tables with creator info (one query, paginated)"""
+    limit = max(1, min(limit, TABLES_MAX_LIMIT))
+    offset = max(0, offset)
+    cache_key = (search or "", limit, offset)
+    cached = _tables_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    from sqlalchemy import text
     try:
-        engine = create_engine(DB_URL)
+        engine = db.get_engine(DB_URL)
         with engine.connect() as conn:
-            # Get all tables
-            result = conn.execute(text("""
-                SELECT t.table_name 
-                FROM information_schema.tables t
-                WHERE t.table_schema = 'public' 
-                AND t.table_type = 'BASE TABLE'
-                AND t.table_name != '_table_metadata'
-                ORDER BY t.table_name
-            """))
-            table_names = [row[0] for row in result]
+            has_meta = conn.execute(text("SELECT to_regclass('public._table_metadata') IS NOT NULL")).scalar()
+            if has_meta:
+                join = "LEFT JOIN _table_metadata m ON m.table_name = c.relname"
+                meta_cols = "m.created_by_name, m.created_at, m.row_count, m.file_name"
+            else:
+                join = ""
+                meta_cols = "NULL, NULL, NULL, NULL"
             
-            # Get metadata for tables
-            tables_with_meta = []
-            for tbl in table_names:
-                meta = {"name": tbl, "createdBy": None, "createdAt": None, "rowCount": None}
-                try:
-                    meta_result = conn.execute(text("""
-                        SELECT created_by_name, created_at, row_count, file_name
-                        FROM _table_metadata WHERE table_name = :name
-                    """), {"name": tbl})
-                    row = meta_result.fetchone()
-                    if row:
-                        meta["createdBy"] = row[0]
-                        meta["createdAt"] = row[1].isoformat() if row[1] else None
-                        meta["rowCount"] = row[2]
-                        meta["fileName"] = row[3]
-                except:
-                    pass
-                tables_with_meta.append(meta)
-                
-        return {"success": True, "tables": tables_with_meta}
+            params = {
+                "pattern": f"%{search}%" if search else None,
+                "limit": limit,
+                "offset": offset,
+            }
+            base = TABLES_BASE_SQL.format(join=join)
+            # reltuples is the planner's estimate (-1 = never analyzed) - only used when metadata has no count
+            rows = conn.execute(text(f"""
+                SELECT c.relname, {meta_cols}, c.reltuples::bigint
+                {base}
+                ORDER BY c.relname
+                LIMIT :limit OFFSET :offset
+            """), params).fetchall()
+            total = conn.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+        
+        tables_with_meta = []
+        for name, created_by, created_at, row_count, file_name, estimate in rows:
+            estimated = row_count is None and estimate is not None and estimate >= 0
+            tables_with_meta.append({
+                "name": name,
+                "createdBy": created_by,
+                "createdAt": created_at.isoformat() if created_at else None,
+                "rowCount": row_count if row_count is not None else (estimate if estimated else None),
+                "rowCountEstimated": estimated,
+                "fileName": file_name,
+            })
+        
+        result = {"success": True, "tables": tables_with_meta, "total": total, "limit": limit, "offset": offset}
+        _tables_cache_put(cache_key, result)
+        return result
     except Exception as e:
         return {"success": False, "error": str(e), "tables": []}
 
+# Preview pages are keyed on ctid, the row's physical (page, item) address. Each page is read as
+# TID Range Scans over a bounded window of heap pages ("ctid > cursor AND ctid < window end"),
+# so ORDER BY ctid only sorts that window - no OFFSET re-reading earlier pages and no sort of
+# the whole table. Windows are sized from the table's rows per heap page and widened until
+# the limit is met or the end of the table is passed.
+PREVIEW_MAX_LIMIT = 5000
+PREVIEW_FETCH_ROWS = 500
+PREVIEW_ROWS_PER_PAGE = 50  # guess for tables that were never analyzed
+FIRST_CURSOR = "(0,0)"
+CTID_RE = re.compile(r"^\(\d+,\d+\)$")
+
+def _json_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+def _dumps(obj):
+    return json.dumps(obj, default=_json_default, allow_nan=False)
+
+def _row_count(conn, table_name, mode):
+    """Total rows for the preview header - exact COUNT(*), planner estimate, or skipped"""
+    from sqlalchemy import text
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return conn.execute(text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar()
+    # reltuples is kept fresh by ANALYZE after each load; -1 = never analyzed
+    estimate = conn.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": f'public."{table_name}"'}
+    ).scalar()
+    if estimate is not None and estimate >= 0:
+        return estimate
+    if conn.execute(text("SELECT to_regclass('public._table_metadata') IS NOT NULL")).scalar():
+        return conn.execute(
+            text("SELECT row_count FROM _table_metadata WHERE table_name = :name"), {"name": table_name}
+        ).scalar()
+    return None
+
+def _heap_pages(conn, table_name):
+    """(heap pages, estimated rows per page) of a table - no pages once it's gone"""
+    from sqlalchemy import text
+    row = conn.execute(text("""
+        SELECT pg_relation_size(oid) / current_setting('block_size')::int, reltuples, relpages
+        FROM pg_class WHERE oid = to_regclass(:name)
+    """), {"name": f'public."{table_name}"'}).first()
+    if row is None:
+        # Dropped or renamed since the endpoint looked it up - the stream just ends
+        return 0, float(PREVIEW_ROWS_PER_PAGE)
+    pages, reltuples, relpages = row
+    per_page = reltuples / relpages if relpages > 0 and reltuples > 0 else PREVIEW_ROWS_PER_PAGE
+    return pages, max(1.0, per_page)
+
+def _stream_rows(table_name, column_names, cursor, limit):
+    """(ctid, row dict) for one page in ctid order, read window by window after cursor"""
+    from sqlalchemy import text
+    cols = ", ".join(f'"{c}"' for c in column_names)
+    # The ctid output is aliased - ORDER BY ctid must sort on the tid, not its text form
+    sql = text(
+        f'SELECT ctid::text AS _cursor, {cols} FROM "{table_name}" '
+        f'WHERE ctid > CAST(:cursor AS tid) AND ctid < CAST(:end AS tid) ORDER BY ctid LIMIT :limit'
+    )
+    engine = db.get_engine(DB_URL)
+    with engine.connect() as conn:
+        pages, per_page = _heap_pages(conn, table_name)
+        page = int(cursor[1:].split(",")[0])
+        remaining = limit
+        while remaining > 0 and page < pages:
+            # A little slack so a sparse stretch of the table doesn't cost an extra round trip
+            end = page + max(1, math.ceil(remaining * 1.25 / per_page))
+            result = conn.execute(sql, {"cursor": cursor, "end": f"({end},0)", "limit": remaining})
+            for row in result:
+                remaining -= 1
+                yield row[0], {name: _json_value(value) for name, value in zip(column_names, row[1:])}
+            # Item numbers start at 1, so "(end,0)" as the lower bound takes in all of page end
+            page, cursor = end, f"({end},0)"
+
+def _json_body(header, rows, limit):
+    yield _dumps(header)[:-1] + ', "rows": ['
+    last_ctid, showing = None, 0
+    for last_ctid, row in rows:
+        yield ("," if showing else "") + _dumps(row)
+        showing += 1
+    trailer = {"showing": showing, "next_cursor": last_ctid if showing == limit else None}
+    yield "], " + _dumps(trailer)[1:]
+
+def _ndjson_body(header, rows, limit):
+    yield _dumps(header) + "\n"
+    last_ctid, showing = None, 0
+    for last_ctid, row in rows:
+        yield _dumps(row) + "\n"
+        showing += 1
+    yield _dumps({"showing": showing, "next_cursor": last_ctid if showing == limit else None}) + "\n"
+
 @app.get("/api/python/tables/{table_name}")
-def get_table_data(table_name: str, limit: int = 100):
-    """Get preview data from a specific table"""
+def get_table_data(
+    table_name: str,
+    limit: int = 100,
+    cursor: str = None,
+    columns: str = None,
+    count: str = "estimate",
+    format: str = "json"
+):
+    """Stream one page of a table, in physical (ctid) order.
+    cursor: next_cursor from the previous page - cursors are not stable across concurrent writes
+    (an upsert's UPDATE moves the row to a new ctid), so paging while a table is being loaded
+    can skip or repeat rows; columns: comma-separated projection;
+    count: estimate | exact | none; format: json (one object) | ndjson (header line, row lines, trailer line)"""
+    from sqlalchemy import text
     try:
         # Sanitize table name
         safe_name = sanitize_column_name(table_name)
         if not safe_name:
             return {"success": False, "error": "Invalid table name"}
+        if cursor and not CTID_RE.match(cursor):
+            return {"success": False, "error": "Invalid cursor"}
+        if count not in ("estimate", "exact", "none"):
+            return {"success": False, "error": "count must be estimate, exact or none"}
+        if format not in ("json", "ndjson"):
+            return {"success": False, "error": "format must be json or ndjson"}
+        limit = max(1, min(limit, PREVIEW_MAX_LIMIT))
         
-        engine = create_engine(DB_URL)
+        engine = db.get_engine(DB_URL)
         with engine.connect() as conn:
             # Get column names
             cols_result = conn.execute(text(f"""
                 SELECT column_name, data_type 
                 FROM information_schema.columns 
-                WHERE table_name = :table_name
+                WHERE table_schema = 'public' AND table_name = :table_name
                 ORDER BY ordinal_position
             """), {"table_name": safe_name})
-            columns = [{"name": row[0], "type": row[1]} for row in cols_result]
+            table_columns = [{"name": row[0], "type": row[1]} for row in cols_result]
+            if not table_columns:
+                return {"success": False, "error": f"Table '{safe_name}' not found"}
             
-            # Get data
-            data_result = conn.execute(text(f'SELECT * FROM "{safe_name}" LIMIT :limit'), {"limit": limit})
-            rows = [dict(row._mapping) for row in data_result]
+            if columns:
+                wanted = [c.strip() for c in columns.split(",") if c.strip()]
+                by_name = {c["name"]: c for c in table_columns}
+                unknown = [c for c in wanted if c not in by_name]
+                if unknown:
+                    return {"success": False, "error": f"Unknown columns: {', '.join(unknown)}"}
+                table_columns = [by_name[c] for c in dict.fromkeys(wanted)]
             
-            # Get row count
-            count_result = conn.execute(text(f'SELECT COUNT(*) FROM "{safe_name}"'))
-            total_rows = count_result.scalar()
+            total_rows = _row_count(conn, safe_name, count)
         
-        return {
+        header = {
             "success": True,
             "table_name": safe_name,
-            "columns": columns,
-            "rows": rows,
+            "columns": table_columns,
             "total_rows": total_rows,
-            "showing": min(limit, total_rows)
+            "count_mode": count,
+            "cursor": cursor,
         }
+        rows = _stream_rows(safe_name, [c["name"] for c in table_columns], cursor or FIRST_CURSOR, limit)
+        if format == "ndjson":
+            return StreamingResponse(_ndjson_body(header, rows, limit), media_type="application/x-ndjson")
+        return StreamingResponse(_json_body(header, rows, limit), media_type="application/json")
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+@app.post("/api/python/tables/{table_name}/query")
+def query_table(table_name: str, spec: dict = Body(...)):
+    """Filter / group / aggregate / sort a table in the database and return only the result rows.
+    Body: {"select", "filters": [{"column", "op", "value"}], "group_by", "aggregates": [{"fn", "column", "as"}],
+    "sort": [{"column", "desc"}], "limit"} - see query.build_query. Cached until the table is reloaded.
+    An invalid query is a 400."""
+    try:
+        safe_name = sanitize_column_name(table_name)
+        if not safe_name:
+            return JSONResponse(status_code=400, content={"success": False, "error": "Invalid table name"})
+        return query.run_query(db.get_engine(DB_URL), safe_name, spec)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.delete("/api/python/tables/{table_name}")
 def delete_table(table_name: str):
     """Delete a table"""
+    from sqlalchemy import text
     try:
         safe_name = sanitize_column_name(table_name)
-        engine = create_engine(DB_URL)
+        engine = db.get_engine(DB_URL)
         with engine.begin() as conn:
             conn.execute(text(f'DROP TABLE IF EXISTS "{safe_name}"'))
+        invalidate_tables_cache()
+        query.invalidate(safe_name)
         return {"success": True, "message": f"Table '{safe_name}' deleted"}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -237,3 +728,5 @@ try:
     handler = Mangum(app)
 except ImportError:
     handler = None
+
+MODULE_IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
@@ -0,0 +1,257 @@
+"""
+🔎 TABLE QUERIES
+Filter / group-by / aggregate / sort over an imported table, run by Postgres so dashboards get
+a handful of summary rows instead of raw pages. Every identifier in a query is put through
+sanitize_column_name and must be a column of the table; values are always bound parameters.
+Results are kept in a small LRU keyed on the table's version (its oid - replace loads swap in a
+new table - plus the load time in _table_metadata), so a reload never serves stale numbers.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from sqlalchemy import text
+
+try:
+    from .naming import sanitize_column_name
+except ImportError:
+    from naming import sanitize_column_name
+
+QUERY_MAX_LIMIT = 5000
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "128"))
+
+# Filter op -> SQL, with {col} and {param} filled in
+FILTER_OPS = {
+    "=": "{col} = {param}",
+    "!=": "{col} <> {param}",
+    "<": "{col} < {param}",
+    "<=": "{col} <= {param}",
+    ">": "{col} > {param}",
+    ">=": "{col} >= {param}",
+    "in": "{col} IN {param}",
+    "contains": "CAST({col} AS TEXT) ILIKE {param} ESCAPE '\\'",
+    "is_null": "{col} IS NULL",
+    "not_null": "{col} IS NOT NULL",
+}
+RANGE_OPS = ("<", "<=", ">", ">=")
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "numeric", "real", "double precision"}
+TEXT_TYPES = {"text", "character varying", "character"}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def invalidate(table_name=None):
+    """Drop cached results for one table (all tables when None)"""
+    with _cache_lock:
+        for key in [k for k in _cache if table_name is None or k[0] == table_name]:
+            del _cache[key]
+
+
+def _cache_get(key):
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+        return result
+
+
+def _cache_put(key, result):
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > QUERY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def table_version(conn, table_name):
+    """(oid, last load time) of a table, or None when it doesn't exist"""
+    row = conn.execute(text("""
+        SELECT to_regclass(:rel)::oid, to_regclass('public._table_metadata') IS NOT NULL
+    """), {"rel": f'public."{table_name}"'}).first()
+    if row is None or row[0] is None:
+        return None
+    loaded_at = None
+    if row[1]:
+        loaded_at = conn.execute(
+            text("SELECT created_at FROM _table_metadata WHERE table_name = :name"), {"name": table_name}
+        ).scalar()
+    return (row[0], loaded_at.isoformat() if loaded_at else None)
+
+
+def table_columns(conn, table_name):
+    """{column: Postgres data type}, in table order"""
+    rows = conn.execute(text("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = :table_name
+        ORDER BY ordinal_position
+    """), {"table_name": table_name})
+    return OrderedDict((name, data_type) for name, data_type in rows)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column(name, columns):
+    col = sanitize_column_name(name)
+    if col not in columns:
+        raise ValueError(f"Unknown column: {name}")
+    return col
+
+
+def _objects(spec, key):
+    """spec[key] as a list of JSON objects - anything else is a bad spec, not an AttributeError"""
+    items = spec.get(key) or []
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"'{key}' must be a list of objects")
+    return items
+
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def _bind(value, data_type):
+    # psycopg2 sends Python ints as integers - comparing those with a TEXT column fails
+    if data_type in TEXT_TYPES and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def build_query(table_name, columns, spec):
+    """(sql, params, output column names, row limit) for a query spec:
+    {"select": [col], "filters": [{"column", "op", "value"}], "group_by": [col],
+     "aggregates": [{"fn": count|sum|avg|min|max, "column": col (optional for count), "as": name}],
+     "sort": [{"column": col or aggregate name, "desc": bool}], "limit": n}
+    select is for plain row queries only. Range ops on text columns compare text (fine for
+    YYYY-MM-DD dates), so numeric values are refused there. Bad specs raise ValueError."""
+    if not isinstance(spec, dict):
+        raise ValueError("Query must be a JSON object")
+    params = {}
+
+    def param(value):
+        name = f"p{len(params)}"
+        params[name] = value
+        return f":{name}"
+
+    where = []
+    for f in _objects(spec, "filters"):
+        col = _column(f.get("column", ""), columns)
+        op = f.get("op", "=")
+        if op not in FILTER_OPS:
+            raise ValueError(f"op must be one of {', '.join(FILTER_OPS)}")
+        value = f.get("value")
+        if op in ("is_null", "not_null"):
+            placeholder = None
+        elif op == "in":
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"'in' on {col} needs a non-empty list of values")
+            placeholder = "(" + ", ".join(param(_bind(v, columns[col])) for v in value) + ")"
+        elif op == "contains":
+            escaped = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            placeholder = param(f"%{escaped}%")
+        elif value is None:
+            raise ValueError(f"'{op}' on {col} needs a value - use is_null / not_null for NULLs")
+        elif op in RANGE_OPS and columns[col] in TEXT_TYPES and _is_number(value):
+            # '9' > '10' in text order - a numeric range here would silently be wrong
+            raise ValueError(f"'{op}' on {col} would compare text, not numbers - {col} is {columns[col]}")
+        else:
+            placeholder = param(_bind(value, columns[col]))
+        where.append(FILTER_OPS[op].format(col=_quote(col), param=placeholder))
+
+    group_by = [_column(c, columns) for c in dict.fromkeys(spec.get("group_by") or [])]
+    aggregates = []
+    for agg in _objects(spec, "aggregates"):
+        fn = str(agg.get("fn", "")).lower()
+        if fn not in AGGREGATES:
+            raise ValueError(f"fn must be one of {', '.join(AGGREGATES)}")
+        col = _column(agg["column"], columns) if agg.get("column") else None
+        if col is None and fn != "count":
+            raise ValueError(f"{fn} needs a column")
+        if fn in ("sum", "avg") and columns[col] not in NUMERIC_TYPES:
+            raise ValueError(f"{fn} needs a numeric column - {col} is {columns[col]}")
+        alias = sanitize_column_name(agg.get("as") or (f"{fn}_{col}" if col else fn))
+        aggregates.append((f"{fn.upper()}({_quote(col) if col else '*'})", alias))
+
+    if group_by or aggregates:
+        if spec.get("select"):
+            raise ValueError("'select' can't be combined with group_by / aggregates - the output is the groups and aggregates")
+        outputs = [(_quote(c), c) for c in group_by] + aggregates
+    else:
+        select = [_column(c, columns) for c in dict.fromkeys(spec.get("select") or [])] or list(columns)
+        outputs = [(_quote(c), c) for c in select]
+    names = [name for _, name in outputs]
+    if len(set(names)) != len(names):
+        raise ValueError("Output column names must be unique - set 'as' on the aggregates")
+
+    order = []
+    for s in _objects(spec, "sort"):
+        name = sanitize_column_name(s.get("column", ""))
+        if name in names:
+            target = _quote(name)
+        elif not (group_by or aggregates) and name in columns:
+            target = _quote(name)
+        else:
+            raise ValueError(f"Can only sort on output columns: {', '.join(names)}")
+        order.append(f"{target} {'DESC' if s.get('desc') else 'ASC'}")
+
+    limit = max(1, min(int(spec.get("limit") or 1000), QUERY_MAX_LIMIT))
+    sql = "SELECT " + ", ".join(f"{expr} AS {_quote(name)}" for expr, name in outputs)
+    sql += f" FROM {_quote(table_name)}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if group_by:
+        sql += " GROUP BY " + ", ".join(_quote(c) for c in group_by)
+    if order:
+        sql += " ORDER BY " + ", ".join(order)
+    # One row past the limit tells us whether the result was cut off
+    sql += f" LIMIT {limit + 1}"
+    return sql, params, names, limit
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return value
+
+
+def run_query(engine, table_name, spec):
+    """Result dict for a query spec on table_name, from the cache when the table hasn't changed"""
+    with engine.connect() as conn:
+        version = table_version(conn, table_name)
+        if version is None:
+            raise ValueError(f"Table '{table_name}' not found")
+        key = (table_name, version, json.dumps(spec, sort_keys=True, default=str))
+        cached = _cache_get(key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        sql, params, names, limit = build_query(table_name, table_columns(conn, table_name), spec)
+        rows = conn.execute(text(sql), params).fetchall()
+    result = {
+        "success": True,
+        "table_name": table_name,
+        "columns": names,
+        "rows": [{name: _json_value(value) for name, value in zip(names, row)} for row in rows[:limit]],
+        "truncated": len(rows) > limit,
+        "version": {"oid": version[0], "loaded_at": version[1]},
+    }
+    _cache_put(key, result)
+    return dict(result, cached=False)
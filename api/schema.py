@@ -0,0 +1,187 @@
+"""
+📐 SCHEMA ENGINE
+Compiles a user-defined schema against a file's header once - every field is resolved to a
+source column through exact, normalized and fuzzy tiers with a confidence score - then
+applies the type conversions as whole-column operations and builds the output frame in one
+go. Values a conversion can't read are counted per field instead of failing silently.
+"""
+
+import difflib
+import re
+import numpy as np
+import pandas as pd
+
+TYPES = ("text", "number", "date", "email", "phone", "boolean")
+TRUE_VALUES = {'yes', 'true', '1', 'y'}
+FALSE_VALUES = {'no', 'false', '0', 'n'}
+FUZZY_MIN_CONFIDENCE = 0.6
+NORMALIZED_CONFIDENCE = 0.9
+
+
+def normalize(name):
+    """Header as compared by the normalized tier - case, spacing and punctuation ignored"""
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+def fuzzy_confidence(target, col):
+    """0-1 similarity of two normalized names - containment ('age' in 'student_age') scores high"""
+    if not target or not col:
+        return 0.0
+    ratio = difflib.SequenceMatcher(None, target, col).ratio()
+    if target in col or col in target:
+        shorter, longer = sorted((len(target), len(col)))
+        ratio = max(ratio, 0.6 + 0.4 * shorter / longer)
+    return ratio
+
+
+def _blank(values):
+    return values.astype(str).str.strip() == ''
+
+
+def _as_text(values):
+    """Values as text with whole floats written as integers (9876543210.0 -> '9876543210')"""
+    if values.dtype.kind == 'f':
+        whole = (values % 1 == 0) & (values.abs() < 2 ** 63)
+        values = values.astype(object)
+        values[whole] = values[whole].astype('int64')
+    return values.astype(str)
+
+
+# Converters see each distinct non-null value once -> (converted, could_not_convert)
+
+def to_number(values):
+    out = pd.to_numeric(values, errors='coerce')
+    return out.fillna(0), out.isna() & ~_blank(values)
+
+
+def to_date(values):
+    """Month first, as schema dates always were: '03/04/2024' is 4 March. (Auto-cleaned date
+    columns go through clean_dates, which reads it day first.) The column's inferred format
+    decides; values in some other format are then parsed one by one, still month first."""
+    text = values.astype(str).str.strip()
+    parsed = pd.to_datetime(text, errors='coerce')
+    rest = parsed.isna() & ~_blank(values)
+    if rest.any():
+        parsed[rest] = pd.to_datetime(text[rest], format='mixed', dayfirst=False, errors='coerce')
+    return parsed.dt.strftime('%Y-%m-%d').fillna(''), parsed.isna() & ~_blank(values)
+
+
+def to_email(values):
+    out = values.astype(str).str.lower().str.strip()
+    bad = ~(out.str.contains('@', regex=False) & out.str.contains('.', regex=False)) & ~_blank(values)
+    return out, bad
+
+
+def to_phone(values):
+    digits = _as_text(values).str.replace(r'\D', '', regex=True)
+    ok = digits.str.len() >= 10
+    formatted = '+91-' + digits.str[-10:-5] + '-' + digits.str[-5:]
+    return formatted.where(ok, values), ~ok & ~_blank(values)
+
+
+def to_boolean(values):
+    text = values.astype(str).str.strip().str.lower()
+    return text.isin(TRUE_VALUES), ~text.isin(TRUE_VALUES | FALSE_VALUES) & ~_blank(values)
+
+
+CONVERTERS = {
+    "number": to_number,
+    "date": to_date,
+    "email": to_email,
+    "phone": to_phone,
+    "boolean": to_boolean,
+}
+# What a missing cell becomes
+MISSING = {"number": 0, "date": '', "email": np.nan, "phone": np.nan, "boolean": False}
+
+
+def convert(s, ftype):
+    """(converted column as ndarray, count of values that couldn't be converted)"""
+    if ftype == "boolean" and s.dtype.kind in 'biuf':
+        return (s.fillna(0) != 0).to_numpy(), 0
+    if ftype == "date" and s.dtype.kind == 'M':
+        return s.dt.strftime('%Y-%m-%d').fillna('').to_numpy(), 0
+    codes, uniques = pd.factorize(s)
+    out, bad = CONVERTERS[ftype](pd.Series(uniques))
+    # code -1 (missing) takes the appended last slot
+    out = np.append(out.to_numpy(), MISSING[ftype])
+    bad = np.append(bad.to_numpy(dtype=bool), False)
+    return out.take(codes), int(bad.take(codes).sum())
+
+
+class CompiledSchema:
+    """A schema resolved against one header layout; apply() it to every chunk with that header"""
+
+    def __init__(self, schema, columns):
+        self.columns = list(columns)
+        self.fields = []
+        claimed = set()
+        by_name = {str(c): c for c in self.columns}
+        by_normal = {}
+        for c in self.columns:
+            by_normal.setdefault(normalize(c), c)
+
+        pending = []
+        for field in schema:
+            name = str(field.get('name', '')).strip()
+            if not name:
+                continue
+            ftype = field.get('type', 'text')
+            entry = {
+                "name": name,
+                "type": ftype if ftype in TYPES else "text",
+                "required": bool(field.get('required', False)),
+                "source": None,
+                "match": None,
+                "confidence": 0.0,
+            }
+            self.fields.append(entry)
+            # Exact and normalized tiers first - these win over any fuzzy guess
+            wanted = str(field.get('mapFrom') or '').strip()
+            for candidate in ([wanted] if wanted else []) + [name]:
+                if candidate in by_name:
+                    entry.update(source=by_name[candidate], match="exact", confidence=1.0)
+                    break
+                if normalize(candidate) in by_normal:
+                    entry.update(source=by_normal[normalize(candidate)], match="normalized",
+                                 confidence=NORMALIZED_CONFIDENCE)
+                    break
+            if entry["source"] is not None:
+                claimed.add(entry["source"])
+            else:
+                pending.append(entry)
+
+        # Fuzzy tier: best-scoring still unclaimed column per field
+        for entry in pending:
+            target = normalize(entry["name"])
+            scores = [(fuzzy_confidence(target, normalize(c)), i) for i, c in enumerate(self.columns)
+                      if c not in claimed]
+            if not scores:
+                continue
+            best, i = max(scores, key=lambda x: (x[0], -x[1]))
+            if best >= FUZZY_MIN_CONFIDENCE:
+                entry.update(source=self.columns[i], match="fuzzy", confidence=round(best, 2))
+                claimed.add(self.columns[i])
+
+    def apply(self, df):
+        """(frame with exactly the schema's fields, {field: values that failed conversion})"""
+        data, failures = {}, {}
+        for field in self.fields:
+            name, source = field["name"], field["source"]
+            if source is None or source not in df.columns:
+                data[name] = np.full(len(df), '', dtype=object)
+                failures[name] = 0
+                continue
+            s = df[source]
+            if field["type"] in CONVERTERS and not s.empty:
+                data[name], failures[name] = convert(s, field["type"])
+            else:
+                data[name] = s.to_numpy()
+                failures[name] = 0
+        return pd.DataFrame(data, index=df.index), failures
+
+    def report(self, failures):
+        """Fields with their resolved source, tier, confidence and failure counts (for stats)"""
+        return [dict(field, source=None if field["source"] is None else str(field["source"]),
+                     failures=failures.get(field["name"], 0))
+                for field in self.fields]
@@ -0,0 +1,220 @@
+"""
+🏭 PIPELINE WORKER POOL
+Runs the CPU-heavy cleaning pipeline off the event loop on a bounded executor, so one big
+Excel import can't stall health checks and table browsing. Admission is capped at
+workers + queue depth; past that callers get PipelineBusy (-> 429 with Retry-After).
+"""
+
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+try:
+    from .metrics import record_run
+except ImportError:
+    from metrics import record_run
+
+# thread: shares the warm DB pool, works everywhere (serverless has no /dev/shm for process pools)
+# process: true CPU parallelism - uploads are spilled to a temp file each worker reopens
+EXECUTOR = os.environ.get("PIPELINE_EXECUTOR", "thread").lower()
+WORKERS = int(os.environ.get("PIPELINE_WORKERS", "2"))
+MAX_QUEUE = int(os.environ.get("PIPELINE_MAX_QUEUE", "4"))
+SPILL_CHUNK_BYTES = 1024 * 1024
+
+_executor = None
+_thread_executor = None
+_running = 0
+_DONE = object()
+_stats = {"completed": 0, "failed": 0, "cancelled": 0, "rejected": 0, "seconds_avg": 0.0}
+
+
+class PipelineBusy(Exception):
+    """Every worker is busy and the queue is full"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Processing queue is full - retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _get_executor():
+    global _executor, EXECUTOR
+    if _executor is None:
+        if EXECUTOR == "process":
+            try:
+                _executor = ProcessPoolExecutor(max_workers=WORKERS, initializer=_init_worker)
+            except (OSError, NotImplementedError, ImportError):
+                # No working semaphores (e.g. AWS Lambda) - fall back to threads
+                EXECUTOR = "thread"
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="pipeline")
+    return _executor
+
+
+def _get_thread_executor():
+    global _thread_executor
+    executor = _get_executor()
+    if isinstance(executor, ThreadPoolExecutor):
+        return executor
+    if _thread_executor is None:
+        _thread_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="pipeline-stream")
+    return _thread_executor
+
+
+def _pipeline():
+    """process_file_and_load - imported on first use so loading this module doesn't pull in pandas"""
+    try:
+        from .processor import process_file_and_load
+    except ImportError:
+        from processor import process_file_and_load
+    return process_file_and_load
+
+
+def pipeline_cancelled():
+    """PipelineCancelled, imported on use for the same reason"""
+    try:
+        from .processor import PipelineCancelled
+    except ImportError:
+        from processor import PipelineCancelled
+    return PipelineCancelled
+
+
+def _init_worker():
+    try:
+        from .db import dispose_engines
+    except ImportError:
+        from db import dispose_engines
+    # Forked workers must open their own connections, not reuse the parent's
+    dispose_engines(close=False)
+
+
+def _retry_after():
+    """Seconds until a slot is likely free, from the average job time"""
+    waiting = _running - WORKERS + 1
+    return max(1, math.ceil(_stats["seconds_avg"] * waiting / WORKERS))
+
+
+def _process_path(path, filename, *args, **kwargs):
+    with open(path, "rb") as f:
+        return _pipeline()(f, filename, *args, **kwargs)
+
+
+def spill(stream, suffix=""):
+    """Copy an upload stream to a uniquely named temp file (process workers and background jobs
+    can't use the request's file object)"""
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        shutil.copyfileobj(stream, f, SPILL_CHUNK_BYTES)
+    return path
+
+
+def reserve():
+    """Claim a worker/queue slot up front (for work scheduled later) or raise PipelineBusy"""
+    global _running
+    if _running >= WORKERS + MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise PipelineBusy(_retry_after())
+    _running += 1
+
+
+def release():
+    global _running
+    _running -= 1
+
+
+async def run_pipeline(stream, filename, *args, reserved=False, **kwargs):
+    """process_file_and_load(stream, filename, ...) on the worker pool.
+    stream may also be a file path; reserved=True uses a slot taken earlier with reserve()."""
+    global _executor
+    if not reserved:
+        reserve()
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    path = None
+    start = time.perf_counter()
+    try:
+        if isinstance(executor, ProcessPoolExecutor):
+            # Engines don't pickle - each worker process uses its own shared engine
+            kwargs.pop("engine", None)
+        if isinstance(stream, str):
+            call = partial(_process_path, stream, filename, *args, **kwargs)
+        elif isinstance(executor, ProcessPoolExecutor):
+            path = await loop.run_in_executor(None, spill, stream, os.path.splitext(filename)[1])
+            call = partial(_process_path, path, filename, *args, **kwargs)
+        else:
+            call = partial(_pipeline(), stream, filename, *args, **kwargs)
+        result = await loop.run_in_executor(executor, call)
+        _stats["completed"] += 1
+        record_run(result.get("timings"), "success" if result.get("success") else "failed")
+        return result
+    except BrokenProcessPool:
+        _executor = None
+        _stats["failed"] += 1
+        record_run(None, "error")
+        raise
+    except Exception as e:
+        if isinstance(e, pipeline_cancelled()):
+            # Stopped on request (a job's cancel) - not a failure
+            _stats["cancelled"] += 1
+            record_run(None, "cancelled")
+            raise
+        _stats["failed"] += 1
+        record_run(None, "error")
+        raise
+    finally:
+        _finish(start)
+        if path:
+            os.remove(path)
+
+
+async def iterate_in_worker(make_iter):
+    """Async iterator over make_iter(), each step run on a pipeline thread - for streamed output.
+    Takes a slot like run_pipeline; generators can't cross processes, so this always uses threads."""
+    reserve()
+    loop = asyncio.get_running_loop()
+    executor = _get_thread_executor()
+    it = None
+    start = time.perf_counter()
+    try:
+        it = await loop.run_in_executor(executor, make_iter)
+        while True:
+            item = await loop.run_in_executor(executor, next, it, _DONE)
+            if item is _DONE:
+                break
+            yield item
+        _stats["completed"] += 1
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _finish(start)
+        if hasattr(it, "close"):
+            try:
+                it.close()
+            except ValueError:
+                # Still running in the worker thread (client went away mid-chunk) - it ends with that chunk
+                pass
+
+
+def _finish(start):
+    release()
+    elapsed = time.perf_counter() - start
+    _stats["seconds_avg"] = elapsed if not _stats["seconds_avg"] else 0.8 * _stats["seconds_avg"] + 0.2 * elapsed
+
+
+def worker_stats():
+    """Executor settings plus queue depth and job counters"""
+    return {
+        "executor": EXECUTOR,
+        "workers": WORKERS,
+        "max_queue": MAX_QUEUE,
+        "running": min(_running, WORKERS),
+        "queued": max(0, _running - WORKERS),
+        **_stats,
+    }
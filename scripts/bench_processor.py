@@ -0,0 +1,289 @@
+"""
+🏁 PROCESSOR BENCHMARK
+Generates synthetic messy student/fee spreadsheets (mixed date formats, dirty phones,
+currency strings, duplicates, blank rows) and times the cleaning pipeline on them:
+per-stage timings of process_file_and_load (whole file and streamed in chunks), plus the
+/api/python/upload and /api/python/download endpoints through FastAPI's TestClient against
+SQLite. Each case runs in a fresh process so its peak memory is its own.
+Results are written as JSON - pass an earlier file with --compare to see what changed.
+
+    python scripts/bench_processor.py                      # 10k + 100k rows
+    python scripts/bench_processor.py --rows 1000000 --cases pipeline,pipeline_chunked
+    python scripts/bench_processor.py --compare bench-results/processor-20261017-101500.json
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, "api")
+CASES = ("pipeline", "pipeline_chunked", "upload", "download")
+DEFAULT_ROWS = "10000,100000"
+MB = 1024 * 1024
+
+FIRST = ['rahul', 'priya', 'amit', 'sneha', 'arjun', 'kavya', 'rohan', 'ananya', 'vikram', 'meera',
+         'aditya', 'ishita', 'karan', 'pooja', 'siddharth', 'neha', "d'souza", 'anne-marie', 'mohammed', 'fatima']
+LAST = ['sharma', 'patel', 'verma', 'iyer', 'reddy', 'nair', 'gupta', 'singh', 'khan', 'das',
+        'menon', 'joshi', 'kulkarni', 'banerjee', 'fernandes', "o'brien", 'rao', 'pillai', 'shah', 'mehta']
+DOMAINS = ['gmail.com', 'yahoo.co.in', 'outlook.com', 'college.edu.in', 'hotmail.com']
+DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%m-%d-%Y', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d',
+                '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S']
+GENDERS = ['M', 'F', 'male', 'Female', ' MALE ', 'f', 'boy', 'girl', 'Other', 'O', '', 'unknown']
+REMARKS = ['Good', '  needs   improvement ', 'Fee pending..', '!!Excellent!!', '', 'transferred\tfrom  B',
+           'N/A', 'scholarship - 50%', 'late joiner', '  ']
+
+
+def _pick(rng, values, n, p=None):
+    return pd.Series(np.asarray(values, dtype=object)[rng.choice(len(values), n, p=p)])
+
+
+def _mask(rng, n, share):
+    return rng.random(n) < share
+
+
+def messy_students(rows, seed=0):
+    """DataFrame of about rows student/fee records with realistic mess - deterministic for a seed"""
+    rng = np.random.default_rng(seed)
+    n = rows
+
+    first, last = _pick(rng, FIRST, n), _pick(rng, LAST, n)
+    name = first + _pick(rng, [' ', '  ', ' '], n) + last
+    name = name.where(~_mask(rng, n, 0.2), name.str.upper())
+    name = name.where(~_mask(rng, n, 0.3), name.str.title())
+    name = name.where(~_mask(rng, n, 0.1), '  ' + name + ' ')
+
+    email = (first.str.replace("'", "", regex=False) + '.' + last + rng.integers(1, 999, n).astype(str)
+             + '@' + _pick(rng, DOMAINS, n))
+    email = email.where(~_mask(rng, n, 0.25), email.str.upper())
+    email = email.where(~_mask(rng, n, 0.1), ' ' + email + ' ')
+    email = email.where(~_mask(rng, n, 0.04), email.str.replace('@', ' at ', regex=False))
+    email = email.where(~_mask(rng, n, 0.05), '')
+
+    digits = pd.Series(rng.integers(6_000_000_000, 9_999_999_999, n).astype(str))
+    style = rng.choice(7, n, p=[0.3, 0.2, 0.15, 0.1, 0.1, 0.1, 0.05])
+    phone = digits.copy()
+    phone[style == 1] = '+91 ' + digits.str[:5] + ' ' + digits.str[5:]
+    phone[style == 2] = digits.str[:5] + '-' + digits.str[5:]
+    phone[style == 3] = '91' + digits
+    phone[style == 4] = '0091-' + digits
+    phone[style == 5] = '(' + digits.str[:3] + ') ' + digits.str[3:6] + ' ' + digits.str[6:]
+    phone[style == 6] = _pick(rng, ['12345', 'not given', '', 'NA'], int((style == 6).sum())).to_numpy()
+
+    born = pd.Series(pd.Timestamp('1998-01-01') + pd.to_timedelta(rng.integers(0, 9000, n), unit='D'))
+    fmt = rng.choice(len(DATE_FORMATS), n)
+    dob = pd.Series('', index=range(n), dtype=object)
+    for i, f in enumerate(DATE_FORMATS):
+        hit = fmt == i
+        dob[hit] = born[hit].dt.strftime(f)
+    dob[_mask(rng, n, 0.03)] = ''
+    dob[_mask(rng, n, 0.01)] = 'unknown'
+
+    value = pd.Series(rng.integers(50_000, 15_000_000, n) / 100)
+    style = rng.choice(6, n, p=[0.3, 0.2, 0.15, 0.15, 0.1, 0.1])
+    fee = value.round(2).astype(str).astype(object)
+    fee[style == 1] = '₹' + value[style == 1].map('{:,.2f}'.format)
+    fee[style == 2] = 'Rs. ' + value[style == 2].round().astype(int).astype(str)
+    fee[style == 3] = '$ ' + value[style == 3].map('{:,.0f}'.format)
+    fee[style == 4] = '(' + value[style == 4].map('{:,.2f}'.format) + ')'
+    fee[style == 5] = _pick(rng, ['', 'waived', '-', ' '], int((style == 5).sum())).to_numpy()
+
+    df = pd.DataFrame({
+        'Student Name': name,
+        'Email ID': email,
+        'Mobile No': phone,
+        'Date of Birth': dob,
+        'Fee Amount': fee,
+        'Gender': _pick(rng, GENDERS, n),
+        'Remarks': _pick(rng, REMARKS, n),
+        'Roll No': rng.permutation(n) + 1000,
+        'Total Paid': np.where(_mask(rng, n, 0.1), np.nan, value.round(0)),
+    })
+
+    # ~2% exact duplicate rows and ~3% blank rows, shuffled in
+    dupes = df.iloc[rng.choice(n, n // 50, replace=False)]
+    blanks = pd.DataFrame(np.nan, index=range(n * 3 // 100), columns=df.columns)
+    df = pd.concat([df, dupes, blanks], ignore_index=True)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+# === CASES (each runs in its own spawned process) ===
+
+def _case_env(workdir):
+    os.environ["DATABASE_URL_DATA_PIPELINE"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    # Measure the real work, not cache hits
+    os.environ["RESULT_CACHE_MB"] = "0"
+    os.environ.setdefault("PIPELINE_EXECUTOR", "thread")
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import warnings
+    warnings.filterwarnings("ignore")
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_case(case, path, workdir, table):
+    _case_env(workdir)
+    with open(path, "rb") as f:
+        data = f.read()
+    result = {}
+
+    if case in ("pipeline", "pipeline_chunked"):
+        import processor
+        chunksize = processor.CHUNK_ROWS if case == "pipeline_chunked" else None
+        base_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        out = processor.process_file_and_load(io.BytesIO(data), "students.csv", table, None,
+                                              return_file=True, chunksize=chunksize)
+        seconds = time.perf_counter() - start
+        result.update(success=out["success"], errors=out.get("errors"),
+                      rows_out=out.get("stats", {}).get("rows_after"), stages=out.get("timings"))
+    else:
+        from fastapi.testclient import TestClient
+        import python as app
+        client = TestClient(app.app)
+        base_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        files = {"file": ("students.csv", data, "text/csv")}
+        if case == "upload":
+            response = client.post("/api/python/upload", files=files, data={"table_name": table})
+            body = response.json()
+            result.update(success=body.get("success"), errors=body.get("errors"), rows_out=body.get("rowCount"),
+                          stages=body.get("timings"))
+        else:
+            response = client.post("/api/python/download", files=files)
+            ok = response.status_code == 200 and response.headers.get("content-type", "").startswith("text/csv")
+            result.update(success=ok, errors=None if ok else [response.text[:300]], bytes_out=len(response.content))
+        seconds = time.perf_counter() - start
+
+    result.update(seconds=round(seconds, 4), peak_rss_mb=round(_peak_rss_mb(), 1),
+                  rss_growth_mb=round(_peak_rss_mb() - base_rss, 1))
+    return result
+
+
+def run_case(case, path, workdir, table):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(_run_case, (case, path, workdir, table))
+
+
+# === REPORTING ===
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def transformer_version():
+    sys.path.insert(0, API_DIR)
+    try:
+        import processor
+        return processor.TRANSFORMER_VERSION
+    except Exception:
+        return None
+    finally:
+        sys.path.remove(API_DIR)
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["rows"], r["case"]): r for r in json.load(f)["results"]}
+    print(f"\n📊 vs {baseline_path}")
+    print(f"{'rows':>9}  {'case':<17}{'before s':>10}{'after s':>10}{'change':>9}{'peak MB':>16}")
+    for r in results:
+        old = baseline.get((r["rows"], r["case"]))
+        if old is None or not old.get("seconds") or not r.get("seconds"):
+            continue
+        change = (r["seconds"] / old["seconds"] - 1) * 100
+        memory = f"{old.get('peak_rss_mb', 0):.0f} → {r.get('peak_rss_mb', 0):.0f}"
+        print(f"{r['rows']:>9}  {r['case']:<17}{old['seconds']:>10.3f}{r['seconds']:>10.3f}{change:>+8.1f}%{memory:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning pipeline on synthetic messy data")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="comma-separated dataset sizes (default %(default)s)")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated subset of " + ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case - the median is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="JSON output path (default bench-results/processor-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(r) for r in args.rows.split(",") if r.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+
+    stamp = datetime.now(timezone.utc)
+    out_path = args.out or os.path.join(ROOT, "bench-results", f"processor-{stamp:%Y%m%d-%H%M%S}.json")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-processor-") as workdir:
+        for rows in sizes:
+            started = time.perf_counter()
+            df = messy_students(rows, args.seed)
+            path = os.path.join(workdir, f"students-{rows}.csv")
+            df.to_csv(path, index=False)
+            size_mb = os.path.getsize(path) / MB
+            print(f"🧪 {rows:,} rows → {len(df):,} with duplicates/blanks, {size_mb:.1f} MB "
+                  f"(generated in {time.perf_counter() - started:.1f}s)")
+            del df
+
+            for case in cases:
+                runs = [run_case(case, path, workdir, f"bench_{rows}_{i}") for i in range(args.repeat)]
+                seconds = statistics.median(r["seconds"] for r in runs)
+                # Stage breakdown and memory of the median-ish run
+                run = min(runs, key=lambda r: abs(r["seconds"] - seconds))
+                entry = dict(run, rows=rows, case=case, input_rows=rows + rows // 50 + rows * 3 // 100,
+                             input_mb=round(size_mb, 2), seconds=round(seconds, 4),
+                             runs=[r["seconds"] for r in runs])
+                entry["rows_per_sec"] = round(entry["input_rows"] / seconds) if seconds else None
+                results.append(entry)
+                status = "✅" if run["success"] else f"❌ {(run.get('errors') or ['?'])[0][:120]}"
+                print(f"  {case:<17}{seconds:>8.2f}s  {entry['rows_per_sec'] or 0:>9,} rows/s  "
+                      f"peak {run['peak_rss_mb']:>7.1f} MB  {status}")
+
+    report = {
+        "meta": {
+            "timestamp": stamp.isoformat(),
+            "git_commit": git_commit(),
+            "transformer_version": transformer_version(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"💾 Results written to {out_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("postgresql"), reason="needs TEST_DATABASE_URL for PostgreSQL"
+)
+
+
+@pytest.fixture
+def pg_tables():
+    """(db_url, new_table_name()) - every table named through it is dropped afterwards"""
+    from sqlalchemy import create_engine
+    names = []
+
+    def new_table_name(prefix="t"):
+        names.append(f"test_{prefix}_{uuid.uuid4().hex[:8]}")
+        return names[-1]
+
+    yield TEST_DATABASE_URL, new_table_name
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        for name in names:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}"')
+    engine.dispose()
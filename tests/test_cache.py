@@ -0,0 +1,64 @@
+"""
+🧪 Result cache: Parquet round trip and the private-directory checks
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from cache import ResultCache  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "results"), max_bytes=10 ** 8)
+
+
+def frame():
+    return pd.DataFrame({
+        "student_name": pd.Categorical(["Asha", "Ravi", "Asha"]),
+        "roll_no": [1.0, np.nan, 3.0],
+        "fee_amount": [100.0, 0.0, 250.5],
+        "remarks": ["", "late", None],
+    }, index=[4, 7, 9])
+
+
+def test_frames_round_trip_with_dtypes_and_index(cache):
+    df = frame()
+    cache.put("k", [df, df.iloc[:1]], {"rows": 4})
+    hit = cache.get("k")
+    assert hit.meta["chunks"] == 2 and hit.meta["format"] == "parquet"
+    parts = list(hit.frames())
+    pd.testing.assert_frame_equal(parts[0], df)
+    pd.testing.assert_frame_equal(parts[1], df.iloc[:1])
+    assert not any(name.endswith(".pkl") for name in os.listdir(hit.path))
+
+
+def test_directory_is_private(cache):
+    cache.put("k", [frame()], {})
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+
+
+def test_group_writable_directory_is_not_used(cache):
+    cache.put("k", [frame()], {})
+    os.chmod(cache.directory, 0o777)
+    assert cache.get("k") is None
+    assert cache.writer("k2") is None
+
+
+def test_entries_in_another_format_are_ignored(cache):
+    os.makedirs(os.path.join(cache.directory, "old"), mode=0o700)
+    with open(os.path.join(cache.directory, "old", "meta.json"), "w") as f:
+        json.dump({"chunks": 1, "bytes": 1}, f)
+    assert cache.get("old") is None
+
+
+def test_frames_arrow_cant_store_are_not_cached(cache):
+    cache.put("k", [pd.DataFrame({"mixed": [1, "x", 2.5]})], {})
+    assert cache.get("k") is None
+    assert os.listdir(cache.directory) == []
@@ -0,0 +1,71 @@
+"""
+🧪 Compact dtypes: categorical / Arrow-string text after cleaning, blanks filled only when writing
+"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import requires_postgres
+from loader import replace_table
+from processor import compact_dtypes, magic_transform, string_dtype
+
+
+def test_text_columns_are_compacted():
+    df = pd.DataFrame({
+        "gender": ["Male", "Female", None, "Male", "Female", "Male"],
+        "name": ["Asha", "Ravi", "Meena", None, "Kiran", "Dev"],
+        "mixed": ["a", 1, "b", "a", "b", "a"],
+        "fee": [1.0, np.nan, 3.0, 4.0, 5.0, 6.0],
+    })
+    out = compact_dtypes(df.copy())
+    assert isinstance(out["gender"].dtype, pd.CategoricalDtype)
+    assert sorted(out["gender"].cat.categories) == ["Female", "Male"]
+    assert out["name"].dtype == (string_dtype() or object)
+    assert out["mixed"].dtype == object and out["fee"].dtype == np.float64
+    # Missing stays missing - nothing is filled with '' yet
+    assert out["gender"].isna().tolist() == df["gender"].isna().tolist()
+    assert out["name"].isna().tolist() == df["name"].isna().tolist()
+    assert out["name"].dropna().tolist() == ["Asha", "Ravi", "Meena", "Kiran", "Dev"]
+
+
+def test_cleaned_frame_is_smaller_than_object_columns():
+    n = 3000
+    df = pd.DataFrame({
+        "Student Name": [f"student {i}" for i in range(n)],
+        "Gender": ["m", "f", "F"] * (n // 3),
+        "Class": ["10-A", "10-B", "9-C"] * (n // 3),
+        "Fee Amount": ["1,200", "950", ""] * (n // 3),
+    })
+    out, _ = magic_transform(df, [])
+    assert isinstance(out["gender"].dtype, pd.CategoricalDtype)
+    assert isinstance(out["class"].dtype, pd.CategoricalDtype)
+    assert out["fee_amount"].dtype.kind == "f"
+    as_objects = out.astype(object).memory_usage(deep=True).sum()
+    assert out.memory_usage(deep=True).sum() < as_objects / 2
+
+
+@requires_postgres
+def test_blanks_are_filled_when_written(pg_tables):
+    from db import get_engine
+    db_url, new_table = pg_tables
+    table = new_table("compact")
+    df = compact_dtypes(pd.DataFrame({
+        "gender": pd.Series(["Male", None, "Female", "Male"], dtype=object),
+        "name": pd.Series(["Asha", "Ravi", None, "Dev"], dtype=object),
+        "roll_no": [1, 2, 3, 4],
+        "fee": [1.5, np.nan, 2.5, 3.0],
+    }))
+    with get_engine(db_url).begin() as conn:
+        replace_table(conn, table, df)
+    with get_engine(db_url).connect() as conn:
+        out = pd.read_sql(f'SELECT * FROM "{table}" ORDER BY roll_no', conn)
+    # Text columns hold '' for missing values, as cleaned tables always have
+    assert out["gender"].tolist() == ["Male", "", "Female", "Male"]
+    assert out["name"].tolist() == ["Asha", "Ravi", "", "Dev"]
+    # The frame itself was not filled in place
+    assert df["gender"].isna().sum() == 1 and df["name"].isna().sum() == 1
+
+
+def test_download_writes_blanks_as_empty_fields():
+    df = compact_dtypes(pd.DataFrame({"gender": ["Male", None, "Male"], "fee": [1.0, np.nan, 2.0]}))
+    assert df.to_csv(index=False) == "gender,fee\nMale,1.0\n,\nMale,2.0\n"
@@ -0,0 +1,101 @@
+"""
+🧪 clean_dates vs the per-cell date rules it replaced
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dates
+from dates import DATE_FORMATS, clean_dates
+
+# pandas' dayfirst parser warns about every value the fallback rule sees
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+
+def fix_date(val):
+    """The original magic_transform date cleaner"""
+    if pd.isna(val) or str(val).strip() == '':
+        return ''
+    val_str = str(val).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(val_str, fmt).strftime('%Y-%m-%d')
+        except:  # noqa: E722 - as in the original
+            continue
+    try:
+        return pd.to_datetime(val_str, dayfirst=True).strftime('%Y-%m-%d')
+    except:  # noqa: E722
+        return val_str
+
+
+ODD = [
+    None, np.nan, '', '  ', 'garbage', '31/02/2024', '0999-01-01', '2024-1-5', '1/2/2024', '3-4-2024',
+    '03/04/2024', '20240115', '13/13/2024', '15 JAN 2024', '1 may 2020', '0001-01-01', '2300-01-01',
+    ' 2024-01-15 ', '2024-01-15 10:30:00', 'Mar 3 2021', 45000, 20240101.0,
+]
+
+
+def date_column(main, seed, n=3000):
+    rng = random.Random(seed)
+    values = []
+    for _ in range(n):
+        day = date(1950, 1, 1) + timedelta(days=rng.randint(0, 30000))
+        roll = rng.random()
+        if roll < 0.85:
+            values.append(day.strftime(main))
+        elif roll < 0.95:
+            values.append(day.strftime(rng.choice(DATE_FORMATS)))
+        else:
+            values.append(rng.choice(ODD))
+    return pd.Series(values, dtype=object)
+
+
+COLUMNS = [pd.Series(ODD, dtype=object)] + [
+    date_column(main, seed) for seed, main in enumerate(['%d/%m/%Y', '%m/%d/%Y', '%d %b %Y', '%Y-%m-%d', '%B %d, %Y'])
+]
+
+
+def check_against_fix_date(s):
+    expected = s.apply(fix_date)
+    out, changed, report = clean_dates(s)
+    assert out.tolist() == expected.tolist()
+    assert changed == int((s.astype(str) != expected.astype(str)).sum())
+    assert sum(report["formats"].values()) + report["fallback"] + report["unparsed"] == int(
+        (s.notna() & (s.astype(str).str.strip() != '')).sum())
+
+
+@pytest.mark.parametrize("s", COLUMNS)
+def test_clean_dates_matches_fix_date(s):
+    check_against_fix_date(s)
+
+
+@pytest.mark.parametrize("s", COLUMNS)
+def test_clean_dates_without_strptime_regex_cache(s, monkeypatch):
+    # The private _strptime regex may go away - the strptime fallback must give the same output
+    monkeypatch.setattr(dates, "format_matcher", dates._strptime_accepts)
+    dates.parse_date_slow.cache_clear()
+    check_against_fix_date(s)
+
+
+def test_format_matcher_agrees_with_strptime():
+    values = ['03/04/2024', '31/02/2024', '3/4/24', 'x', '15 Jan 2024', '2024-01-15']
+    for fmt in DATE_FORMATS:
+        fast, slow = dates.format_matcher(fmt), dates._strptime_accepts(fmt)
+        for v in values:
+            # The regex only checks the shape, so it may accept impossible dates strptime refuses
+            assert fast(v) or not slow(v)
+
+
+def test_day_first_wins_for_ambiguous_dates():
+    out, _, report = clean_dates(pd.Series(['03/04/2024'] * 10))
+    assert out.tolist() == ['2024-04-03'] * 10
+    assert report["formats"] == {'%d/%m/%Y': 10}
+
+
+def test_empty_column():
+    out, changed, report = clean_dates(pd.Series([], dtype=object))
+    assert out.empty and changed == 0 and report == {}
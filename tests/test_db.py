@@ -0,0 +1,73 @@
+"""
+🧪 Shared pooled engine: one per URL, connections reused, pool limits and pre-ping
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import db
+from conftest import TEST_DATABASE_URL, requires_postgres
+
+pytestmark = requires_postgres
+
+
+@pytest.fixture
+def fresh_engines():
+    db.dispose_engines()
+    yield
+    db.dispose_engines()
+
+
+def test_one_engine_per_url(fresh_engines):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        engines = set(pool.map(lambda _: db.get_engine(TEST_DATABASE_URL), range(32)))
+    assert len(engines) == 1
+    engine = engines.pop()
+    assert engine.pool.size() == db.POOL_SIZE
+    assert engine.pool._recycle == db.POOL_RECYCLE
+    assert engine.pool._pre_ping == db.POOL_PRE_PING
+    assert db.get_engine("sqlite://") is not engine
+
+
+def test_connections_are_reused(fresh_engines):
+    before = db.pool_metrics()
+    engine = db.get_engine(TEST_DATABASE_URL)
+    pids = set()
+    for _ in range(5):
+        with engine.connect() as conn:
+            pids.add(conn.exec_driver_sql("SELECT pg_backend_pid()").scalar())
+    after = db.pool_metrics()
+    assert len(pids) == 1
+    assert after["connects"] - before["connects"] == 1
+    assert after["checkouts"] - before["checkouts"] == 5
+    assert after["pools"] == [{"dialect": "postgresql", "size": db.POOL_SIZE, "checked_out": 0,
+                               "checked_in": 1, "overflow": 1 - db.POOL_SIZE}]
+
+
+def test_full_pool_times_out(fresh_engines, monkeypatch):
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    monkeypatch.setattr(db, "POOL_SIZE", 1)
+    monkeypatch.setattr(db, "POOL_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(db, "POOL_TIMEOUT", 0.1)
+    engine = db.get_engine(TEST_DATABASE_URL)
+    before = db.pool_metrics()["timeouts"]
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    assert db.pool_metrics()["timeouts"] == before + 1
+
+
+def test_pre_ping_replaces_a_dropped_connection(fresh_engines, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+    monkeypatch.setattr(db, "POOL_PRE_PING", True)
+    engine = db.get_engine(TEST_DATABASE_URL)
+    with engine.connect() as conn:
+        pid = conn.exec_driver_sql("SELECT pg_backend_pid()").scalar()
+    # The server (or pgbouncer) closes the idle pooled connection
+    admin = create_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    with admin.connect() as other:
+        other.exec_driver_sql("SELECT pg_terminate_backend(%s)", (pid,))
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT pg_backend_pid()").scalar() != pid
@@ -0,0 +1,70 @@
+"""
+🧪 Second dedup pass: normalized exact matches, fuzzy name matches and the counts behind the cluster report
+"""
+
+import pandas as pd
+
+import dedup
+from dedup import NearDuplicateFinder
+from processor import drop_near_duplicates
+
+KINDS = {"student_name": "name", "mobile_no": "phone", "email_id": "email"}
+COLS = ["student_name", "mobile_no", "email_id"]
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLS)
+
+
+def test_normalized_values_match_exactly():
+    df = frame([
+        ["Rahul Sharma", "+91-98765-43210", "rahul@x.in"],
+        ["rahul  SHARMA", "9876543210", " Rahul@X.in"],
+        ["Priya Patel", "9876500000", "priya@x.in"],
+    ])
+    drop, clusters, fuzzy = NearDuplicateFinder(fuzzy=False).find(df, COLS, KINDS)
+    assert drop.tolist() == [False, True, False]
+    assert fuzzy == 0
+    assert len(clusters) == 1
+    assert clusters[0]["match"] == "normalized" and clusters[0]["merged"] == 1
+    assert clusters[0]["examples"] == [{"student_name": "rahul  SHARMA", "mobile_no": "9876543210", "email_id": " Rahul@X.in"}]
+
+
+def test_matches_span_chunks():
+    finder = NearDuplicateFinder(fuzzy=False)
+    finder.find(frame([["Rahul Sharma", "9876543210", "rahul@x.in"]]), COLS, KINDS)
+    drop, _, _ = finder.find(frame([["RAHUL SHARMA", "98765 43210", "rahul@x.in"], ["Asha", "", ""]]), COLS, KINDS)
+    assert drop.tolist() == [True, False]
+
+
+def test_similar_names_merge_only_in_fuzzy_mode():
+    df = frame([
+        ["Rahul Sharma", "9876543210", "rahul@x.in"],
+        ["Rahul Sharmaa", "9876543210", "rahul@x.in"],
+        ["Rahul Sharmaa", "9000000000", "rahul@x.in"],
+    ])
+    drop, _, fuzzy = NearDuplicateFinder(fuzzy=False).find(df, COLS, KINDS)
+    assert not drop.any() and fuzzy == 0
+    drop, clusters, fuzzy = NearDuplicateFinder(fuzzy=True).find(df, COLS, KINDS)
+    # Another phone is another block - never compared
+    assert drop.tolist() == [False, True, False]
+    assert fuzzy == 1
+    assert clusters[0]["match"] == "fuzzy" and clusters[0]["similarity"] < 1.0
+
+
+def test_fuzzy_count_covers_clusters_beyond_the_report_limit(monkeypatch):
+    monkeypatch.setattr(dedup, "CLUSTER_REPORT_LIMIT", 1)
+    df = frame([
+        ["Rahul Sharma", "9876543210", ""],
+        ["Rahul Sharmaa", "9876543210", ""],
+        ["Priya Patel", "9876500000", ""],
+        ["Priya Patell", "9876500000", ""],
+        ["Priya Patel", "9876500000", ""],
+    ])
+    changes, logs = {}, []
+    plan = [{"column": col, "kind": kind} for col, kind in KINDS.items()]
+    out = drop_near_duplicates(df, plan, changes, logs, NearDuplicateFinder(fuzzy=True))
+    assert out["student_name"].tolist() == ["Rahul Sharma", "Priya Patel"]
+    assert changes["near_duplicates"] == 3
+    assert len(changes["duplicate_clusters"]) == 1
+    assert logs == ["♻️ Removed 3 more duplicates once values were normalized (2 by similar names)"]
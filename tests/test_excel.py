@@ -0,0 +1,97 @@
+"""
+🧪 Excel reader: batched .xlsx reads with sheet / header-row selection, same frames as pd.read_excel
+"""
+
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from conftest import requires_postgres
+from excel import iter_excel, sheet_names
+from processor import NA_VALUES, process_file_and_load, read_table
+
+pytest.importorskip("openpyxl")
+
+
+def workbook():
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Intro"
+    ws.append(["Report generated"])
+    ws.append([])
+    ws.append(["Name", "Score", "When", "Code"])
+    ws.append(["a", 1, datetime(2024, 1, 2), "007"])
+    ws.append(["b", "N/A", None, "#N/A"])
+    ws.append([])
+    ws.append(["c", 4, "2024-01-05", "12"])
+    data = wb.create_sheet("Data")
+    data.append(["Export of 2024"])
+    data.append(["Roll No", "Student Name", "Fee Amount"])
+    for i in range(1, 11):
+        data.append([i, f"student {i}", 100 + i / 2])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def xlsx():
+    return workbook()
+
+
+@pytest.mark.parametrize("options, pandas_options", [
+    ({}, {}),
+    ({"header_row": 3}, {"header": 2}),
+    ({"sheet": "Data", "header_row": 2}, {"sheet_name": "Data", "header": 1}),
+    ({"sheet": 1, "header_row": 2}, {"sheet_name": 1, "header": 1}),
+])
+def test_sheet_and_header_row_match_read_excel(xlsx, options, pandas_options):
+    out = read_table(io.BytesIO(xlsx), "f.xlsx", **options)
+    pd.testing.assert_frame_equal(out, pd.read_excel(io.BytesIO(xlsx), na_values=NA_VALUES, **pandas_options))
+
+
+def test_batches_add_up_to_the_sheet(xlsx):
+    whole = read_table(io.BytesIO(xlsx), "f.xlsx", sheet="Data", header_row=2)
+    batches = list(read_table(io.BytesIO(xlsx), "f.xlsx", chunksize=4, sheet="Data", header_row=2))
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert all(b.columns.tolist() == ["Roll No", "Student Name", "Fee Amount"] for b in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), whole)
+
+
+def test_blank_rows_inside_the_data_are_kept(xlsx):
+    frames = list(iter_excel(io.BytesIO(xlsx), header_row=3, batch_rows=2, na_values=NA_VALUES))
+    # The blank row between b and c is a row, like pd.read_excel reads it
+    assert [len(f) for f in frames] == [2, 2]
+    names = pd.concat(frames, ignore_index=True)["Name"]
+    assert names.isna().tolist() == [False, False, True, False]
+    assert names.dropna().tolist() == ["a", "b", "c"]
+
+
+def test_sheet_names_and_bad_selections(xlsx):
+    assert sheet_names(io.BytesIO(xlsx)) == ["Intro", "Data"]
+    with pytest.raises(ValueError, match="Sheet 'Nope' not found"):
+        read_table(io.BytesIO(xlsx), "f.xlsx", sheet="Nope")
+    with pytest.raises(ValueError, match="Sheet 5 not found"):
+        read_table(io.BytesIO(xlsx), "f.xlsx", sheet=5)
+    with pytest.raises(ValueError, match="Header row is empty"):
+        read_table(io.BytesIO(xlsx), "f.xlsx", header_row=2)
+
+
+@requires_postgres
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_chunked_xlsx_load(xlsx, pg_tables):
+    from db import get_engine
+    db_url, new_table = pg_tables
+    table = new_table("xlsx")
+    result = process_file_and_load(io.BytesIO(xlsx), "f.xlsx", table, db_url, chunksize=3,
+                                   read_options={"sheet": "Data", "header_row": 2})
+    assert result["success"], result.get("errors")
+    assert result["chunks"] == 4 and result["rowCount"] == 10
+    with get_engine(db_url).connect() as conn:
+        df = pd.read_sql(f'SELECT * FROM "{table}" ORDER BY roll_no', conn)
+    assert df.columns.tolist() == ["roll_no", "student_name", "fee_amount"]
+    assert df["student_name"].tolist()[:2] == ["Student 1", "Student 2"]
+    assert df["fee_amount"].tolist()[-1] == 105.0
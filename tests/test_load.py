@@ -0,0 +1,130 @@
+"""
+🧪 Chunked uploads into PostgreSQL: COPY into a staging table, then the swap
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from conftest import requires_postgres
+from loader import replace_table
+from processor import PipelineCancelled, process_file_and_load
+
+pytestmark = [requires_postgres, pytest.mark.filterwarnings("ignore::UserWarning")]
+
+
+def csv_upload(lines):
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def read_table(db_url, table):
+    from db import get_engine
+    with get_engine(db_url).connect() as conn:
+        return pd.read_sql(f'SELECT * FROM "{table}"', conn)
+
+
+def column_types(db_url, table):
+    from db import get_engine
+    with get_engine(db_url).connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = %s", (table,)
+        ).fetchall()
+    return dict(rows)
+
+
+def test_late_blank_in_integer_column(pg_tables):
+    db_url, new_table = pg_tables
+    table = new_table("late_blank")
+    lines = ["roll_no,age,city"] + [f"{i},{'' if i == 12 else 20 + i},City {i}" for i in range(1, 16)]
+    result = process_file_and_load(csv_upload(lines), "s.csv", table, db_url, chunksize=5)
+    assert result["success"], result.get("errors")
+    df = read_table(db_url, table).sort_values("roll_no")
+    assert column_types(db_url, table)["age"] == "bigint"
+    ages = dict(zip(df["roll_no"], df["age"]))
+    assert pd.isna(ages[12])
+    assert ages[11] == 31 and ages[13] == 33
+
+
+def roster(rows=30):
+    lines = ["Roll No,Student Name,Mobile No,Fee Amount,City"]
+    for i in range(1, rows + 1):
+        lines.append(f"{i},student {i},98765{i:05d},{100 + i}.5,  City {i % 4}")
+    # Row 3 again near the end, in another chunk - and with different spacing/case
+    lines.append("3,STUDENT  3,98765-00003,103.5,City 3")
+    return lines
+
+
+def test_chunked_load_matches_whole_file_load(pg_tables):
+    db_url, new_table = pg_tables
+    whole, chunked = new_table("whole"), new_table("chunked")
+    expected = process_file_and_load(csv_upload(roster()), "s.csv", whole, db_url)
+    result = process_file_and_load(csv_upload(roster()), "s.csv", chunked, db_url, chunksize=10)
+    assert result["success"], result.get("errors")
+    assert result["chunks"] == 4
+    assert result["rowCount"] == expected["rowCount"] == 30
+    assert result["stats"]["near_duplicates"] == expected["stats"]["near_duplicates"] == 1
+    assert column_types(db_url, chunked) == column_types(db_url, whole)
+    pd.testing.assert_frame_equal(read_table(db_url, chunked).sort_values("roll_no", ignore_index=True),
+                                  read_table(db_url, whole).sort_values("roll_no", ignore_index=True))
+
+
+def test_chunked_dry_run_writes_nothing(pg_tables):
+    db_url, new_table = pg_tables
+    table = new_table("dry")
+    result = process_file_and_load(csv_upload(roster()), "s.csv", table, db_url, dry_run=True, chunksize=7)
+    assert result["success"] and result["chunks"] == 5 and result["rowCount"] == 30
+    assert column_types(db_url, table) == {}
+
+
+def staging_tables(db_url, table):
+    from db import get_engine
+    with get_engine(db_url).connect() as conn:
+        return conn.exec_driver_sql("SELECT relname FROM pg_class WHERE relname LIKE %s",
+                                    (f"_load_{table}%",)).fetchall()
+
+
+def test_copy_round_trips_awkward_text_and_types(pg_tables):
+    from db import get_engine
+    db_url, new_table = pg_tables
+    table = new_table("copy")
+    df = pd.DataFrame({
+        "note": ["a,b", 'say "hi"', "two\nlines", "\\N", "", None, "ünïcode"],
+        "roll_no": range(1, 8),
+        "fee": [1.5, 2.0, 3.25, 4.0, 5.0, 6.0, 7.0],
+        "paid_on": pd.to_datetime(["2024-01-0%d" % d for d in range(1, 8)]),
+        "active": [True, False, True, True, False, True, False],
+    })
+    with get_engine(db_url).begin() as conn:
+        assert replace_table(conn, table, df) == 7
+    out = read_table(db_url, table).sort_values("roll_no", ignore_index=True)
+    # Missing text is '' as it always was; a literal \N is text, not NULL
+    assert out["note"].tolist() == ["a,b", 'say "hi"', "two\nlines", "\\N", "", "", "ünïcode"]
+    assert column_types(db_url, table) == {
+        "note": "text", "roll_no": "bigint", "fee": "double precision",
+        "paid_on": "timestamp without time zone", "active": "boolean",
+    }
+    assert not staging_tables(db_url, table)
+
+
+def test_replace_swaps_the_table_in_one_transaction(pg_tables):
+    db_url, new_table = pg_tables
+    table = new_table("swap")
+    first = process_file_and_load(csv_upload(["roll_no,city", "1,Pune", "2,Delhi"]), "s.csv", table, db_url)
+    assert first["success"], first.get("errors")
+
+    def cancel_at_commit(stage, logs, **counts):
+        if stage == "committing":
+            raise PipelineCancelled("stop")
+
+    # Cancelled after the swap ran but before the commit - the old table is untouched
+    with pytest.raises(PipelineCancelled):
+        process_file_and_load(csv_upload(["roll_no,name", "9,Asha"]), "s.csv", table, db_url,
+                              chunksize=1, progress=cancel_at_commit)
+    assert read_table(db_url, table)["city"].tolist() == ["Pune", "Delhi"]
+    assert not staging_tables(db_url, table)
+
+    result = process_file_and_load(csv_upload(["roll_no,name", "9,Asha"]), "s.csv", table, db_url)
+    assert result["success"], result.get("errors")
+    assert read_table(db_url, table).to_dict("records") == [{"roll_no": 9, "name": "Asha"}]
+    assert not staging_tables(db_url, table)
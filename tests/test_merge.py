@@ -0,0 +1,108 @@
+"""
+🧪 Append/upsert merges round-trip against PostgreSQL
+Needs TEST_DATABASE_URL (postgresql://...); every test runs in a transaction that is rolled back.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from loader import TableLoader, replace_table
+from planner import plan_columns
+from processor import finish_load
+
+DB_URL = os.environ.get("TEST_DATABASE_URL", "")
+pytestmark = pytest.mark.skipif(not DB_URL.startswith("postgresql"), reason="needs TEST_DATABASE_URL for PostgreSQL")
+TABLE = "merge_test_students"
+
+
+@pytest.fixture
+def conn():
+    from sqlalchemy import create_engine
+    engine = create_engine(DB_URL)
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            yield conn
+        finally:
+            trans.rollback()
+    engine.dispose()
+
+
+def merge(conn, df, keys, update=True):
+    loader = TableLoader(conn, TABLE)
+    loader.write(df)
+    return loader.merge(keys, update=update)
+
+
+def rows(conn):
+    return conn.exec_driver_sql(f"SELECT * FROM {TABLE} ORDER BY roll_no").mappings().all()
+
+
+def roster(n=20):
+    return pd.DataFrame({
+        "roll_no": [float(i) if i % 5 else np.nan for i in range(n)],
+        "student_name": [f"Student {i}" for i in range(n)],
+        "email_id": [f"s{i}@x.com" for i in range(n)],
+        "total_paid": [100.0] * n,
+    })
+
+
+def test_reupsert_is_idempotent_and_skips_null_keys(conn):
+    df = roster()
+    first = merge(conn, df, ["roll_no"])
+    assert first == {"inserted": 16, "updated": 0, "unchanged": 0, "skipped": 4, "rows": 16}
+    again = merge(conn, df, ["roll_no"])
+    assert again == {"inserted": 0, "updated": 0, "unchanged": 16, "skipped": 4, "rows": 16}
+
+
+def test_corrections_update_in_place(conn):
+    df = roster()
+    merge(conn, df, ["roll_no"])
+    fixed = df.copy()
+    fixed.loc[1, "student_name"] = "Renamed"
+    fixed.loc[2, "email_id"] = "fixed@x.com"
+    fixed.loc[3, "total_paid"] = 250.0
+    counts = merge(conn, fixed, ["roll_no"])
+    assert counts == {"inserted": 0, "updated": 3, "unchanged": 13, "skipped": 4, "rows": 16}
+    by_roll = {r["roll_no"]: r for r in rows(conn)}
+    assert by_roll["1.0"]["student_name"] == "Renamed"
+    assert by_roll["2.0"]["email_id"] == "fixed@x.com"
+    assert float(by_roll["3.0"]["total_paid"]) == 250.0
+
+
+def test_typed_key_with_blanks_is_skipped(conn):
+    merge(conn, pd.DataFrame({"roll_no": [1, 2, 3], "student_name": ["A", "B", "C"]}), ["roll_no"])
+    # NaN makes this chunk's roll_no TEXT in staging - blanks become NULL on the BIGINT target
+    counts = merge(conn, pd.DataFrame({"roll_no": [1.0, np.nan, 4.0], "student_name": ["A2", "X", "D"]}), ["roll_no"])
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 0, "skipped": 1, "rows": 4}
+    assert [r["student_name"] for r in rows(conn)] == ["A2", "B", "C", "D"]
+
+
+def test_append_keeps_existing_rows(conn):
+    df = roster()
+    merge(conn, df, ["roll_no"])
+    fixed = df.assign(student_name="Changed")
+    counts = merge(conn, fixed, ["roll_no"], update=False)
+    assert counts["inserted"] == 0 and counts["updated"] == 0
+    assert {r["student_name"] for r in rows(conn)} != {"Changed"}
+
+
+def test_default_keys_are_the_id_columns(conn):
+    df = roster()
+    logs = []
+    loader = TableLoader(conn, TABLE)
+    loader.write(df)
+    merged = finish_load(loader, "upsert", None, logs, plan_columns(df))
+    # Not student_name / email_id / total_paid - identifier_columns() would have picked those too
+    assert merged["keyColumns"] == ["roll_no"]
+    assert merged["merge"]["skipped"] == 4
+    assert any("Skipped 4 rows" in line for line in logs)
+
+
+def test_repeated_key_in_existing_table_is_reported(conn):
+    replace_table(conn, TABLE, pd.DataFrame({"roll_no": [1, 1, 2], "student_name": ["A", "B", "C"]}))
+    with pytest.raises(ValueError, match="more than one row with roll_no=1"):
+        merge(conn, pd.DataFrame({"roll_no": [3], "student_name": ["D"]}), ["roll_no"])
@@ -0,0 +1,40 @@
+"""
+🧪 Pipeline timings: every recorded stage is a documented one, and runs show up in the Prometheus text
+"""
+
+import io
+
+import pytest
+
+import metrics
+from processor import process_file_and_load
+
+CSV = "\n".join(["Roll No,Student Name,Gender"] + [f"{i},student {i},{'mf'[i % 2]}" for i in range(1, 13)])
+
+
+@pytest.mark.parametrize("options, expected", [
+    ({"dry_run": True}, ["read", "drop_empty", "dedup", "plan", "clean", "near_dedup", "compact", "total"]),
+    ({"return_file": True, "chunksize": 5}, ["read", "drop_empty", "dedup", "plan", "clean", "near_dedup",
+                                             "compact", "csv", "total"]),
+])
+def test_stages_are_the_documented_set(options, expected):
+    result = process_file_and_load(io.BytesIO(CSV.encode("utf-8")), "s.csv", "t", None, **options)
+    assert result["success"], result.get("errors")
+    stages = list(dict.fromkeys(record["stage"] for record in result["timings"]))
+    assert sorted(stages) == sorted(expected)
+    assert set(stages) <= set(metrics.STAGES)
+    cleaners = {record["column"]: record["kind"] for record in result["timings"] if record["stage"] == "clean"}
+    assert set(cleaners) == {"roll_no", "student_name", "gender"}
+
+
+def test_runs_and_stages_in_prometheus_text():
+    timings = metrics.Timings()
+    with timings.stage("read", rows=10):
+        pass
+    timings.add("clean", 0.5, column="gender", kind="gender", rows=10)
+    metrics.record_run(timings.report(), "cancelled")
+    text = metrics.prometheus_text()
+    assert 'pipeline_runs_total{status="cancelled"}' in text
+    assert 'pipeline_stage_rows_total{stage="clean",kind="gender"}' in text
+    # Per-column records roll up by kind - no column label
+    assert 'column=' not in text
@@ -0,0 +1,41 @@
+"""
+🧪 Column planner: header keywords and per-file content sniffing
+"""
+
+import pandas as pd
+import pytest
+
+from planner import header_votes, plan_columns
+
+
+@pytest.mark.parametrize("col, kind", [
+    ("dateofbirth", "date"),
+    ("mobileno", "phone"),
+    ("fathername", "name"),
+    ("emailaddress", "email"),
+    ("rollno", "id"),
+    ("student_id", "id"),
+    ("total_paid", "amount"),
+])
+def test_run_together_headers_vote(col, kind):
+    votes = header_votes(col)
+    assert max(votes, key=votes.get) == kind
+
+
+@pytest.mark.parametrize("col", ["hotel", "hostel", "candidate", "feedback", "validated"])
+def test_keywords_inside_other_words_dont_vote(col):
+    assert header_votes(col) == {}
+
+
+def test_same_headers_different_content_get_their_own_plan():
+    emails = pd.DataFrame({"info": [f"user{i}@example.com" for i in range(50)]})
+    notes = pd.DataFrame({"info": ["called back, will pay next week"] * 50})
+    assert plan_columns(emails)[0]["kind"] == "email"
+    assert plan_columns(notes)[0]["kind"] == "text"
+    assert plan_columns(emails)[0]["kind"] == "email"
+
+
+def test_content_vetoes_a_misleading_header():
+    df = pd.DataFrame({"hotel_phone": ["Grand Palace"] * 20, "mobile": ["98765 43210"] * 20})
+    kinds = {step["column"]: step["kind"] for step in plan_columns(df)}
+    assert kinds == {"hotel_phone": "text", "mobile": "phone"}
@@ -0,0 +1,75 @@
+"""
+🧪 Query spec -> SQL validation (no database needed)
+"""
+
+from collections import OrderedDict
+
+import pytest
+
+from query import build_query
+
+COLUMNS = OrderedDict([
+    ("student_name", "text"), ("gender", "text"), ("score", "text"),
+    ("date_of_birth", "text"), ("fee_amount", "double precision"),
+])
+
+
+def test_plain_select_with_filters():
+    sql, params, names, limit = build_query("students", COLUMNS, {
+        "select": ["student_name"], "filters": [{"column": "fee_amount", "op": ">", "value": 100}], "limit": 10,
+    })
+    assert names == ["student_name"]
+    assert '"fee_amount" > :p0' in sql and params == {"p0": 100}
+    assert sql.endswith("LIMIT 11") and limit == 10
+
+
+@pytest.mark.parametrize("op", ["<", "<=", ">", ">="])
+@pytest.mark.parametrize("value", [5, 2.5, "10"])
+def test_numeric_range_on_text_column_is_refused(op, value):
+    with pytest.raises(ValueError, match="would compare text"):
+        build_query("students", COLUMNS, {"filters": [{"column": "score", "op": op, "value": value}]})
+
+
+def test_text_range_on_text_column_is_allowed():
+    # YYYY-MM-DD dates order correctly as text
+    sql, params, _, _ = build_query("students", COLUMNS, {
+        "filters": [{"column": "date_of_birth", "op": ">=", "value": "2024-01-01"}],
+    })
+    assert params == {"p0": "2024-01-01"}
+
+
+def test_equality_on_text_column_binds_numbers_as_text():
+    _, params, _, _ = build_query("students", COLUMNS, {
+        "filters": [{"column": "score", "op": "in", "value": [1, 2.5]}],
+    })
+    assert params == {"p0": "1", "p1": "2.5"}
+
+
+@pytest.mark.parametrize("extra", [{"group_by": ["gender"]}, {"aggregates": [{"fn": "count"}]}])
+def test_select_with_grouping_is_refused(extra):
+    with pytest.raises(ValueError, match="'select' can't be combined"):
+        build_query("students", COLUMNS, dict(extra, select=["student_name"]))
+
+
+def test_group_by_with_aggregates():
+    sql, _, names, _ = build_query("students", COLUMNS, {
+        "group_by": ["gender"],
+        "aggregates": [{"fn": "count"}, {"fn": "avg", "column": "fee_amount", "as": "avg_fee"}],
+        "sort": [{"column": "avg_fee", "desc": True}],
+    })
+    assert names == ["gender", "count", "avg_fee"]
+    assert 'GROUP BY "gender"' in sql and 'ORDER BY "avg_fee" DESC' in sql
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"filters": [{"column": "nope", "op": "="}]}, "Unknown column"),
+    ({"aggregates": [{"fn": "avg", "column": "student_name"}]}, "needs a numeric column"),
+    ({"filters": [{"column": "gender", "op": "like", "value": "x"}]}, "op must be one of"),
+    ({"filters": ["age"]}, "'filters' must be a list of objects"),
+    ({"filters": {"column": "age"}}, "'filters' must be a list of objects"),
+    ({"aggregates": ["count"]}, "'aggregates' must be a list of objects"),
+    ({"sort": ["age"]}, "'sort' must be a list of objects"),
+])
+def test_bad_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        build_query("students", COLUMNS, spec)
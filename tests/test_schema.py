@@ -0,0 +1,60 @@
+"""
+🧪 Schema engine: column resolution tiers and the type conversions
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import CompiledSchema, convert
+
+
+def test_schema_dates_read_month_first():
+    # Auto-cleaned date columns read this as 3 April - schema dates keep the month-first reading
+    out, bad = convert(pd.Series(["03/04/2024", "12/31/2023", "03/04/2024"]), "date")
+    assert out.tolist() == ["2024-03-04", "2023-12-31", "2024-03-04"]
+    assert bad == 0
+
+
+def test_schema_dates_in_mixed_formats():
+    s = pd.Series(["2024-01-05", "03/04/2024", "5 Jan 2024", "junk", "", None])
+    out, bad = convert(s, "date")
+    assert out.tolist() == ["2024-01-05", "2024-03-04", "2024-01-05", "", "", ""]
+    assert bad == 1
+
+
+def test_datetime_column_passes_through():
+    out, bad = convert(pd.Series(pd.to_datetime(["2024-02-29", None])), "date")
+    assert out.tolist() == ["2024-02-29", ""]
+    assert bad == 0
+
+
+def test_other_conversions_count_failures():
+    out, bad = convert(pd.Series(["12", "x", None]), "number")
+    assert out.tolist() == [12, 0, 0] and bad == 1
+    out, bad = convert(pd.Series([9876543210.0, 12345.0]), "phone")
+    assert out[0] == "+91-98765-43210" and bad == 1
+    out, _ = convert(pd.Series(["Yes", "no", None]), "boolean")
+    assert out.tolist() == [True, False, False]
+    out, bad = convert(pd.Series([None, " A@B.in", "nope"]), "email")
+    assert np.isnan(out[0]) and out[1] == "a@b.in" and bad == 1
+
+
+def test_fields_resolve_through_exact_normalized_and_fuzzy_tiers():
+    schema = CompiledSchema([
+        {"name": "Student Name", "type": "text"},
+        {"name": "dob", "type": "date", "mapFrom": "Date of Birth"},
+        {"name": "Phone", "type": "phone"},
+        {"name": "Grade", "type": "text"},
+    ], ["student name", "Date of Birth", "Phone No", "Remarks"])
+    tiers = {f["name"]: (f["source"], f["match"]) for f in schema.fields}
+    assert tiers["Student Name"] == ("student name", "normalized")
+    assert tiers["dob"] == ("Date of Birth", "exact")
+    assert tiers["Phone"] == ("Phone No", "fuzzy")
+    assert tiers["Grade"] == (None, None)
+
+    df = pd.DataFrame({"student name": ["Asha"], "Date of Birth": ["03/04/2024"],
+                       "Phone No": ["98765 43210"], "Remarks": ["x"]})
+    out, failures = schema.apply(df)
+    assert out.columns.tolist() == ["Student Name", "dob", "Phone", "Grade"]
+    assert out.iloc[0].tolist() == ["Asha", "2024-03-04", "+91-98765-43210", ""]
+    assert failures == {"Student Name": 0, "dob": 0, "Phone": 0, "Grade": 0}
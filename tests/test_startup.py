@@ -0,0 +1,54 @@
+"""
+🧪 Cold start: importing the app and light routes don't load pandas / numpy / pyarrow
+Each check runs in a fresh interpreter - this one already has everything imported.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import API_DIR
+
+SCRIPT = """
+import json, sys
+import python
+
+def heavy():
+    return [m for m in ("pandas", "numpy", "sqlalchemy", "pyarrow") if m in sys.modules]
+
+out = {"import": heavy()}
+python.health()
+out["health"] = heavy()
+out["startup"] = python.startup_report()
+out["breakdown_status"] = python.startup_report(breakdown=True).status_code
+python.list_tables()
+out["tables"] = heavy()
+out["tables_lazy"] = sorted(python.LAZY_IMPORT_MS)
+python.processor.TRANSFORMER_VERSION
+out["processor"] = heavy()
+print(json.dumps(out))
+"""
+
+
+def run_app_script():
+    env = dict(os.environ, DATABASE_URL_DATA_PIPELINE="postgresql://nobody@127.0.0.1:1/none",
+               STARTUP_IMPORT_BREAKDOWN="", COLD_START_BUDGET_MS="60000")
+    proc = subprocess.run([sys.executable, "-c", SCRIPT], cwd=API_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def test_heavy_modules_load_only_with_the_routes_that_need_them():
+    out = run_app_script()
+    assert out["import"] == [] and out["health"] == []
+    startup = out["startup"]
+    assert startup["heavy_modules_loaded"] == []
+    assert startup["lazy_import_ms"] == {}
+    assert 0 < startup["module_import_ms"] and startup["within_budget"] is True
+    # The import breakdown spawns an interpreter - refused unless a deployment opts in
+    assert out["breakdown_status"] == 403
+    # Listing tables needs SQLAlchemy, not pandas
+    assert out["tables"] == ["sqlalchemy"] and out["tables_lazy"] == ["db"]
+    assert {"pandas", "numpy"} <= set(out["processor"])